@@ -0,0 +1,338 @@
+"""Benchmark the agent loop offline against a scripted stand-in for the Gemini client.
+
+main() is run end to end, tools included, over synthetic working
+directories of increasing size. The fake client replays a fixed script of
+function calls and a final text answer, streamed in chunks like the real
+API, optionally sleeping to simulate model latency. Results are written as JSON so runs can be compared:
+
+    python benchmarks/agent_loop.py --sizes 10,100,1000 --repeat 3 --output before.json
+
+A working directory of size N has main.py, pkg/__init__.py and
+pkg/module_0000.py ... pkg/module_<N-1>.py. A custom --script is a JSON list
+of turns, each a list of {"call": name, "args": {...}} or {"text": "..."};
+"{last}" in a string argument is replaced by the number of the last module.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types  # noqa: E402
+
+import main as agent  # noqa: E402
+from compaction import estimate_tokens  # noqa: E402
+import response_cache  # noqa: E402
+import sessions  # noqa: E402
+from functions import run_tests, search_files  # noqa: E402
+
+DEFAULT_SCRIPT = [
+    [{"call": "get_files_info", "args": {"directory": ".", "depth": 3}}],
+    [
+        {"call": "search_files", "args": {"query": "def compute_0"}},
+        {"call": "get_file_content", "args": {"file_path": "pkg/module_0000.py"}},
+    ],
+    [
+        {"call": "get_file_content", "args": {"file_path": "pkg/module_{last}.py", "start_line": 1, "end_line": 20}},
+        {"call": "get_files_info", "args": {"directory": "pkg", "pattern": "*.py"}},
+    ],
+    [
+        {
+            "call": "edit_file",
+            "args": {
+                "file_path": "pkg/module_0000.py",
+                "edits": [{"search": "return value * 0\n", "replace": "return value * 0 + 1\n"}],
+            },
+        }
+    ],
+    [{"call": "run_python_file", "args": {"file_path": "main.py", "args": ["3"]}}],
+    [{"text": "The modules compute scaled values; compute_0 now adds one."}],
+]
+
+MODULE_TEMPLATE = '''"""Synthetic module {number} for the agent loop benchmark."""
+
+
+def compute_{number}(value):
+    """Scale value by {number}."""
+    return value * {number}
+
+
+class Accumulator{number}:
+    def __init__(self):
+        self.total = 0
+
+    def add(self, value):
+        self.total += compute_{number}(value)
+        return self.total
+
+    def reset(self):
+        self.total = 0
+'''
+
+MAIN_TEMPLATE = '''import sys
+from pkg import module_0000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    accumulator = module_0000.Accumulator0()
+    for value in range(count):
+        accumulator.add(value)
+    print(accumulator.total)
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def make_working_directory(root, size):
+    """Create a synthetic working directory with size modules."""
+    path = tempfile.mkdtemp(prefix=f"agent-bench-{size}-", dir=root)
+    os.makedirs(os.path.join(path, "pkg"))
+    with open(os.path.join(path, "main.py"), "w") as f:
+        f.write(MAIN_TEMPLATE)
+    with open(os.path.join(path, "pkg", "__init__.py"), "w") as f:
+        f.write("")
+    for number in range(size):
+        with open(os.path.join(path, "pkg", f"module_{number:04d}.py"), "w") as f:
+            f.write(MODULE_TEMPLATE.format(number=number))
+    return path
+
+
+def _fill(value, last):
+    if isinstance(value, str):
+        return value.replace("{last}", last)
+    if isinstance(value, list):
+        return [_fill(item, last) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, last) for key, item in value.items()}
+    return value
+
+
+class FakeModels:
+    def __init__(self, turns, latency):
+        self.turns = list(turns)
+        self.latency = latency
+        self.requests = []
+
+    def _next_turn(self, contents, config):
+        started = time.perf_counter()
+        request_bytes = sum(len(content.model_dump_json(exclude_none=True).encode()) for content in contents)
+        config_bytes = len(config.model_dump_json(exclude_none=True).encode()) if config else 0
+        self.requests.append({
+            "started": started,
+            "messages": len(contents),
+            "request_bytes": request_bytes + config_bytes,
+            "estimated_tokens": sum(estimate_tokens(content) for content in contents) + config_bytes // 4,
+        })
+        turn = self.turns.pop(0) if self.turns else [{"text": "Done."}]
+        parts = [
+            types.Part.from_function_call(name=step["call"], args=step.get("args", {}))
+            if "call" in step else types.Part(text=step["text"])
+            for step in turn
+        ]
+        prompt_tokens = self.requests[-1]["estimated_tokens"]
+        candidates_tokens = sum(len(part.model_dump_json(exclude_none=True)) for part in parts) // 4
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=candidates_tokens,
+            total_token_count=prompt_tokens + candidates_tokens,
+        )
+        return parts, usage
+
+    def generate_content(self, model, contents, config=None):
+        parts, usage = self._next_turn(contents, config)
+        if self.latency:
+            time.sleep(self.latency)
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+            usage_metadata=usage,
+        )
+
+    def generate_content_stream(self, model, contents, config=None):
+        # One chunk per function call and per word of text, the latency
+        # spread over the chunks; usage comes with the last chunk
+        parts, usage = self._next_turn(contents, config)
+        chunks = []
+        for part in parts:
+            if part.text:
+                words = part.text.split(" ")
+                chunks.extend(types.Part(text=word if i == 0 else " " + word) for i, word in enumerate(words))
+            else:
+                chunks.append(part)
+        for index, part in enumerate(chunks):
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield types.GenerateContentResponse(
+                candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))],
+                usage_metadata=usage if index == len(chunks) - 1 else None,
+            )
+
+
+class FakeClient:
+    """Replays scripted responses in place of genai.Client."""
+
+    def __init__(self, turns, latency=0.0):
+        self.models = FakeModels(turns, latency)
+
+
+class ToolTimer:
+    """Wrap tool functions and add up calls and time per tool."""
+
+    def __init__(self):
+        self.tools = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, name, function):
+        def timed(**kwargs):
+            started = time.perf_counter()
+            try:
+                return function(**kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self.lock:
+                    stats = self.tools.setdefault(name, {"calls": 0, "seconds": 0.0})
+                    stats["calls"] += 1
+                    stats["seconds"] += elapsed
+        return timed
+
+
+@contextlib.contextmanager
+def patched_agent(client, working_directory, timer, argv, cache_dir):
+    """Point main at the fake client, the working directory and timed tools,
+    and keep everything written to disk (indexes, test results, sessions and
+    their blobs, recorded responses) in cache_dir."""
+    # (module, attribute) -> value used during the run
+    cache_paths = {
+        (search_files, "CACHE_DIR"): cache_dir,
+        (run_tests, "CACHE_DIR"): cache_dir,
+        (sessions, "SESSIONS_DIR"): os.path.join(cache_dir, "sessions"),
+        (response_cache, "RESPONSE_CACHE_DIR"): os.path.join(cache_dir, "responses"),
+    }
+    saved = {
+        "client": agent.genai.Client,
+        "wd": agent.WORKING_DIRECTORY,
+        "map": dict(agent.FUNCTION_MAP),
+        "argv": sys.argv,
+        "cache_paths": {key: getattr(*key) for key in cache_paths},
+    }
+    agent.genai.Client = lambda **kwargs: client
+    agent.WORKING_DIRECTORY = working_directory
+    for name, function in saved["map"].items():
+        agent.FUNCTION_MAP[name] = timer.wrap(name, function)
+    sys.argv = argv
+    for (module, name), path in cache_paths.items():
+        setattr(module, name, path)
+    try:
+        yield
+    finally:
+        agent.genai.Client = saved["client"]
+        agent.WORKING_DIRECTORY = saved["wd"]
+        agent.FUNCTION_MAP.clear()
+        agent.FUNCTION_MAP.update(saved["map"])
+        sys.argv = saved["argv"]
+        for (module, name), path in saved["cache_paths"].items():
+            setattr(module, name, path)
+
+
+def run_once(root, size, script, latency, sequential):
+    working_directory = make_working_directory(root, size)
+    turns = _fill(script, f"{size - 1:04d}")
+    client = FakeClient(turns, latency)
+    timer = ToolTimer()
+    argv = ["main.py", "Explain and fix the modules"] + (["--sequential"] if sequential else [])
+
+    output = io.StringIO()
+    with patched_agent(client, working_directory, timer, argv, os.path.join(root, "cache")):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            agent.main()
+        finished = time.perf_counter()
+
+    requests = client.models.requests
+    iterations = []
+    for index, request in enumerate(requests):
+        ends = requests[index + 1]["started"] if index + 1 < len(requests) else finished
+        iterations.append({
+            "wall_seconds": ends - request["started"],
+            "messages": request["messages"],
+            "request_bytes": request["request_bytes"],
+            "estimated_tokens": request["estimated_tokens"],
+        })
+
+    shutil.rmtree(working_directory, ignore_errors=True)
+    return {
+        "files": size + 2,
+        "wall_seconds": finished - started,
+        # Time before the first model call: setup and the prefetch wait
+        "startup_seconds": (requests[0]["started"] if requests else finished) - started,
+        "iterations": iterations,
+        "request_bytes": sum(request["request_bytes"] for request in requests),
+        "estimated_tokens": sum(request["estimated_tokens"] for request in requests),
+        "tools": timer.tools,
+        "final_response": "Final response:" in output.getvalue(),
+        # Peak so far for this process and its reaped children, in KiB (Linux)
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_children_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000", help="comma separated module counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake model call")
+    parser.add_argument("--script", help="JSON file with the scripted model turns")
+    parser.add_argument("--sequential", action="store_true", help="pass --sequential to main()")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    options = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if options.script:
+        with open(options.script) as f:
+            script = json.load(f)
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    root = tempfile.mkdtemp(prefix="agent-bench-")
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": options.latency,
+        "sequential": options.sequential,
+        "runs": [],
+    }
+    try:
+        for size in (int(size) for size in options.sizes.split(",")):
+            for repeat in range(options.repeat):
+                run = run_once(root, size, script, options.latency, options.sequential)
+                run.update(size=size, repeat=repeat)
+                report["runs"].append(run)
+                print(
+                    f"size={size} repeat={repeat}: {run['wall_seconds'] * 1000:.1f} ms, "
+                    f"{len(run['iterations'])} iterations, {run['request_bytes']} bytes sent",
+                    file=sys.stderr,
+                )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Check import and startup time against a budget.
+
+Every measurement runs in a fresh interpreter and the median of --runs is
+compared with its budget; the script exits with status 1 if any is over:
+
+    python benchmarks/import_time.py --runs 5
+
+The tool modules and the registry must also import without google.genai.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOOL_MODULES = [
+    "functions.get_files_info",
+    "functions.get_file_content",
+    "functions.get_code_outline",
+    "functions.get_symbol",
+    "functions.write_file",
+    "functions.edit_file",
+    "functions.run_python_file",
+    "functions.run_tests",
+    "functions.search_files",
+    "functions.evaluate_expression",
+]
+
+# Name -> (code run in a fresh interpreter, budget in milliseconds)
+MEASUREMENTS = {
+    # The registry with every schema described, and all tool implementations
+    "functions": (
+        "from functions import registry\n"
+        "for name in registry.TOOLS: registry.describe(name)\n"
+        + "".join(f"import {module}\n" for module in TOOL_MODULES)
+        + "import sys\n"
+        "assert not any(m == 'google.genai' for m in sys.modules), 'google.genai was imported'\n",
+        150,
+    ),
+    # Everything main.py needs before its first model call, SDK included
+    "main": ("import main\n", 1500),
+}
+
+# Running main.py up to its first error exit, interpreter startup included
+STARTUP_BUDGET_MS = 2000
+
+
+def _time_code(code):
+    # Time only the imports, inside the child, so interpreter startup is excluded
+    wrapped = f"import time\nstarted = time.perf_counter()\n{code}print(time.perf_counter() - started)\n"
+    result = subprocess.run([sys.executable, "-c", wrapped], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+
+def _time_startup():
+    # No prompt: main() loads everything, then exits with "No prompt provided"
+    env = dict(os.environ, GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "budget-check"))
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "main.py"], cwd=ROOT, env=env, capture_output=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    options = parser.parse_args()
+
+    timers = {name: (lambda code=code: _time_code(code), budget) for name, (code, budget) in MEASUREMENTS.items()}
+    timers["startup"] = (_time_startup, STARTUP_BUDGET_MS)
+
+    results = {}
+    for name, (timer, budget) in timers.items():
+        samples = [timer() for _ in range(options.runs)]
+        median = statistics.median(samples)
+        results[name] = {"median_ms": round(median, 1), "budget_ms": budget, "ok": median <= budget}
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            status = "ok" if result["ok"] else "OVER BUDGET"
+            print(f"{name:<10} {result['median_ms']:>8.1f} ms (budget {result['budget_ms']} ms) {status}")
+    return 0 if all(result["ok"] for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,46 @@
 
 import sys
 from pkg.calculator import Calculator
-from pkg.render import format_json_output
+from pkg.render import format_json_error, format_json_output
+
+# Lines of NDJSON collected before each write in streaming mode
+STREAM_BUFFER_LINES = 4096
+
+EMPTY_EXPRESSION_ERROR = "Expression is empty or contains only whitespace."
+INVALID_UTF8_ERROR = "Line is not valid UTF-8."
+
+
+def stream_expressions(calculator, lines, output):
+    """Evaluate one expression per line and write one JSON object per line.
+
+    A line that fails produces an "error" object instead of stopping the run.
+    Lines are expected to be decoded with errors="replace", so bytes that are
+    not valid UTF-8 arrive as U+FFFD and are reported the same way.
+    """
+    buffer = []
+    try:
+        for line in lines:
+            expression = line.rstrip("\r\n")
+            try:
+                if "\ufffd" in expression:
+                    buffer.append(format_json_error(expression, INVALID_UTF8_ERROR))
+                    continue
+                result = calculator.evaluate(expression)
+                if result is not None:
+                    buffer.append(format_json_output(expression, result, indent=None))
+                else:
+                    buffer.append(format_json_error(expression, EMPTY_EXPRESSION_ERROR))
+            except Exception as e:
+                buffer.append(format_json_error(expression, str(e)))
+            finally:
+                if len(buffer) >= STREAM_BUFFER_LINES:
+                    output.write("\n".join(buffer) + "\n")
+                    buffer.clear()
+    finally:
+        # Whatever was evaluated is written, even if reading the input failed
+        if buffer:
+            output.write("\n".join(buffer) + "\n")
+        output.flush()
 
 
 def main():
@@ -10,9 +49,20 @@ def main():
     if len(sys.argv) <= 1:
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
+        print('       python main.py --stream [file]   (one expression per line, NDJSON output)')
         print('Example: python main.py "3 + 5"')
         return
 
+    if sys.argv[1] == "--stream":
+        path = sys.argv[2] if len(sys.argv) > 2 else "-"
+        if path == "-":
+            sys.stdin.reconfigure(encoding="utf-8", errors="replace")
+            stream_expressions(calculator, sys.stdin, sys.stdout)
+        else:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                stream_expressions(calculator, f, sys.stdout)
+        return
+
     expression = " ".join(sys.argv[1:])
     try:
         result = calculator.evaluate(expression)
@@ -20,7 +70,7 @@ def main():
             to_print = format_json_output(expression, result)
             print(to_print)
         else:
-            print("Error: Expression is empty or contains only whitespace.")
+            print(f"Error: {EMPTY_EXPRESSION_ERROR}")
     except Exception as e:
         print(f"Error: {e}")
 
@@ -0,0 +1,125 @@
+# batch.py
+
+import math
+from array import array
+
+from pkg.calculator import Calculator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DIVISION_BY_ZERO = "float division by zero"
+
+
+class BatchResult:
+    """Values of one expression over a batch of rows.
+
+    values holds one float per row (a NumPy array or an array('d')), NaN
+    where the row failed; errors maps those rows to the error message
+    Calculator.evaluate would have raised for them.
+    """
+
+    def __init__(self, values, errors):
+        self.values = values
+        self.errors = errors
+
+
+def evaluate_batch(expression, columns, calculator=None, use_numpy=None):
+    """Evaluate an expression once per row of columns.
+
+    columns maps variable names used in the expression to equally long
+    sequences of numbers (lists, NumPy arrays, array('d'), ...). Per row, a
+    value that is not a number fails with "invalid token: <value>" and a
+    division by zero fails with "float division by zero"; other rows are
+    unaffected. Errors in the expression itself raise ValueError for the
+    whole batch. NumPy is used when installed unless use_numpy is False.
+    """
+    calculator = calculator or Calculator()
+    if not expression or expression.isspace():
+        raise ValueError("expression is empty")
+
+    names = tuple(columns)
+    lengths = {len(columns[name]) for name in names}
+    if len(lengths) > 1:
+        raise ValueError("columns must all have the same length")
+    rows = lengths.pop() if lengths else 1
+
+    compiled = calculator.compile(expression, variables=names)
+    if compiled.error is not None:
+        raise ValueError(compiled.error)
+
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ImportError("NumPy is not installed")
+    if use_numpy:
+        return _evaluate_numpy(compiled, columns, rows, calculator.operators["/"])
+    return _evaluate_python(compiled, columns, rows)
+
+
+def _evaluate_python(compiled, columns, rows):
+    values = array("d", bytes(8 * rows))
+    errors = {}
+    row_values = {}
+    for row in range(rows):
+        try:
+            for name, column in columns.items():
+                value = column[row]
+                try:
+                    row_values[name] = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"invalid token: {value}")
+            values[row] = compiled.evaluate(row_values)
+        except (ValueError, ZeroDivisionError) as e:
+            values[row] = math.nan
+            errors[row] = str(e)
+    return BatchResult(values, errors)
+
+
+def _as_float_column(column, errors):
+    try:
+        return np.asarray(column, dtype=float)
+    except (TypeError, ValueError):
+        pass
+
+    # Some values are not numbers: convert one by one and mark those rows
+    converted = np.empty(len(column))
+    for row, value in enumerate(column):
+        try:
+            converted[row] = float(value)
+        except (TypeError, ValueError):
+            converted[row] = math.nan
+            errors.setdefault(row, f"invalid token: {value}")
+    return converted
+
+
+def _evaluate_numpy(compiled, columns, rows, division):
+    errors = {}
+    arrays = {name: _as_float_column(column, errors) for name, column in columns.items()}
+    failed = np.zeros(rows, dtype=bool)
+    failed[list(errors)] = True
+
+    # Same postfix program as CompiledExpression.evaluate, one column at a time
+    stack = []
+    with np.errstate(all="ignore"):
+        for step in compiled.program:
+            if type(step) is float:
+                # A NumPy scalar divides by zero like the columns do, without raising
+                stack.append(np.float64(step))
+            elif type(step) is str:
+                stack.append(arrays[step])
+            else:
+                b = stack.pop()
+                a = stack.pop()
+                if step is division:
+                    zero = np.broadcast_to(np.asarray(b) == 0, (rows,))
+                    for row in np.flatnonzero(zero & ~failed):
+                        errors[int(row)] = DIVISION_BY_ZERO
+                    failed |= zero
+                stack.append(step(a, b))
+
+    values = np.array(np.broadcast_to(stack[0], (rows,)), dtype=float)
+    values[failed] = math.nan
+    return BatchResult(values, errors)
@@ -1,12 +1,53 @@
 # calculator.py
 
+import operator
+from collections import OrderedDict
+
+# Compiled expressions kept per Calculator, least recently used dropped first
+COMPILE_CACHE_SIZE = 256
+
+
+class CompiledExpression:
+    """An expression compiled once into a postfix (RPN) program.
+
+    The program is a list of operands (floats), variable names (str) and
+    operator functions. If the expression is invalid, the program stops where
+    evaluation would fail and the error is raised after running it, so a
+    compiled expression raises the same errors, in the same order, as
+    evaluating the text directly.
+    """
+
+    def __init__(self, expression, program, error=None):
+        self.expression = expression
+        self.program = program
+        self.error = error
+
+    def evaluate(self, variables=None):
+        if self.program is None:
+            return None
+
+        values = []
+        for step in self.program:
+            if type(step) is float:
+                values.append(step)
+            elif type(step) is str:
+                values.append(float(variables[step]))
+            else:
+                b = values.pop()
+                values[-1] = step(values[-1], b)
+
+        if self.error is not None:
+            raise ValueError(self.error)
+        return values[0]
+
+
 class Calculator:
     def __init__(self):
         self.operators = {
-            "+": lambda a, b: a + b,
-            "-": lambda a, b: a - b,
-            "*": lambda a, b: a * b,
-            "/": lambda a, b: a / b,
+            "+": operator.add,
+            "-": operator.sub,
+            "*": operator.mul,
+            "/": operator.truediv,
         }
         self.precedence = {
             "+": 1,
@@ -14,48 +55,75 @@ class Calculator:
             "*": 2,
             "/": 2,
         }
+        self._compiled = OrderedDict()
 
     def evaluate(self, expression):
         if not expression or expression.isspace():
             return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
+        return self.compile(expression).evaluate()
+
+    def compile(self, expression, variables=()):
+        """Compile an expression; tokens named in variables are read from the
+        mapping passed to CompiledExpression.evaluate()."""
+        key = (expression, tuple(variables))
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+            return compiled
+
+        if not expression or expression.isspace():
+            compiled = CompiledExpression(expression, None)
+        else:
+            compiled = self._compile_tokens(expression, expression.strip().split(), variables)
+
+        self._compiled[key] = compiled
+        if len(self._compiled) > COMPILE_CACHE_SIZE:
+            self._compiled.popitem(last=False)
+        return compiled
 
     def _evaluate_infix(self, tokens):
-        values = []
-        operators = []
+        return self._compile_tokens(" ".join(tokens), tokens).evaluate()
 
-        for token in tokens:
-            if token in self.operators:
-                while (
-                    operators
-                    and operators[-1] in self.operators
-                    and self.precedence[operators[-1]] >= self.precedence[token]
-                ):
-                    self._apply_operator(operators, values)
-                operators.append(token)
-            else:
-                try:
-                    values.append(float(token))
-                except ValueError:
-                    raise ValueError(f"invalid token: {token}")
+    def _compile_tokens(self, expression, tokens, variables=()):
+        # Shunting-yard, emitting each operator in the order it would be applied
+        program = []
+        operators = []
+        depth = 0
 
-        while operators:
-            self._apply_operator(operators, values)
+        try:
+            for token in tokens:
+                if token in self.operators:
+                    while (
+                        operators
+                        and operators[-1] in self.operators
+                        and self.precedence[operators[-1]] >= self.precedence[token]
+                    ):
+                        depth = self._emit_operator(operators, program, depth)
+                    operators.append(token)
+                elif token in variables:
+                    program.append(token)
+                    depth += 1
+                else:
+                    try:
+                        program.append(float(token))
+                    except ValueError:
+                        raise ValueError(f"invalid token: {token}")
+                    depth += 1
 
-        if len(values) != 1:
-            raise ValueError("invalid expression")
+            while operators:
+                depth = self._emit_operator(operators, program, depth)
 
-        return values[0]
+            if depth != 1:
+                raise ValueError("invalid expression")
+        except ValueError as e:
+            return CompiledExpression(expression, program, str(e))
 
-    def _apply_operator(self, operators, values):
-        if not operators:
-            return
+        return CompiledExpression(expression, program)
 
+    def _emit_operator(self, operators, program, depth):
         operator = operators.pop()
-        if len(values) < 2:
+        if depth < 2:
             raise ValueError(f"not enough operands for operator {operator}")
 
-        b = values.pop()
-        a = values.pop()
-        values.append(self.operators[operator](a, b))
+        program.append(self.operators[operator])
+        return depth - 1
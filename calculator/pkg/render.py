@@ -1,6 +1,18 @@
 # render.py
 
 import json
+from json.encoder import encode_basestring_ascii
+
+
+def _format_number(value) -> str:
+    # Same spelling as json.dumps, including its non-standard NaN/Infinity
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "Infinity"
+    if value == float("-inf"):
+        return "-Infinity"
+    return repr(value)
 
 
 def format_json_output(expression: str, result: float, indent: int = 2) -> str:
@@ -9,8 +21,23 @@ def format_json_output(expression: str, result: float, indent: int = 2) -> str:
     else:
         result_to_dump = result
 
+    # Fast path for single-line output: build the string directly instead
+    # of going through the generic encoder; the text is the same.
+    if indent is None and isinstance(result_to_dump, (int, float)):
+        return (
+            '{"expression": ' + encode_basestring_ascii(expression)
+            + ', "result": ' + _format_number(result_to_dump) + "}"
+        )
+
     output_data = {
         "expression": expression,
         "result": result_to_dump,
     }
     return json.dumps(output_data, indent=indent)
+
+
+def format_json_error(expression: str, error: str) -> str:
+    return (
+        '{"expression": ' + encode_basestring_ascii(expression)
+        + ', "error": ' + encode_basestring_ascii(error) + "}"
+    )
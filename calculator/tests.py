@@ -1,7 +1,17 @@
 # tests.py
 
+import io
+import json
+import math
+import os
+import subprocess
+import sys
 import unittest
+from array import array
+from main import stream_expressions
+from pkg.batch import evaluate_batch, np
 from pkg.calculator import Calculator
+from pkg.render import format_json_output
 
 
 class TestCalculator(unittest.TestCase):
@@ -44,6 +54,111 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.calculator.evaluate("+ 3")
 
+    def test_compile_reuses_compiled_expression(self):
+        compiled = self.calculator.compile("3 * 4 + 5")
+        self.assertIs(self.calculator.compile("3 * 4 + 5"), compiled)
+        self.assertEqual(compiled.evaluate(), 17)
+        self.assertEqual(compiled.evaluate(), 17)
+
+    def test_compiled_errors_match_evaluate(self):
+        cases = {
+            "$ 3 5": "invalid token: $",
+            "+ 3": "not enough operands for operator +",
+            "3 5": "invalid expression",
+        }
+        for expression, message in cases.items():
+            with self.assertRaises(ValueError) as context:
+                self.calculator.compile(expression).evaluate()
+            self.assertEqual(str(context.exception), message)
+
+    def test_compiled_division_by_zero_raised_before_later_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.calculator.evaluate("1 / 0 * $")
+
+
+class TestBatchEvaluation(unittest.TestCase):
+    def test_batch_uses_precedence(self):
+        result = evaluate_batch("x * 2 + y", {"x": [1, 2, 3], "y": array("d", [0, 1, 2])}, use_numpy=False)
+        self.assertEqual(list(result.values), [2, 5, 8])
+        self.assertEqual(result.errors, {})
+
+    def test_batch_errors_are_per_row(self):
+        result = evaluate_batch("x / y", {"x": [1, "abc", 3], "y": [0, 1, 2]}, use_numpy=False)
+        self.assertTrue(math.isnan(result.values[0]))
+        self.assertTrue(math.isnan(result.values[1]))
+        self.assertEqual(result.values[2], 1.5)
+        self.assertEqual(result.errors, {0: "float division by zero", 1: "invalid token: abc"})
+
+    def test_batch_invalid_expression(self):
+        with self.assertRaises(ValueError):
+            evaluate_batch("x + z", {"x": [1]}, use_numpy=False)
+
+    def test_batch_columns_must_have_same_length(self):
+        with self.assertRaises(ValueError):
+            evaluate_batch("x + y", {"x": [1, 2], "y": [1]}, use_numpy=False)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestNumpyBatchEvaluation(unittest.TestCase):
+    def assertSameAsPython(self, expression, columns):
+        numpy_result = evaluate_batch(expression, columns, use_numpy=True)
+        python_result = evaluate_batch(expression, columns, use_numpy=False)
+        self.assertEqual(numpy_result.errors, python_result.errors)
+        for numpy_value, python_value in zip(numpy_result.values, python_result.values):
+            if math.isnan(python_value):
+                self.assertTrue(math.isnan(numpy_value))
+            else:
+                self.assertAlmostEqual(numpy_value, python_value)
+
+    def test_numpy_matches_python(self):
+        self.assertSameAsPython("x * 2 + y / 3 - x", {"x": [1, 2.5, -3], "y": np.array([0.0, 1.0, 2.0])})
+
+    def test_numpy_errors_match_python(self):
+        self.assertSameAsPython("x / y", {"x": [1, "abc", 3, 4], "y": [0, 1, 2, 0.0]})
+
+    def test_numpy_returns_an_array(self):
+        result = evaluate_batch("x + 1", {"x": [1, 2]}, use_numpy=True)
+        self.assertIsInstance(result.values, np.ndarray)
+        self.assertEqual(list(result.values), [2, 3])
+
+
+class TestStreaming(unittest.TestCase):
+    def test_single_line_output_matches_json_dumps(self):
+        for expression, result in [("3 + 5", 8.0), ("1 / 3", 1 / 3), ('"é"', -2.5), ("x", float("inf"))]:
+            expected = json.dumps({"expression": expression, "result": int(result) if result.is_integer() else result})
+            self.assertEqual(format_json_output(expression, result, indent=None), expected)
+
+    def test_stream_reports_errors_per_line(self):
+        output = io.StringIO()
+        stream_expressions(Calculator(), ["3 + 5\n", "1 / 0\n", "\n", "2 * 3"], output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[0], {"expression": "3 + 5", "result": 8})
+        self.assertEqual(lines[1], {"expression": "1 / 0", "error": "float division by zero"})
+        self.assertIn("error", lines[2])
+        self.assertEqual(lines[3], {"expression": "2 * 3", "result": 6})
+
+    def test_stream_reports_invalid_utf8_per_line(self):
+        data = b"3 + 5\n\xff\xfe 1\n2 * 3\n"
+        main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        process = subprocess.run(
+            [sys.executable, main_path, "--stream"], input=data, capture_output=True, timeout=30
+        )
+        self.assertEqual(process.returncode, 0, process.stderr)
+        lines = [json.loads(line) for line in process.stdout.decode().splitlines()]
+        self.assertEqual(lines[0], {"expression": "3 + 5", "result": 8})
+        self.assertEqual(lines[1]["error"], "Line is not valid UTF-8.")
+        self.assertEqual(lines[2], {"expression": "2 * 3", "result": 6})
+
+    def test_stream_flushes_lines_before_a_read_error(self):
+        def lines():
+            yield "3 + 5\n"
+            raise OSError("read failed")
+
+        output = io.StringIO()
+        with self.assertRaises(OSError):
+            stream_expressions(Calculator(), lines(), output)
+        self.assertEqual(json.loads(output.getvalue()), {"expression": "3 + 5", "result": 8})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,215 @@
+"""Keep the agent's message history within a token budget.
+
+Before every model call the history is compacted in place:
+
+- results of ``get_file_content`` for a file that was read again or
+  rewritten or edited later are replaced by a short stub,
+- older listings of a directory that was listed again are stubbed,
+- results identical to a later result of the same tool are collapsed,
+- and if the history is still over budget, ``write_file`` contents that
+  were superseded are dropped from the call, then the oldest tool results
+  are stubbed until it fits. A write is superseded by a later write or
+  edit of the same file, or a later complete read of it.
+
+The most recent messages are always kept exactly as they are.
+"""
+
+import json
+import os
+from collections import deque
+
+from google.genai import types
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 32000
+KEEP_RECENT_MESSAGES = 6
+
+READ_FUNCTIONS = {"get_file_content"}
+LISTING_FUNCTIONS = {"get_files_info"}
+WRITE_FUNCTIONS = {"write_file", "edit_file"}
+
+# Arguments of a read that returns only part of a file
+RANGE_ARGUMENTS = ("offset", "length", "start_line", "end_line")
+
+STUB_PREFIX = "[compacted"
+# Results shorter than this are kept, a stub would not be much smaller
+MIN_COMPACTED_CHARS = 200
+
+
+def _dumps(value):
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def estimate_tokens(content):
+    """Roughly estimate the tokens a Content will cost in a request."""
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        if part.function_call:
+            chars += len(part.function_call.name or "") + len(_dumps(part.function_call.args or {}))
+        if part.function_response:
+            chars += len(part.function_response.name or "") + len(_dumps(part.function_response.response or {}))
+    return chars // CHARS_PER_TOKEN
+
+
+def _target(args):
+    path = args.get("file_path") or args.get("directory") or "."
+    return os.path.normpath(path)
+
+
+def _tool_events(messages):
+    """List the function calls and responses in order, pairing each response
+    with the call it answers so that it knows which path it was about."""
+    events = []
+    pending_calls = deque()
+    for message_index, content in enumerate(messages):
+        for part_index, part in enumerate(content.parts or []):
+            if part.function_call:
+                args = dict(part.function_call.args or {})
+                event = {
+                    "kind": "call",
+                    "message": message_index,
+                    "part": part_index,
+                    "name": part.function_call.name,
+                    "args": args,
+                    "target": _target(args),
+                }
+                events.append(event)
+                pending_calls.append(event)
+            elif part.function_response:
+                name = part.function_response.name
+                call = pending_calls.popleft() if pending_calls and pending_calls[0]["name"] == name else None
+                events.append({
+                    "kind": "response",
+                    "message": message_index,
+                    "part": part_index,
+                    "name": name,
+                    "target": call["target"] if call else None,
+                    "args": call["args"] if call else {},
+                    "response": part.function_response.response or {},
+                    "serialized": _dumps(part.function_response.response or {}),
+                })
+    return events
+
+
+def _is_stub(response):
+    result = response.get("result")
+    return isinstance(result, str) and result.startswith(STUB_PREFIX)
+
+
+def _is_compactable(event):
+    return len(event["serialized"]) >= MIN_COMPACTED_CHARS and not _is_stub(event["response"])
+
+
+def _stale_reason(event, later_events):
+    name, target = event["name"], event["target"]
+    for later in later_events:
+        if later["kind"] == "response" and later["name"] == name and later["serialized"] == event["serialized"]:
+            return f"identical to a later {name} result"
+        if target is None or later["target"] != target:
+            continue
+        if name in READ_FUNCTIONS and later["kind"] == "call" and later["name"] in WRITE_FUNCTIONS:
+            return f'"{target}" was rewritten later'
+        if name in READ_FUNCTIONS and later["kind"] == "call" and later["name"] in READ_FUNCTIONS:
+            # A read of another range of the file does not replace this one
+            if later["args"] == event["args"]:
+                return f'"{target}" was read again later'
+        if name in LISTING_FUNCTIONS and later["kind"] == "call" and later["name"] in LISTING_FUNCTIONS:
+            return f'"{target}" was listed again later'
+    return None
+
+
+def _is_complete_read(event):
+    if event["kind"] != "response" or event["name"] not in READ_FUNCTIONS:
+        return False
+    if any(event["args"].get(argument) is not None for argument in RANGE_ARGUMENTS):
+        return False
+    result = event["response"].get("result")
+    return (
+        isinstance(result, str)
+        and not result.startswith(("Error", STUB_PREFIX))
+        and "truncated at" not in result
+    )
+
+
+def _write_superseded(event, later_events):
+    """Whether the content of a write call can be found again later in the history."""
+    for later in later_events:
+        if later["target"] != event["target"]:
+            continue
+        if later["kind"] == "call" and later["name"] in WRITE_FUNCTIONS:
+            return True
+        if _is_complete_read(later):
+            return True
+    return False
+
+
+def _replace_part(messages, message_index, part_index, new_part):
+    content = messages[message_index]
+    parts = list(content.parts)
+    parts[part_index] = new_part
+    messages[message_index] = types.Content(role=content.role, parts=parts)
+
+
+def _stub_response(messages, event, reason):
+    stub = f"{STUB_PREFIX}: {reason}]"
+    _replace_part(
+        messages,
+        event["message"],
+        event["part"],
+        types.Part.from_function_response(name=event["name"], response={"result": stub}),
+    )
+
+
+def compact_messages(messages, token_budget=DEFAULT_TOKEN_BUDGET, keep_recent=KEEP_RECENT_MESSAGES):
+    """Compact messages in place and return (tokens_before, tokens_after)."""
+    tokens_before = sum(estimate_tokens(content) for content in messages)
+    cutoff = len(messages) - keep_recent
+    events = _tool_events(messages)
+
+    for index, event in enumerate(events):
+        if event["message"] >= cutoff:
+            break
+        if event["kind"] != "response" or not _is_compactable(event):
+            continue
+        reason = _stale_reason(event, events[index + 1:])
+        if reason:
+            _stub_response(messages, event, reason)
+
+    tokens = sum(estimate_tokens(content) for content in messages)
+    if tokens > token_budget:
+        # Over budget: the content of a superseded write is not needed again
+        events = _tool_events(messages)
+        for index, event in enumerate(events):
+            if tokens <= token_budget or event["message"] >= cutoff:
+                break
+            content = event["args"].get("content")
+            if event["kind"] != "call" or event["name"] not in WRITE_FUNCTIONS or not isinstance(content, str):
+                continue
+            if len(content) < MIN_COMPACTED_CHARS or content.startswith(STUB_PREFIX):
+                continue
+            if not _write_superseded(event, events[index + 1:]):
+                continue
+            old_tokens = estimate_tokens(messages[event["message"]])
+            args = dict(event["args"], content=f"{STUB_PREFIX}: {len(content)} characters]")
+            _replace_part(
+                messages,
+                event["message"],
+                event["part"],
+                types.Part.from_function_call(name=event["name"], args=args),
+            )
+            tokens -= old_tokens - estimate_tokens(messages[event["message"]])
+
+    if tokens > token_budget:
+        # Still too large: drop the oldest tool results first
+        for event in _tool_events(messages):
+            if tokens <= token_budget or event["message"] >= cutoff:
+                break
+            if event["kind"] != "response" or not _is_compactable(event):
+                continue
+            old_tokens = estimate_tokens(messages[event["message"]])
+            _stub_response(messages, event, f"older {event['name']} result dropped to stay within the context budget")
+            tokens -= old_tokens - estimate_tokens(messages[event["message"]])
+
+    return tokens_before, tokens
@@ -0,0 +1,155 @@
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+
+from functions.config import TOOL_CACHE_MAX_BYTES, TOOL_CACHE_MAX_ENTRIES
+from functions.hooks import add_write_listener
+
+
+class ToolCache:
+    """Size-bounded LRU cache of read-only tool results for one working directory.
+
+    Keys are (tool name, path relative to the working directory, other
+    arguments, (st_mtime_ns, st_size) of the path, the tool's own version of
+    the path), so an entry can only be found again while the file or
+    directory it was computed from is unchanged.
+    """
+
+    def __init__(self, max_entries=TOOL_CACHE_MAX_ENTRIES, max_bytes=TOOL_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        if len(result) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = result
+            self.size += len(result)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, path):
+        """Drop entries for path and for every directory containing it."""
+        with self._lock:
+            for key in list(self.entries):
+                cached_path = key[1]
+                if cached_path == path or cached_path == "." or path.startswith(cached_path + os.sep):
+                    self.size -= len(self.entries.pop(key))
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self.entries),
+                "size": self.size,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(working_directory):
+    abs_working_dir = os.path.abspath(working_directory)
+    with _caches_lock:
+        if abs_working_dir not in _caches:
+            _caches[abs_working_dir] = ToolCache()
+        return _caches[abs_working_dir]
+
+
+def cache_stats():
+    """Return hit/miss counters for every working directory seen so far."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {working_directory: cache.stats() for working_directory, cache in caches.items()}
+
+
+def cached_tool(path_argument, cacheable=None, version=None):
+    """Cache a read-only tool whose result depends on the path in path_argument.
+
+    cacheable(arguments) may return False for calls whose result also depends
+    on paths below it, which the key does not cover; those always run.
+    version(abs_path) may return more state the result depends on, such as
+    the stats of a directory's entries, to include in the key.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            arguments = dict(arguments.arguments)
+            if cacheable is not None and not cacheable(arguments):
+                return func(*args, **kwargs)
+
+            working_directory = arguments.pop("working_directory")
+            abs_working_dir = os.path.abspath(working_directory)
+            abs_path = os.path.abspath(os.path.join(working_directory, arguments.pop(path_argument)))
+
+            try:
+                stat = os.stat(abs_path)
+                path_version = version(abs_path) if version is not None else None
+            except OSError:
+                # Let the tool report missing paths itself
+                return func(*args, **kwargs)
+
+            key = (
+                func.__name__,
+                os.path.relpath(abs_path, abs_working_dir),
+                tuple(sorted((name, repr(value)) for name, value in arguments.items())),
+                (stat.st_mtime_ns, stat.st_size),
+                path_version,
+            )
+            cache = get_cache(abs_working_dir)
+            result = cache.get(key)
+            if result is None:
+                result = func(*args, **kwargs)
+                if isinstance(result, str) and not result.startswith("Error"):
+                    cache.put(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _invalidate_written_file(abs_working_dir, abs_file_path):
+    get_cache(abs_working_dir).invalidate(os.path.relpath(abs_file_path, abs_working_dir))
+
+
+add_write_listener(_invalidate_written_file)
@@ -0,0 +1,154 @@
+import ast
+import os
+import threading
+import time
+from fnmatch import fnmatch
+from functions.config import DEFAULT_IGNORE_PATTERNS, OUTLINE_MAX_FILE_BYTES, OUTLINE_REFRESH_SECONDS
+from functions.hooks import add_write_listener
+
+
+class Symbol:
+    """A class or function definition in a Python file."""
+
+    __slots__ = ("name", "kind", "signature", "start", "end", "depth", "doc")
+
+    def __init__(self, name, kind, signature, start, end, depth, doc):
+        self.name = name
+        self.kind = kind
+        self.signature = signature
+        self.start = start
+        self.end = end
+        self.depth = depth
+        self.doc = doc
+
+
+def _signature(node):
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+        return f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def _symbols(body, prefix="", depth=0, in_class=False):
+    # Classes and functions, and what is defined directly inside classes;
+    # helpers nested in function bodies are left to the function's source.
+    for node in body:
+        if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        name = prefix + node.name
+        if isinstance(node, ast.ClassDef):
+            kind = "class"
+        else:
+            kind = "method" if in_class else "function"
+        start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+        doc = (ast.get_docstring(node) or "").strip().split("\n", 1)[0]
+        yield Symbol(name, kind, _signature(node), start, node.end_lineno, depth, doc)
+        if isinstance(node, ast.ClassDef):
+            yield from _symbols(node.body, name + ".", depth + 1, in_class=True)
+
+
+def parse_outline(source):
+    """Return (symbols, line count) of Python source; raises SyntaxError."""
+    tree = ast.parse(source)
+    return list(_symbols(tree.body)), len(source.splitlines())
+
+
+class CodeIndex:
+    """Outline of every .py file below one working directory.
+
+    Files are re-parsed when their (st_mtime_ns, st_size) changes, checked at
+    most every OUTLINE_REFRESH_SECONDS and immediately after write_file.
+    """
+
+    def __init__(self, abs_working_dir):
+        self.abs_working_dir = abs_working_dir
+        # rel_path -> (version, symbols, line count, error)
+        self.files = {}
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+
+    def update_file(self, rel_path, stat=None):
+        abs_path = os.path.join(self.abs_working_dir, rel_path)
+        try:
+            stat = stat or os.stat(abs_path)
+        except OSError:
+            self.files.pop(rel_path, None)
+            return
+        version = (stat.st_mtime_ns, stat.st_size)
+        indexed = self.files.get(rel_path)
+        if indexed is not None and indexed[0] == version:
+            return
+        if stat.st_size > OUTLINE_MAX_FILE_BYTES:
+            self.files[rel_path] = (version, [], 0, f"larger than {OUTLINE_MAX_FILE_BYTES} bytes, not indexed")
+            return
+
+        try:
+            with open(abs_path, encoding="utf-8", errors="replace") as f:
+                source = f.read()
+            symbols, line_count = parse_outline(source)
+        except SyntaxError as e:
+            self.files[rel_path] = (version, [], 0, f"SyntaxError: {e.msg} (line {e.lineno})")
+            return
+        except (OSError, ValueError) as e:
+            self.files[rel_path] = (version, [], 0, str(e))
+            return
+        self.files[rel_path] = (version, symbols, line_count, None)
+
+    def refresh(self, force=False):
+        if not force and time.monotonic() - self.refreshed_at < OUTLINE_REFRESH_SECONDS:
+            return
+        seen = set()
+        for root, dirs, files in os.walk(self.abs_working_dir):
+            dirs[:] = sorted(d for d in dirs if not any(fnmatch(d, p) for p in DEFAULT_IGNORE_PATTERNS))
+            for name in files:
+                if not name.endswith(".py"):
+                    continue
+                abs_path = os.path.join(root, name)
+                rel_path = os.path.relpath(abs_path, self.abs_working_dir)
+                seen.add(rel_path)
+                try:
+                    self.update_file(rel_path, os.stat(abs_path))
+                except OSError:
+                    continue
+        for rel_path in set(self.files) - seen:
+            del self.files[rel_path]
+        self.refreshed_at = time.monotonic()
+
+    def find(self, name, rel_path=None):
+        """Return (rel_path, symbol) pairs whose qualified name is name or ends with "." + name."""
+        matches = []
+        for path in sorted(self.files) if rel_path is None else [rel_path]:
+            if path not in self.files:
+                continue
+            for symbol in self.files[path][1]:
+                if symbol.name == name or symbol.name.endswith("." + name):
+                    matches.append((path, symbol))
+        return matches
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(working_directory):
+    abs_working_dir = os.path.abspath(working_directory)
+    with _indexes_lock:
+        if abs_working_dir not in _indexes:
+            _indexes[abs_working_dir] = CodeIndex(abs_working_dir)
+        return _indexes[abs_working_dir]
+
+
+def _update_after_write(abs_working_dir, abs_file_path):
+    if not abs_file_path.endswith(".py"):
+        return
+    with _indexes_lock:
+        index = _indexes.get(abs_working_dir)
+    if index is None:
+        return
+    with index.lock:
+        index.update_file(os.path.relpath(abs_file_path, abs_working_dir))
+
+
+add_write_listener(_update_after_write)
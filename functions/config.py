@@ -1,3 +1,53 @@
 # Configuration constants
 
+import os
+
+# On-disk caches (search index, ...) live here, outside the working directory
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ai-agent")
+
 MAX_FILE_CONTENT_LENGTH = 10000  # characters
+
+# Ranged reads in get_file_content: line index granularity and files indexed at once
+LINE_INDEX_CHUNK_BYTES = 1 << 20
+MAX_LINE_INDEXES = 64
+
+# Directory listings: entries per page and names skipped unless asked otherwise
+FILES_INFO_PAGE_SIZE = 200
+DEFAULT_IGNORE_PATTERNS = (".git", "__pycache__")
+
+# Result cache for read-only tools, per working directory
+TOOL_CACHE_MAX_ENTRIES = 256
+TOOL_CACHE_MAX_BYTES = 4_000_000  # characters of cached results
+
+# Pre-warmed Python workers per working directory for run_python_file (0 disables them)
+PYTHON_WORKER_POOL_SIZE = 2
+# How long a worker may take to report a run it killed before it is killed itself
+PYTHON_WORKER_KILL_WAIT_SECONDS = 5
+# Modules of the working directory a worker imports before its first run;
+# nothing else there is imported ahead of time
+PYTHON_WORKER_PRELOAD_MODULES = ("pkg.calculator", "pkg.render")
+
+# run_python_file: runs at once in total and per working directory, and the
+# wall clock, CPU, address space and file size limits of every run
+MAX_CONCURRENT_RUNS = 4
+MAX_RUNS_PER_DIRECTORY = 2
+RUN_TIMEOUT_SECONDS = 30
+RUN_CPU_SECONDS = 30
+RUN_MEMORY_BYTES = 2 << 30
+RUN_FILE_SIZE_BYTES = 64 << 20
+
+# Output kept from each stream of run_python_file, and the total after which the process is killed
+OUTPUT_HEAD_BYTES = 4000
+OUTPUT_TAIL_BYTES = 4000
+MAX_OUTPUT_BYTES = 10_000_000
+
+# search_files: files larger than this are not indexed; matches returned per call;
+# how often the index re-checks file mtimes
+SEARCH_MAX_FILE_BYTES = 1_000_000
+SEARCH_MAX_RESULTS = 50
+SEARCH_REFRESH_SECONDS = 2.0
+
+# get_code_outline / get_symbol: files larger than this are not parsed; how
+# often the outline index re-checks file mtimes
+OUTLINE_MAX_FILE_BYTES = 1_000_000
+OUTLINE_REFRESH_SECONDS = 2.0
@@ -0,0 +1,194 @@
+import os
+import re
+import tempfile
+from typing import TypedDict
+from functions.hooks import notify_write
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(Exception):
+    pass
+
+
+class Replacement(TypedDict):
+    """One search/replace pair.
+
+    search: Exact text to replace; must occur exactly once in the file.
+    replace: The text to put in its place.
+    """
+
+    search: str
+    replace: str
+
+
+def _apply_replacements(content, edits):
+    # Each search text must occur exactly once in the content as edited so far
+    results = []
+    for number, edit in enumerate(edits, start=1):
+        search = edit.get("search") or ""
+        replace = edit.get("replace") or ""
+        if not search:
+            raise PatchError(f"Edit {number} has no search text")
+        count = content.count(search)
+        if count == 0:
+            raise PatchError(f"Edit {number}: search text not found")
+        if count > 1:
+            raise PatchError(f"Edit {number}: search text matches {count} times; include more surrounding lines")
+        position = content.index(search)
+        line = content.count("\n", 0, position) + 1
+        removed = len(search.splitlines())
+        added = len(replace.splitlines())
+        content = content[:position] + replace + content[position + len(search):]
+        results.append(f"edit {number} at line {line} (-{removed} +{added})")
+    return content, results
+
+
+def _parse_diff(diff):
+    """Return the hunks of a single-file unified diff as (start, old, new).
+
+    old and new are lists of (text, has_newline). The line counts in the @@
+    headers are not checked, the start line is only a hint for where to look.
+    """
+    lines = diff.splitlines()
+    headers = sum(1 for a, b in zip(lines, lines[1:]) if a.startswith("--- ") and b.startswith("+++ "))
+    if headers > 1:
+        raise PatchError("The diff changes more than one file")
+
+    hunks = []
+    for line in lines:
+        if line.startswith("@@"):
+            match = HUNK_HEADER.match(line)
+            if not match:
+                raise PatchError(f"Malformed hunk header: {line}")
+            hunks.append((int(match.group(1)), []))
+        elif not hunks:
+            continue  # "diff", "index", "---" and "+++" lines
+        elif line.startswith("\\"):
+            # "\ No newline at end of file" applies to the line before it
+            body = hunks[-1][1]
+            if body:
+                body[-1] = body[-1][:2] + (False,)
+        elif line[:1] in (" ", "-", "+"):
+            hunks[-1][1].append((line[:1], line[1:], True))
+        elif not line:
+            hunks[-1][1].append(("", "", True))  # context line with its space stripped
+        else:
+            raise PatchError(f"Unexpected line in hunk: {line}")
+
+    if not hunks:
+        raise PatchError("The diff has no hunks")
+    result = []
+    for start, body in hunks:
+        # Blank lines at the end usually come from the diff text, not the file
+        while body and body[-1][0] == "":
+            body.pop()
+        old = [(text, has_newline) for kind, text, has_newline in body if kind != "+"]
+        new = [(text, has_newline) for kind, text, has_newline in body if kind != "-"]
+        result.append((start, old, new))
+    return result
+
+
+def _find_block(lines, block, hint, lowest):
+    # Try the hinted position first, then move outwards from it
+    texts = [text for text, _ in block]
+    for distance in range(len(lines) + 1):
+        for start in (hint - distance, hint + distance):
+            if start < lowest or start + len(texts) > len(lines):
+                continue
+            if all(lines[start + i].rstrip("\r\n") == text for i, text in enumerate(texts)):
+                return start
+    return None
+
+
+def _apply_diff(content, diff):
+    lines = content.splitlines(keepends=True)
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    output = []
+    position = 0
+    offset = 0
+    results = []
+    for number, (start, old, new) in enumerate(_parse_diff(diff), start=1):
+        hint = max(start - 1 + offset, position) if old else min(start + offset, len(lines))
+        found = _find_block(lines, old, hint, position) if old else max(hint, position)
+        if found is None:
+            raise PatchError(f"Hunk {number} (line {start}) does not match the file")
+
+        output.extend(lines[position:found])
+        if new and output and not output[-1].endswith("\n"):
+            output[-1] += newline  # appending after a last line without newline
+        for text, has_newline in new:
+            output.append(text + newline if has_newline else text)
+        if found + len(old) == len(lines) and new and old and old[-1][1] and new[-1][1]:
+            # Keep the file's own ending when the last line is replaced
+            last = lines[-1]
+            output[-1] = output[-1].rstrip("\r\n") + last[len(last.rstrip("\r\n")):]
+
+        position = found + len(old)
+        offset = found - (start - 1) if old else offset
+        moved = f", offset {found - (start - 1):+d}" if old and found != start - 1 else ""
+        results.append(f"hunk {number} at line {found + 1} (-{len(old)} +{len(new)}{moved})")
+
+    output.extend(lines[position:])
+    return "".join(output), results
+
+
+def edit_file(working_directory, file_path: str, edits: list[Replacement] | None = None, diff: str | None = None):
+    """Edits an existing file in the working directory without resending all of it.
+    Pass either edits (search/replace pairs) or diff (a unified diff); nothing is changed
+    unless every edit applies.
+
+    file_path: Path to the file relative to the working directory.
+    edits: Replacements applied in order.
+    diff: A unified diff of this one file. Context and removed lines must match the file.
+    """
+    try:
+        # Build full path
+        full_path = os.path.join(working_directory, file_path)
+
+        # Normalize paths
+        abs_working_dir = os.path.abspath(working_directory)
+        abs_file_path = os.path.abspath(full_path)
+
+        # Ensure file is inside the working directory
+        if not abs_file_path.startswith(abs_working_dir):
+            return f'Error: Cannot edit "{file_path}" as it is outside the permitted working directory'
+
+        if not os.path.isfile(abs_file_path):
+            return f'Error: File not found or is not a regular file: "{file_path}"'
+        if bool(edits) == bool(diff):
+            return "Error: Provide either edits or diff"
+
+        with open(abs_file_path, "r", encoding="utf-8", newline="") as f:
+            content = f.read()
+
+        # Nothing is written unless every hunk applies
+        try:
+            if edits:
+                new_content, results = _apply_replacements(content, edits)
+            else:
+                new_content, results = _apply_diff(content, diff)
+        except PatchError as e:
+            return f'Error: Could not edit "{file_path}" - {str(e)}; the file was not changed'
+
+        # Replace the file atomically, keeping its permissions
+        mode = os.stat(abs_file_path).st_mode
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(abs_file_path), prefix=".edit-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(new_content)
+            os.chmod(temp_path, mode & 0o7777)
+            os.replace(temp_path, abs_file_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        result = f'Successfully edited "{file_path}": ' + ", ".join(results)
+
+        # Drop cached results that depended on the old content
+        notify_write(working_directory, file_path)
+
+        return result
+
+    except Exception as e:
+        return f"Error: {str(e)}"
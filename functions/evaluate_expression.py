@@ -0,0 +1,109 @@
+import importlib.util
+import os
+import threading
+from functions.hooks import add_write_listener
+
+EMPTY_EXPRESSION_ERROR = "Expression is empty or contains only whitespace."
+
+
+class _LoadedCalculator:
+    # One Calculator per working directory, built from its own pkg sources
+    def __init__(self, version, calculator, render):
+        self.version = version
+        self.calculator = calculator
+        self.render = render
+        self.lock = threading.Lock()
+
+
+_calculators = {}
+_calculators_lock = threading.Lock()
+
+
+def _pkg_version(abs_pkg_dir):
+    with os.scandir(abs_pkg_dir) as entries:
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in entries
+            if entry.name.endswith(".py")
+        ))
+
+
+def _load_module(abs_working_dir, name):
+    # Load pkg/<name>.py under a private name without touching sys.path or
+    # sys.modules, so concurrent imports of "pkg" elsewhere are unaffected
+    # and every working directory gets its own module objects.
+    spec = importlib.util.spec_from_file_location(
+        f"_evaluate_expression.pkg.{name}", os.path.join(abs_working_dir, "pkg", f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _import_pkg(abs_working_dir):
+    calculator_module = _load_module(abs_working_dir, "calculator")
+    render_module = _load_module(abs_working_dir, "render")
+    return calculator_module.Calculator(), render_module
+
+
+def _get_calculator(abs_working_dir):
+    version = _pkg_version(os.path.join(abs_working_dir, "pkg"))
+    with _calculators_lock:
+        loaded = _calculators.get(abs_working_dir)
+    if loaded is not None and loaded.version == version:
+        return loaded
+
+    calculator, render = _import_pkg(abs_working_dir)
+    loaded = _LoadedCalculator(version, calculator, render)
+    with _calculators_lock:
+        _calculators[abs_working_dir] = loaded
+    return loaded
+
+
+def evaluate_expression(working_directory, expressions: list[str]):
+    """Evaluates arithmetic expressions with the calculator in the working directory, without starting a process.
+    Returns a JSON array with one {"expression", "result"} or {"expression", "error"} object per expression.
+
+    expressions: Expressions to evaluate, with tokens separated by spaces, e.g. "3 + 5 * 2".
+    """
+    try:
+        abs_working_dir = os.path.abspath(working_directory)
+        if not os.path.isfile(os.path.join(abs_working_dir, "pkg", "calculator.py")):
+            return f'Error: No calculator package (pkg/calculator.py) in "{working_directory}"'
+        if isinstance(expressions, str):
+            expressions = [expressions]
+        if not expressions:
+            return "Error: No expressions provided"
+
+        try:
+            loaded = _get_calculator(abs_working_dir)
+        except Exception as e:
+            return f"Error: Could not load the calculator - {str(e)}"
+
+        # Same objects as the calculator CLI prints, one per expression
+        results = []
+        with loaded.lock:
+            for expression in expressions:
+                try:
+                    result = loaded.calculator.evaluate(expression)
+                    if result is None:
+                        results.append(loaded.render.format_json_error(expression, EMPTY_EXPRESSION_ERROR))
+                    else:
+                        results.append(loaded.render.format_json_output(expression, result, indent=None))
+                except Exception as e:
+                    results.append(loaded.render.format_json_error(expression, str(e)))
+
+        return "[\n" + ",\n".join(results) + "\n]"
+
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def _drop_after_write(abs_working_dir, abs_file_path):
+    # The next call re-imports pkg from the new sources
+    if abs_file_path.startswith(os.path.join(abs_working_dir, "pkg") + os.sep):
+        with _calculators_lock:
+            _calculators.pop(abs_working_dir, None)
+
+
+add_write_listener(_drop_after_write)
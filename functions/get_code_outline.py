@@ -0,0 +1,59 @@
+import os
+from functions.code_index import get_index
+from functions.config import MAX_FILE_CONTENT_LENGTH
+
+
+def get_code_outline(working_directory, path: str = ".", include_docstrings: bool = True):
+    """Lists the classes, functions and methods of the Python files in a file or directory,
+    with their signatures and line ranges, without reading the files themselves.
+    Use get_symbol to read one of them.
+
+    path: Python file or directory relative to the working directory. Defaults to the working directory.
+    include_docstrings: Show the first line of each docstring. Defaults to true.
+    """
+    try:
+        abs_working_dir = os.path.abspath(working_directory)
+        abs_path = os.path.abspath(os.path.join(working_directory, path))
+
+        if not abs_path.startswith(abs_working_dir):
+            return f'Error: Cannot outline "{path}" as it is outside the permitted working directory'
+        if not os.path.exists(abs_path):
+            return f'Error: "{path}" not found.'
+        if os.path.isfile(abs_path) and not abs_path.endswith(".py"):
+            return f'Error: "{path}" is not a Python file.'
+
+        index = get_index(abs_working_dir)
+        rel_path = os.path.relpath(abs_path, abs_working_dir)
+        with index.lock:
+            if os.path.isfile(abs_path):
+                index.update_file(rel_path)
+                paths = [rel_path] if rel_path in index.files else []
+            else:
+                index.refresh()
+                prefix = "" if rel_path == "." else rel_path + os.sep
+                paths = sorted(p for p in index.files if p.startswith(prefix))
+            entries = [(p, index.files[p]) for p in paths]
+
+        if not entries:
+            return f'No Python files in "{path}"'
+
+        lines = []
+        for rel_path, (_, symbols, line_count, error) in entries:
+            if error:
+                lines.append(f"{rel_path}: {error}")
+                continue
+            lines.append(f"{rel_path} ({line_count} lines)")
+            for symbol in symbols:
+                line = f"{'    ' * (symbol.depth + 1)}{symbol.signature}  [{symbol.start}-{symbol.end}]"
+                if include_docstrings and symbol.doc:
+                    line += f"  # {symbol.doc}"
+                lines.append(line)
+
+        outline = "\n".join(lines)
+        if len(outline) > MAX_FILE_CONTENT_LENGTH:
+            cut = outline.rfind("\n", 0, MAX_FILE_CONTENT_LENGTH)
+            outline = outline[:cut] + f"\n[Outline truncated at {MAX_FILE_CONTENT_LENGTH} characters; outline a subdirectory or file]"
+        return outline
+
+    except Exception as e:
+        return f"Error: {str(e)}"
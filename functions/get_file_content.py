@@ -1,7 +1,114 @@
+import bisect
+import mmap
 import os
-from functions.config import MAX_FILE_CONTENT_LENGTH
+import threading
+from functions.cache import cached_tool
+from functions.config import LINE_INDEX_CHUNK_BYTES, MAX_FILE_CONTENT_LENGTH, MAX_LINE_INDEXES
 
-def get_file_content(working_directory, file_path):
+
+class _LineIndex:
+    # Number of newlines before the start of every LINE_INDEX_CHUNK_BYTES
+    # chunk, so a line can be found by scanning at most one chunk.
+    def __init__(self, abs_file_path, stat):
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.chunk_starts = []
+        self.newlines_before = []
+        newlines = 0
+        last_byte = b""
+        with open(abs_file_path, "rb") as f:
+            position = 0
+            while chunk := f.read(LINE_INDEX_CHUNK_BYTES):
+                self.chunk_starts.append(position)
+                self.newlines_before.append(newlines)
+                newlines += chunk.count(b"\n")
+                position += len(chunk)
+                last_byte = chunk[-1:]
+        self.line_count = newlines + (1 if last_byte not in (b"", b"\n") else 0)
+
+    def line_start(self, data, line):
+        """Return the byte offset where 1-based line starts."""
+        skip = line - 1
+        if skip == 0:
+            return 0
+        # Last chunk that starts before the newline ending line - 1
+        chunk = bisect.bisect_left(self.newlines_before, skip) - 1
+        position = self.chunk_starts[chunk]
+        skip -= self.newlines_before[chunk]
+        while skip > 0:
+            position = data.find(b"\n", position) + 1
+            skip -= 1
+        return position
+
+
+_line_indexes = {}
+_line_indexes_lock = threading.Lock()
+
+
+def _get_line_index(abs_file_path, stat):
+    with _line_indexes_lock:
+        index = _line_indexes.get(abs_file_path)
+    if index is not None and index.version == (stat.st_mtime_ns, stat.st_size):
+        return index
+
+    index = _LineIndex(abs_file_path, stat)
+    with _line_indexes_lock:
+        _line_indexes.pop(abs_file_path, None)
+        _line_indexes[abs_file_path] = index
+        while len(_line_indexes) > MAX_LINE_INDEXES:
+            _line_indexes.pop(next(iter(_line_indexes)))
+    return index
+
+
+def _read_range(file_path, abs_file_path, offset, length, start_line, end_line):
+    stat = os.stat(abs_file_path)
+    size = stat.st_size
+    line_count = _get_line_index(abs_file_path, stat).line_count if size else 0
+    header = f'[File "{file_path}": {size} bytes, {line_count} lines; '
+
+    if size == 0:
+        return header + "file is empty]"
+
+    with open(abs_file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if start_line is not None or end_line is not None:
+            start_line = 1 if start_line is None else start_line
+            end_line = line_count if end_line is None else min(end_line, line_count)
+            if start_line < 1 or start_line > line_count or end_line < start_line:
+                return f'Error: Invalid line range {start_line}-{end_line} for "{file_path}" ({line_count} lines)'
+
+            index = _get_line_index(abs_file_path, stat)
+            start = index.line_start(data, start_line)
+            end = index.line_start(data, end_line + 1) if end_line < line_count else size
+            end = min(end, start + MAX_FILE_CONTENT_LENGTH)
+            shown = f"showing lines {start_line}-{end_line}"
+        else:
+            start = offset or 0
+            if length is not None and length <= 0:
+                return f'Error: Length must be positive, got {length}'
+            if start < 0 or start >= size:
+                return f'Error: Offset {start} is outside "{file_path}" ({size} bytes)'
+            end = min(size, start + min(length or MAX_FILE_CONTENT_LENGTH, MAX_FILE_CONTENT_LENGTH))
+            shown = f"showing bytes {start}-{end - 1}"
+
+        content = data[start:end].decode("utf-8", errors="replace")
+
+    if end - start == MAX_FILE_CONTENT_LENGTH and end < size:
+        shown += f", cut at {MAX_FILE_CONTENT_LENGTH} bytes"
+    return header + shown + "]\n" + content
+
+
+@cached_tool("file_path")
+def get_file_content(working_directory, file_path: str, offset: int | None = None, length: int | None = None,
+                     start_line: int | None = None, end_line: int | None = None):
+    """Reads the contents of a file within the working directory.
+    Long files are cut off; pass offset/length or start_line/end_line to page through them.
+    Ranged reads report the file's total size and line count.
+
+    file_path: Path to the file relative to the working directory.
+    offset: Byte offset to start reading at.
+    length: Number of bytes to read from offset.
+    start_line: First line to read, starting at 1.
+    end_line: Last line to read, inclusive.
+    """
     try:
         # Build full path
         full_path = os.path.join(working_directory, file_path)
@@ -18,18 +125,33 @@ def get_file_content(working_directory, file_path):
         if not os.path.isfile(abs_file_path):
             return f'Error: File not found or is not a regular file: "{file_path}"'
 
-        # Read file safely
+        # Read only the requested slice (tool arguments may arrive as floats)
+        if any(value is not None for value in (offset, length, start_line, end_line)):
+            try:
+                return _read_range(
+                    file_path,
+                    abs_file_path,
+                    *(None if value is None else int(value) for value in (offset, length, start_line, end_line)),
+                )
+            except Exception as e:
+                return f'Error: Could not read "{file_path}" - {str(e)}'
+
+        # Read file safely, never more than we can return
         try:
             with open(abs_file_path, "r", encoding="utf-8", errors="replace") as f:
-                content = f.read()
+                content = f.read(MAX_FILE_CONTENT_LENGTH + 1)
         except Exception as e:
             return f'Error: Could not read "{file_path}" - {str(e)}'
 
         # Truncate if too long
         if len(content) > MAX_FILE_CONTENT_LENGTH:
+            stat = os.stat(abs_file_path)
+            line_count = _get_line_index(abs_file_path, stat).line_count
             content = (
                 content[:MAX_FILE_CONTENT_LENGTH]
                 + f'\n[...File "{file_path}" truncated at {MAX_FILE_CONTENT_LENGTH} characters]'
+                + f"\n[{stat.st_size} bytes, {line_count} lines in total; "
+                + "read more with offset/length or start_line/end_line]"
             )
 
         return content
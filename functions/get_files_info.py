@@ -1,8 +1,68 @@
 import os
-from google.genai import types
+from fnmatch import fnmatch
+from functions.cache import cached_tool
+from functions.config import DEFAULT_IGNORE_PATTERNS, FILES_INFO_PAGE_SIZE
 
 
-def get_files_info(working_directory, directory="."):
+def _walk(abs_path, parts, depth, ignore, cursor, skipped):
+    # Yield (path parts, DirEntry) in sorted pre-order, which is also the
+    # order of the path-part tuples, so a cursor can skip whole subtrees.
+    try:
+        with os.scandir(abs_path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        skipped.append(abs_path)
+        return
+
+    for entry in entries:
+        if any(fnmatch(entry.name, pattern) for pattern in ignore):
+            continue
+        entry_parts = parts + (entry.name,)
+        after_cursor = cursor is None or entry_parts > cursor
+        if after_cursor:
+            yield entry_parts, entry
+
+        if depth <= 1:
+            continue
+        # Descend unless every descendant sorts before the cursor
+        if not after_cursor and cursor[:len(entry_parts)] != entry_parts:
+            continue
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            yield from _walk(entry.path, entry_parts, depth - 1, ignore, cursor, skipped)
+
+
+def _cacheable(arguments):
+    # Only the listed directory and its entries are part of the cache key,
+    # which does not change when something below its entries does
+    try:
+        return int(arguments["depth"]) <= 1 and not arguments["cursor"]
+    except (TypeError, ValueError):
+        return False
+
+
+def _entries_version(abs_path):
+    # A file can change size without its directory's mtime changing
+    with os.scandir(abs_path) as it:
+        return tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in it))
+
+
+@cached_tool("directory", cacheable=_cacheable, version=_entries_version)
+def get_files_info(working_directory, directory: str = ".", depth: int = 1, pattern: str | None = None,
+                   ignore: list[str] | None = None, cursor: str | None = None, page_size=FILES_INFO_PAGE_SIZE):
+    """Lists files in the specified directory along with their sizes, constrained to the working directory.
+    Entries are sorted and paged; nested entries are shown relative to the listed directory.
+
+    directory: The directory to list files from, relative to the working directory.
+        If not provided, lists files in the working directory itself.
+    depth: How many directory levels to list. Defaults to 1 (no recursion).
+    pattern: Only list entries whose name or relative path matches this glob, e.g. "*.py".
+    ignore: Glob patterns of names to skip entirely. Defaults to .git and __pycache__.
+    cursor: Continue a listing after this path, as returned by the previous page.
+    """
     try:
         # Build the full path
         full_path = os.path.join(working_directory, directory)
@@ -19,35 +79,40 @@ def get_files_info(working_directory, directory="."):
         if not os.path.isdir(abs_full_path):
             return f'Error: "{directory}" is not a directory'
 
-        # Build directory contents string
+        # Tool arguments may arrive as floats
+        depth = max(1, int(depth))
+        page_size = max(1, int(page_size))
+        ignore = DEFAULT_IGNORE_PATTERNS if ignore is None else list(ignore)
+        cursor_parts = tuple(cursor.split("/")) if cursor else None
+
+        # Build directory contents string, one stat per entry
         lines = []
-        for item in os.listdir(abs_full_path):
+        skipped = []
+        last_path = None
+        has_more = False
+        for parts, entry in _walk(abs_full_path, (), depth, ignore, cursor_parts, skipped):
+            path = "/".join(parts)
+            if pattern and not (fnmatch(entry.name, pattern) or fnmatch(path, pattern)):
+                continue
             try:
-                item_path = os.path.join(abs_full_path, item)
-                size = os.path.getsize(item_path)
-                is_dir = os.path.isdir(item_path)
-                lines.append(f"- {item}: file_size={size} bytes, is_dir={is_dir}")
-            except Exception as e:
-                return f"Error: Could not read info for '{item}' - {str(e)}"
+                size = entry.stat().st_size
+                is_dir = entry.is_dir()
+            except OSError:
+                skipped.append(path)
+                continue
+            if len(lines) == page_size:
+                has_more = True
+                break
+            lines.append(f"- {path}: file_size={size} bytes, is_dir={is_dir}")
+            last_path = path
+
+        if skipped:
+            lines.append(f"[Skipped {len(skipped)} entries that could not be read]")
+        if has_more:
+            lines.append(f'[More entries available: call again with cursor="{last_path}"]')
 
         return "\n".join(lines)
 
     except Exception as e:
         return f"Error: {str(e)}"
 
-
-# 👇 Schema for Gemini (so it knows how to call this function)
-schema_get_files_info = types.FunctionDeclaration(
-    name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "directory": types.Schema(
-                type=types.Type.STRING,
-                description="The directory to list files from, relative to the working directory. "
-                            "If not provided, lists files in the working directory itself.",
-            ),
-        },
-    ),
-)
@@ -0,0 +1,72 @@
+import os
+from functions.code_index import get_index
+from functions.config import MAX_FILE_CONTENT_LENGTH
+
+# Candidates listed when a name is ambiguous
+MAX_LISTED_MATCHES = 20
+
+
+def _find(index, name, rel_path):
+    matches = index.find(name, rel_path)
+    # Prefer the exact qualified name over methods that merely end with it
+    exact = [(path, symbol) for path, symbol in matches if symbol.name == name]
+    return exact or matches
+
+
+def get_symbol(working_directory, name: str, file_path: str | None = None):
+    """Reads the source of one class, function or method by name instead of the whole file.
+    Returns its file, line range and source lines, decorators included.
+
+    name: Name of the symbol, qualified with its classes for methods, e.g. "Calculator._evaluate_infix".
+        A bare name such as "_evaluate_infix" works when it is unique.
+    file_path: Only look in this Python file, relative to the working directory.
+    """
+    try:
+        abs_working_dir = os.path.abspath(working_directory)
+        if not name:
+            return "Error: No symbol name provided"
+
+        rel_path = None
+        if file_path:
+            abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+            if not abs_file_path.startswith(abs_working_dir):
+                return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
+            if not os.path.isfile(abs_file_path):
+                return f'Error: File "{file_path}" not found.'
+            rel_path = os.path.relpath(abs_file_path, abs_working_dir)
+
+        index = get_index(abs_working_dir)
+        with index.lock:
+            if rel_path is not None:
+                index.update_file(rel_path)
+            else:
+                index.refresh()
+            matches = _find(index, name, rel_path)
+            if len(matches) == 1:
+                # The index may be a few seconds old; the line range must match the file as it is now
+                index.update_file(matches[0][0])
+                matches = _find(index, name, matches[0][0])
+
+        where = f' in "{file_path}"' if file_path else ""
+        if not matches:
+            return f'Error: No class or function named "{name}"{where}; use get_code_outline to list them'
+        if len(matches) > 1:
+            listed = "\n".join(
+                f"{path}:{symbol.start} {symbol.name}" for path, symbol in matches[:MAX_LISTED_MATCHES]
+            )
+            more = f"\n[{len(matches) - MAX_LISTED_MATCHES} more]" if len(matches) > MAX_LISTED_MATCHES else ""
+            return f'Error: "{name}" matches {len(matches)} symbols{where}; qualify it or pass file_path:\n{listed}{more}'
+
+        path, symbol = matches[0]
+        with open(os.path.join(abs_working_dir, path), encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+        source = "\n".join(lines[symbol.start - 1:symbol.end])
+        if len(source) > MAX_FILE_CONTENT_LENGTH:
+            source = (
+                source[:MAX_FILE_CONTENT_LENGTH]
+                + f'\n[...Truncated at {MAX_FILE_CONTENT_LENGTH} characters; read the rest with get_file_content start_line/end_line]'
+            )
+        return f"{path}:{symbol.start}-{symbol.end} {symbol.kind} {symbol.name}\n{source}"
+
+    except Exception as e:
+        return f"Error: {str(e)}"
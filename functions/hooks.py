@@ -0,0 +1,24 @@
+# Callbacks run after a tool changes a file inside a working directory
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+_write_listeners = []
+
+
+def add_write_listener(listener):
+    """Register listener(abs_working_dir, abs_file_path) to run after writes."""
+    _write_listeners.append(listener)
+
+
+def notify_write(working_directory, file_path):
+    """Run every listener; a failing listener is logged and does not stop the others."""
+    abs_working_dir = os.path.abspath(working_directory)
+    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+    for listener in _write_listeners:
+        try:
+            listener(abs_working_dir, abs_file_path)
+        except Exception:
+            logger.exception("Write listener %r failed for %s", listener, abs_file_path)
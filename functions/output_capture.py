@@ -0,0 +1,79 @@
+import codecs
+
+from functions.config import MAX_OUTPUT_BYTES, OUTPUT_HEAD_BYTES, OUTPUT_TAIL_BYTES
+
+
+def decode_output(data):
+    # Same newline handling as subprocess.run(..., text=True)
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+
+class StreamCapture:
+    """Keeps the first and last bytes of one output stream and counts the rest."""
+
+    def __init__(self, name, head_bytes=OUTPUT_HEAD_BYTES, tail_bytes=OUTPUT_TAIL_BYTES):
+        self.name = name
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk):
+        """Store a chunk and return it decoded, for live display."""
+        self.total += len(chunk)
+        data = chunk
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+        return self._decoder.decode(chunk)
+
+    @property
+    def dropped(self):
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self):
+        if not self.dropped:
+            return decode_output(bytes(self.head + self.tail))
+        return (
+            decode_output(bytes(self.head))
+            + f"\n[... {self.dropped} bytes of {self.name} omitted ...]\n"
+            + decode_output(bytes(self.tail))
+        )
+
+
+class OutputCapture:
+    """Bounded capture of a process's stdout and stderr.
+
+    on_output(stream_name, text) is called with every chunk as it arrives.
+    feed() returns False once the process has written more than max_bytes
+    in total, at which point the caller should kill it.
+    """
+
+    def __init__(self, on_output=None, max_bytes=MAX_OUTPUT_BYTES):
+        self.streams = {"stdout": StreamCapture("stdout"), "stderr": StreamCapture("stderr")}
+        self.on_output = on_output
+        self.max_bytes = max_bytes
+        self.limit_exceeded = False
+
+    def feed(self, stream_name, data):
+        text = self.streams[stream_name].feed(data)
+        if self.on_output is not None and text:
+            self.on_output(stream_name, text)
+        if sum(stream.total for stream in self.streams.values()) > self.max_bytes:
+            self.limit_exceeded = True
+        return not self.limit_exceeded
+
+    @property
+    def stdout(self):
+        return self.streams["stdout"].text()
+
+    @property
+    def stderr(self):
+        return self.streams["stderr"].text()
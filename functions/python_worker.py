@@ -0,0 +1,250 @@
+"""Pre-warmed worker process that runs Python files in forked children.
+
+Started by functions/worker_pool.py as
+``python python_worker.py <working_directory> [module ...]``. On start it
+imports common standard library modules and the listed modules of the
+working directory (nothing else there is imported, since importing runs the
+module's code), then waits for JSON requests on stdin, one per line::
+
+    {"file": "/abs/path/script.py", "args": ["..."], "limits": {"cpu": 30, "memory": ..., "file_size": ...}}
+
+For each request it forks a clean child that runs the file as ``__main__``
+with the same argv, sys.path[0] and working directory as ``python script.py``
+would, in a new session (so its process group can be killed as a whole) and
+under the requested resource limits, and answers with JSON events on stdout::
+
+    {"event": "started", "pid": 1234}
+    {"event": "output", "stream": "stdout", "data": "<base64>"}
+    {"event": "exit", "returncode": 0}
+
+If a preloaded module of the working directory changed on disk, the worker
+answers ``{"event": "stale"}`` and exits instead of running stale code.
+
+Once the child has exited, its output is read for at most DRAIN_SECONDS
+more; processes it started that still hold the output pipes after that,
+even in a session of their own, are killed.
+
+``python python_worker.py --exec '<limits json>' script.py args...`` sets the
+limits and then execs ``python script.py args...``, for runs without a worker.
+"""
+
+import atexit
+import base64
+import importlib.util
+import json
+import os
+import runpy
+import selectors
+import signal
+import sys
+import time
+import traceback
+
+PRELOAD_MODULES = ("argparse", "collections", "json", "math", "re", "unittest")
+
+# Output still read after the child has exited, and how often its exit is checked
+DRAIN_SECONDS = 1.0
+EXIT_POLL_SECONDS = 0.1
+
+# Request limit -> resource limit it sets
+LIMITS = {"cpu": "RLIMIT_CPU", "memory": "RLIMIT_AS", "file_size": "RLIMIT_FSIZE"}
+
+
+def set_limits(limits):
+    """Lower the resource limits of this process, where the platform has them."""
+    try:
+        import resource
+    except ImportError:
+        return
+    for key, name in LIMITS.items():
+        value = limits.get(key)
+        if not value:
+            continue
+        limit = getattr(resource, name)
+        _, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        # Past the soft CPU limit the process gets SIGXCPU, one second later SIGKILL
+        new_hard = value + 1 if key == "cpu" and hard == resource.RLIM_INFINITY else value
+        resource.setrlimit(limit, (value, new_hard))
+
+
+def preload(working_directory, local_modules):
+    """Import common modules and the allow-listed local ones, and return
+    {path: mtime_ns} of the local modules that were imported."""
+    for module_name in PRELOAD_MODULES:
+        try:
+            __import__(module_name)
+        except Exception:
+            pass
+
+    sys.path.insert(0, working_directory)
+    for module_name in local_modules:
+        # Only modules whose source is in the working directory
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except Exception:
+            continue
+        origin = spec.origin if spec is not None else None
+        if not origin or not os.path.abspath(origin).startswith(working_directory + os.sep):
+            continue
+        try:
+            __import__(module_name)
+        except BaseException:
+            pass
+    sys.path.remove(working_directory)
+
+    local_files = {}
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and os.path.abspath(module_file).startswith(working_directory + os.sep):
+            local_files[module_file] = os.stat(module_file).st_mtime_ns
+    return local_files
+
+
+def is_stale(local_files):
+    for module_file, mtime_ns in local_files.items():
+        try:
+            if os.stat(module_file).st_mtime_ns != mtime_ns:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def kill_pipe_holders(fds):
+    """Kill every other process that has one of these pipes open (Linux only)."""
+    pipes = {f"pipe:[{os.fstat(fd).st_ino}]" for fd in fds}
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return
+    for pid in pids:
+        if pid == os.getpid():
+            continue
+        try:
+            fd_dir = f"/proc/{pid}/fd"
+            if any(os.readlink(os.path.join(fd_dir, fd)) in pipes for fd in os.listdir(fd_dir)):
+                os.kill(pid, signal.SIGKILL)
+        except OSError:
+            continue
+
+
+def run_child(request, working_directory, stdout_fd, stderr_fd):
+    """Run the requested file in this (forked) process and never return."""
+    os.setsid()
+    set_limits(request.get("limits", {}))
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+
+    file_path = request["file"]
+    os.chdir(working_directory)
+    sys.argv = [file_path] + request.get("args", [])
+    sys.path[0] = os.path.dirname(file_path)
+
+    exit_code = 0
+    try:
+        runpy.run_path(file_path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:
+        # Hide the frames of this worker and of runpy, as the interpreter would
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != file_path:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        exit_code = 1
+
+    try:
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(exit_code & 0xFF)
+
+
+def serve(working_directory, local_modules):
+    # Keep private copies of the protocol pipes; anything else printed by
+    # preloaded modules or children must not end up in the protocol.
+    requests = os.fdopen(os.dup(0), "rb")
+    events = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    def send(event):
+        events.write(json.dumps(event).encode() + b"\n")
+        events.flush()
+
+    local_files = preload(working_directory, local_modules)
+
+    for line in requests:
+        request = json.loads(line)
+        if is_stale(local_files):
+            send({"event": "stale"})
+            return
+
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid == 0:
+            requests.close()
+            events.close()
+            os.close(stdout_read)
+            os.close(stderr_read)
+            run_child(request, working_directory, stdout_write, stderr_write)
+
+        os.close(stdout_write)
+        os.close(stderr_write)
+        send({"event": "started", "pid": pid})
+
+        selector = selectors.DefaultSelector()
+        selector.register(stdout_read, selectors.EVENT_READ, "stdout")
+        selector.register(stderr_read, selectors.EVENT_READ, "stderr")
+        status = None
+        drain_deadline = None
+        while selector.get_map():
+            timeout = EXIT_POLL_SECONDS if status is None else max(0, drain_deadline - time.monotonic())
+            for key, _ in selector.select(timeout):
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fd)
+                    os.close(key.fd)
+                    continue
+                send({"event": "output", "stream": key.data, "data": base64.b64encode(data).decode()})
+            if status is None:
+                waited, wait_status = os.waitpid(pid, os.WNOHANG)
+                if waited:
+                    status = wait_status
+                    drain_deadline = time.monotonic() + DRAIN_SECONDS
+            elif selector.get_map() and time.monotonic() >= drain_deadline:
+                # Something the child started still holds the pipes
+                open_fds = list(selector.get_map())
+                kill_pipe_holders(open_fds)
+                for fd in open_fds:
+                    selector.unregister(fd)
+                    os.close(fd)
+        selector.close()
+
+        if status is None:
+            _, status = os.waitpid(pid, 0)
+        send({"event": "exit", "returncode": os.waitstatus_to_exitcode(status)})
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "--exec":
+        set_limits(json.loads(sys.argv[2]))
+        os.execv(sys.executable, [sys.executable] + sys.argv[3:])
+    serve(os.path.abspath(sys.argv[1]), sys.argv[2:])
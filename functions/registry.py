@@ -0,0 +1,199 @@
+"""The agent's tools, declared once.
+
+Every tool is a function of the same name in a module below functions/.
+Its FunctionDeclaration is generated from the function's source with ast,
+without importing the module: the first docstring paragraph becomes the
+description, "name: text" lines in the docstring describe the parameters,
+and only annotated parameters are shown to the model (working_directory
+and internal hooks stay unannotated). TypedDicts defined in the module can
+be used as object types. Implementations are imported on their first call
+and google.genai only when the declarations are built.
+"""
+
+import ast
+import functools
+import importlib
+import importlib.util
+import threading
+
+# Tool name -> (module, read_only, depends_on_writes, executes_code), in the
+# order the model sees them. read_only tools never modify the working
+# directory; depends_on_writes tools must see every earlier write of the same
+# turn; executes_code tools run code of the working directory, which may read
+# any file (and, unless read_only, write any file).
+TOOLS = {
+    "get_files_info": ("functions.get_files_info", True, True, False),
+    "get_file_content": ("functions.get_file_content", True, False, False),
+    "get_code_outline": ("functions.get_code_outline", True, True, False),
+    "get_symbol": ("functions.get_symbol", True, True, False),
+    "write_file": ("functions.write_file", False, False, False),
+    "edit_file": ("functions.edit_file", False, False, False),
+    "run_python_file": ("functions.run_python_file", False, True, True),
+    "run_tests": ("functions.run_tests", False, True, True),
+    "search_files": ("functions.search_files", True, True, False),
+    "evaluate_expression": ("functions.evaluate_expression", True, True, True),
+}
+
+SCHEMA_TYPES = {"str": "STRING", "int": "INTEGER", "float": "NUMBER", "bool": "BOOLEAN", "dict": "OBJECT"}
+
+
+def _parse_docstring(docstring):
+    """Split a docstring into (description, {parameter: description})."""
+    paragraphs = (docstring or "").strip().split("\n\n")
+    description = " ".join(line.strip() for line in paragraphs[0].splitlines())
+    parameters = {}
+    name = None
+    for line in "\n".join(paragraphs[1:]).splitlines():
+        head, separator, text = line.partition(": ")
+        if separator and head.isidentifier():
+            name = head
+            parameters[name] = text.strip()
+        elif name and line.strip():
+            parameters[name] += " " + line.strip()
+    return description, parameters
+
+
+class _SchemaBuilder:
+    def __init__(self, tree):
+        self.typed_dicts = {
+            node.name: node
+            for node in tree.body
+            if isinstance(node, ast.ClassDef) and any(ast.unparse(base).endswith("TypedDict") for base in node.bases)
+        }
+
+    def schema(self, annotation, description=None):
+        """Return (schema, optional) for an annotation node."""
+        optional = False
+        if isinstance(annotation, ast.BinOp) and isinstance(annotation.op, ast.BitOr):
+            # "X | None"
+            members = [annotation.left, annotation.right]
+            if any(isinstance(member, ast.Constant) and member.value is None for member in members):
+                optional = True
+                annotation = next(m for m in members if not (isinstance(m, ast.Constant) and m.value is None))
+
+        if isinstance(annotation, ast.Subscript) and ast.unparse(annotation.value) == "list":
+            items, _ = self.schema(annotation.slice)
+            schema = {"type": "ARRAY", "items": items}
+        elif isinstance(annotation, ast.Name) and annotation.id in self.typed_dicts:
+            node = self.typed_dicts[annotation.id]
+            _, fields = _parse_docstring(ast.get_docstring(node))
+            schema = {
+                "type": "OBJECT",
+                "properties": {
+                    field.target.id: self.schema(field.annotation, fields.get(field.target.id))[0]
+                    for field in node.body
+                    if isinstance(field, ast.AnnAssign)
+                },
+            }
+        elif isinstance(annotation, ast.Name) and annotation.id in SCHEMA_TYPES:
+            schema = {"type": SCHEMA_TYPES[annotation.id]}
+        else:
+            raise TypeError(f"Unsupported annotation for a tool parameter: {ast.unparse(annotation)}")
+
+        if description:
+            schema["description"] = description
+        return schema, optional
+
+
+def _find_function(tree, name):
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == name:
+            return node
+    raise LookupError(f"No function {name} found")
+
+
+@functools.cache
+def describe(name):
+    """Return the FunctionDeclaration of a tool as a plain dict."""
+    module = TOOLS[name][0]
+    with open(importlib.util.find_spec(module).origin, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    function = _find_function(tree, name)
+    builder = _SchemaBuilder(tree)
+    description, documented = _parse_docstring(ast.get_docstring(function))
+
+    arguments = function.args.args
+    first_default = len(arguments) - len(function.args.defaults)
+    properties = {}
+    required = []
+    for position, argument in enumerate(arguments):
+        if argument.annotation is None:
+            continue
+        schema, optional = builder.schema(argument.annotation, documented.get(argument.arg))
+        properties[argument.arg] = schema
+        if position < first_default and not optional:
+            required.append(argument.arg)
+
+    parameters = {"type": "OBJECT", "properties": properties}
+    if required:
+        parameters["required"] = required
+    return {"name": name, "description": description, "parameters": parameters}
+
+
+@functools.cache
+def declarations():
+    """Return the FunctionDeclarations of all tools; imports google.genai."""
+    from google.genai import types
+
+    return [types.FunctionDeclaration.model_validate(describe(name)) for name in TOOLS]
+
+
+def get_declaration(name):
+    return declarations()[list(TOOLS).index(name)]
+
+
+@functools.cache
+def get_tool():
+    """Return a types.Tool with every tool declaration."""
+    from google.genai import types
+
+    return types.Tool(function_declarations=declarations())
+
+
+class LazyFunction:
+    """Stands in for a tool function until its module is first needed."""
+
+    def __init__(self, name):
+        self.name = name
+        self._function = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._function is None:
+            with self._lock:
+                if self._function is None:
+                    self._function = getattr(importlib.import_module(TOOLS[self.name][0]), self.name)
+        return self._function
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+_functions = {name: LazyFunction(name) for name in TOOLS}
+
+
+def get_function(name):
+    """Return the tool's implementation, importing its module if needed."""
+    return _functions[name].load()
+
+
+def function_map():
+    """Return a new {tool name: callable} dict; modules load on first call."""
+    return dict(_functions)
+
+
+def read_only_tools():
+    return {name for name, (_, read_only, _, _) in TOOLS.items() if read_only}
+
+
+def write_dependent_tools():
+    return {name for name, (_, _, depends_on_writes, _) in TOOLS.items() if depends_on_writes}
+
+
+def executing_tools():
+    return {name for name, (_, _, _, executes_code) in TOOLS.items() if executes_code}
+
+
+def write_tools():
+    """Tools that change specific files: neither read-only nor running code."""
+    return {name for name, (_, read_only, _, executes_code) in TOOLS.items() if not read_only and not executes_code}
@@ -1,8 +1,70 @@
+import json
 import os
+import selectors
 import subprocess
 import sys
+import time
+from functions.cache import get_cache
+from functions.config import RUN_CPU_SECONDS, RUN_FILE_SIZE_BYTES, RUN_MEMORY_BYTES, RUN_TIMEOUT_SECONDS
+from functions.output_capture import OutputCapture
+from functions.scheduler import run_slot
+from functions.worker_pool import WORKER_SCRIPT, kill_process_group, run_in_worker
 
-def run_python_file(working_directory, file_path, args=[]):
+RUN_LIMITS = {"cpu": RUN_CPU_SECONDS, "memory": RUN_MEMORY_BYTES, "file_size": RUN_FILE_SIZE_BYTES}
+
+
+def _run_subprocess(cmd, cwd, timeout, capture):
+    # Read both pipes as data arrives so that only the bounded capture is
+    # ever held in memory, and kill the process if it writes too much.
+    # A new session makes the process the leader of a group we can kill.
+    process = subprocess.Popen(
+        cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+    )
+    deadline = time.monotonic() + timeout
+    with selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ, "stdout")
+        selector.register(process.stderr, selectors.EVENT_READ, "stderr")
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                kill_process_group(process.pid)
+                process.wait()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            for key, _ in selector.select(remaining):
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                elif not capture.feed(key.data, data):
+                    kill_process_group(process.pid)
+    return process.wait()
+
+
+def run_file(abs_working_dir, abs_file_path, args, capture):
+    """Run a file once the scheduler admits it, in a pre-warmed worker when
+    one is available, under RUN_LIMITS either way.
+
+    Returns (exit code, seconds queued, seconds running).
+    """
+    with run_slot(abs_working_dir) as queued:
+        started = time.monotonic()
+        returncode = run_in_worker(abs_working_dir, abs_file_path, args, RUN_TIMEOUT_SECONDS, capture, RUN_LIMITS)
+        if returncode is None:
+            returncode = _run_subprocess(
+                [sys.executable, WORKER_SCRIPT, "--exec", json.dumps(RUN_LIMITS), abs_file_path] + list(args),
+                cwd=abs_working_dir,
+                timeout=RUN_TIMEOUT_SECONDS,
+                capture=capture,
+            )
+    return returncode, queued, time.monotonic() - started
+
+
+def run_python_file(working_directory, file_path: str, args: list[str] = [], on_output=None):
+    """Executes a Python file with optional arguments.
+
+    file_path: Path to the Python file relative to the working directory.
+    args: Command line arguments passed to the script.
+    """
     try:
         # Build absolute path
         full_path = os.path.join(working_directory, file_path)
@@ -21,29 +83,32 @@ def run_python_file(working_directory, file_path, args=[]):
         if not abs_file_path.endswith(".py"):
             return f'Error: "{file_path}" is not a Python file.'
 
-        # Run the Python file
-        completed_process = subprocess.run(
-            [sys.executable, abs_file_path] + args,
-            cwd=abs_working_dir,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-
-        stdout = completed_process.stdout.strip()
-        stderr = completed_process.stderr.strip()
+        # on_output(stream_name, text) sees the output while it is produced
+        capture = OutputCapture(on_output=on_output)
+        returncode, queued, ran = run_file(abs_working_dir, abs_file_path, args or [], capture)
+
+        # The program may have changed any file; cached listings would not notice
+        get_cache(abs_working_dir).clear()
+
+        stdout = capture.stdout.strip()
+        stderr = capture.stderr.strip()
         output_lines = []
 
         if stdout:
             output_lines.append("STDOUT:\n" + stdout)
         if stderr:
             output_lines.append("STDERR:\n" + stderr)
-        if completed_process.returncode != 0:
-            output_lines.append(f"Process exited with code {completed_process.returncode}")
+        if capture.limit_exceeded:
+            output_lines.append(f"Process killed after writing more than {capture.max_bytes} bytes of output")
+        if returncode != 0:
+            output_lines.append(f"Process exited with code {returncode}")
         if not output_lines:
-            return "No output produced."
+            output_lines.append("No output produced.")
+        output_lines.append(f"[Queued {queued:.2f}s, ran {ran:.2f}s]")
 
         return "\n".join(output_lines)
 
+    except subprocess.TimeoutExpired:
+        return f'Error: executing Python file: "{file_path}" timed out after {RUN_TIMEOUT_SECONDS} seconds'
     except Exception as e:
         return f"Error: executing Python file: {str(e)}"
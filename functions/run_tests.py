@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from functions.cache import get_cache
+from functions.config import CACHE_DIR, RUN_TIMEOUT_SECONDS
+from functions.output_capture import OutputCapture
+from functions.run_python_file import run_file
+
+TEST_RUNNER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "unittest_runner.py")
+
+RESULTS_VERSION = 2
+
+# Outcomes that do not need another run while the code stays the same
+GREEN_OUTCOMES = {"pass", "skip", "expected_failure"}
+
+# Summary key counting each outcome
+OUTCOME_COUNTS = {
+    "pass": "passed",
+    "fail": "failed",
+    "error": "errors",
+    "skip": "skipped",
+    "expected_failure": "passed",
+    "unexpected_success": "failed",
+}
+
+
+def _file_hash(path, hashes):
+    if path not in hashes:
+        try:
+            with open(path, "rb") as f:
+                hashes[path] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            hashes[path] = None
+    return hashes[path]
+
+
+class TestResults:
+    """Last outcome of every test in one test file, with the local modules it
+    depended on when it ran: the test file, every module of the working
+    directory it imported, and their (st_mtime_ns, st_size) and content hash.
+    Kept on disk between runs.
+    """
+
+    def __init__(self, abs_test_file):
+        self.abs_test_file = abs_test_file
+        digest = hashlib.sha1(abs_test_file.encode()).hexdigest()
+        self.path = os.path.join(CACHE_DIR, "tests", f"{digest}.json")
+        self.ids = []
+        self.results = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != RESULTS_VERSION or data.get("test_file") != self.abs_test_file:
+            return
+        self.ids = data["ids"]
+        self.results = data["results"]
+
+    def save(self):
+        data = {"version": RESULTS_VERSION, "test_file": self.abs_test_file, "ids": self.ids, "results": self.results}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def is_current(self, test_id, hashes):
+        """True if the test last passed and none of its modules changed since."""
+        result = self.results.get(test_id)
+        if result is None or result["outcome"] not in GREEN_OUTCOMES:
+            return False
+        for path, (mtime_ns, size, digest) in result["deps"].items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+                continue
+            # Touched but possibly not changed
+            if digest is None or _file_hash(path, hashes) != digest:
+                return False
+        return True
+
+    def update(self, report):
+        self.ids = report["ids"]
+        hashes = {}
+        for test_id, result in report["results"].items():
+            deps = {}
+            for path, (mtime_ns, size) in result.pop("files", {}).items():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    stat = None
+                # Hash only what is still the version the test ran against
+                unchanged = stat is not None and (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size)
+                deps[path] = [mtime_ns, size, _file_hash(path, hashes) if unchanged else None]
+            if self.abs_test_file not in deps:
+                deps[self.abs_test_file] = [None, None, None]
+            result["deps"] = deps
+            self.results[test_id] = result
+        known = set(self.ids)
+        self.results = {test_id: result for test_id, result in self.results.items() if test_id in known}
+
+
+def _select(test_ids, only):
+    return [
+        test_id for test_id in test_ids
+        if not only or any(test_id == name or test_id.startswith(name + ".") for name in only)
+    ]
+
+
+_results = {}
+_results_lock = threading.Lock()
+
+
+def _get_results(abs_test_file):
+    with _results_lock:
+        if abs_test_file not in _results:
+            _results[abs_test_file] = TestResults(abs_test_file)
+        return _results[abs_test_file]
+
+
+def _run_runner(abs_working_dir, abs_test_file, only, skip):
+    # The runner writes its report to a file, so output of the tests cannot garble it
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        capture = OutputCapture()
+        options = json.dumps({"only": only, "skip": skip})
+        returncode, _, ran = run_file(
+            abs_working_dir, TEST_RUNNER_SCRIPT, [result_path, abs_test_file, options], capture
+        )
+        try:
+            with open(result_path, encoding="utf-8") as f:
+                return json.load(f), ran
+        except ValueError:
+            output = capture.stderr.strip() or capture.stdout.strip()
+            raise RuntimeError(f"the test run exited with code {returncode}\n{output}")
+    finally:
+        os.remove(result_path)
+
+
+def run_tests(working_directory, file_path: str = "tests.py", tests: list[str] | None = None, rerun_all: bool = False):
+    """Runs the unittest cases of a test file in a pre-warmed worker, skipping tests that passed before and whose code has not changed since.
+    Returns a JSON summary with the number of tests per outcome and the failing tests.
+
+    file_path: Test file relative to the working directory, tests.py by default.
+    tests: Test names or prefixes to run, e.g. "TestCalculator" or "TestCalculator.test_addition". All tests by default.
+    rerun_all: Run the selected tests even if they passed with the same code before.
+    """
+    try:
+        abs_working_dir = os.path.abspath(working_directory)
+        abs_test_file = os.path.abspath(os.path.join(working_directory, file_path))
+
+        if not abs_test_file.startswith(abs_working_dir):
+            return f'Error: Cannot run "{file_path}" as it is outside the permitted working directory'
+        if not os.path.isfile(abs_test_file):
+            return f'Error: File "{file_path}" not found.'
+        if not abs_test_file.endswith(".py"):
+            return f'Error: "{file_path}" is not a Python file.'
+
+        # A single name may arrive as a string instead of a list
+        if isinstance(tests, str):
+            tests = [tests]
+        if tests is not None and not all(isinstance(name, str) for name in tests):
+            return "Error: tests must be a list of test names"
+
+        # Test ids start with the module name, which the model may leave out
+        module_name = os.path.splitext(os.path.basename(abs_test_file))[0]
+        only = [name if name.startswith(module_name + ".") else f"{module_name}.{name}" for name in tests or []]
+
+        results = _get_results(abs_test_file)
+        with results.lock:
+            hashes = {}
+            selected = _select(results.ids, only)
+            cached = [] if rerun_all else [test_id for test_id in selected if results.is_current(test_id, hashes)]
+
+            ran = 0.0
+            if not selected or len(cached) < len(selected):
+                report, ran = _run_runner(abs_working_dir, abs_test_file, only, cached)
+                if "error" in report:
+                    return f'Error: Could not load tests from "{file_path}" - {report["error"]}'
+                results.update(report)
+                results.save()
+                # The tests may have changed any file; cached listings would not notice
+                get_cache(abs_working_dir).clear()
+                selected = _select(results.ids, only)
+
+            if not selected:
+                return f'Error: No tests found in "{file_path}" matching {tests}' if tests else f'Error: No tests found in "{file_path}"'
+
+            summary = {"total": len(selected), "passed": 0, "failed": 0, "errors": 0, "skipped": 0}
+            problems = []
+            for test_id in selected:
+                result = results.results[test_id]
+                summary[OUTCOME_COUNTS[result["outcome"]]] += 1
+                if result["outcome"] not in GREEN_OUTCOMES:
+                    problem = {"test": test_id.removeprefix(module_name + "."), "outcome": result["outcome"]}
+                    problem.update({key: result[key] for key in ("message", "location") if key in result})
+                    problems.append(problem)
+            summary["ran"] = len(selected) - len(cached)
+            summary["cached"] = len(cached)
+            summary["seconds"] = round(ran, 2)
+            summary["problems"] = problems
+
+        return json.dumps(summary)
+
+    except subprocess.TimeoutExpired:
+        return f'Error: Running tests in "{file_path}" timed out after {RUN_TIMEOUT_SECONDS} seconds'
+    except Exception as e:
+        return f"Error: Running tests: {str(e)}"
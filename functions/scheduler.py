@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functions.config import MAX_CONCURRENT_RUNS, MAX_RUNS_PER_DIRECTORY
+
+
+class RunScheduler:
+    """Admits a bounded number of runs, in total and per working directory.
+
+    Waiting runs of one working directory start in arrival order. Across
+    working directories slots are handed out round-robin, so a directory
+    with many queued runs cannot starve the others.
+    """
+
+    def __init__(self, max_running=MAX_CONCURRENT_RUNS, max_per_directory=MAX_RUNS_PER_DIRECTORY):
+        self.max_running = max_running
+        self.max_per_directory = max_per_directory
+        self._condition = threading.Condition()
+        self._running = 0
+        self._running_by_directory = {}
+        # Working directory -> waiting tickets, in round-robin order
+        self._queues = OrderedDict()
+
+    def _next_ticket(self):
+        if self._running >= self.max_running:
+            return None
+        for directory, queue in self._queues.items():
+            if self._running_by_directory.get(directory, 0) < self.max_per_directory:
+                return queue[0]
+        return None
+
+    @contextmanager
+    def slot(self, abs_working_dir):
+        """Wait for a free slot; yields the seconds spent waiting."""
+        ticket = object()
+        queued_at = time.monotonic()
+        with self._condition:
+            self._queues.setdefault(abs_working_dir, deque()).append(ticket)
+            while self._next_ticket() is not ticket:
+                self._condition.wait()
+
+            queue = self._queues.pop(abs_working_dir)
+            queue.popleft()
+            if queue:
+                # Back of the round-robin order
+                self._queues[abs_working_dir] = queue
+            self._running += 1
+            self._running_by_directory[abs_working_dir] = self._running_by_directory.get(abs_working_dir, 0) + 1
+            # Another waiter may be able to start as well
+            self._condition.notify_all()
+
+        try:
+            yield time.monotonic() - queued_at
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._running_by_directory[abs_working_dir] -= 1
+                self._condition.notify_all()
+
+
+_scheduler = RunScheduler()
+
+
+def run_slot(abs_working_dir):
+    return _scheduler.slot(abs_working_dir)
@@ -0,0 +1,352 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from fnmatch import fnmatch
+from functions.config import (
+    CACHE_DIR,
+    DEFAULT_IGNORE_PATTERNS,
+    SEARCH_MAX_FILE_BYTES,
+    SEARCH_MAX_RESULTS,
+    SEARCH_REFRESH_SECONDS,
+)
+from functions.hooks import add_write_listener
+
+INDEX_VERSION = 1
+
+
+def _trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Escapes followed by a fixed number of hex digits: \x41, \u0041, \U00000041
+HEX_ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+
+
+def _escape_end(pattern, i):
+    """Return the index after the escape sequence starting at pattern[i]."""
+    escaped = pattern[i + 1:i + 2]
+    if escaped in HEX_ESCAPE_DIGITS:
+        return i + 2 + HEX_ESCAPE_DIGITS[escaped]
+    if escaped == "N" and pattern.startswith("{", i + 2):
+        close = pattern.find("}", i + 2)
+        return close + 1 if close != -1 else len(pattern)
+    if escaped.isdigit():
+        # Octal escapes and group references take up to three digits
+        end = i + 2
+        while end < len(pattern) and end < i + 4 and pattern[end].isdigit():
+            end += 1
+        return end
+    return i + 2
+
+
+def _class_end(pattern, i):
+    """Return the index of the "]" closing the character class opened at pattern[i]."""
+    j = i + 1
+    if pattern.startswith("^", j):
+        j += 1
+    # A "]" right after the opening bracket is part of the class
+    if pattern.startswith("]", j):
+        j += 1
+    while j < len(pattern):
+        if pattern[j] == "\\":
+            j = _escape_end(pattern, j)
+            continue
+        if pattern[j] == "]":
+            return j
+        j += 1
+    return len(pattern)
+
+
+def _required_literals(pattern):
+    """Return literal strings every match of the regex must contain.
+
+    This is deliberately conservative: whenever a construct could make text
+    optional or alternative, the literals around it are dropped, so the
+    result may be empty but never asks for text a match can lack.
+    """
+    if re.compile(pattern).flags & re.VERBOSE:
+        # Whitespace and comments in the pattern do not match themselves
+        return []
+
+    # One entry per open group: the runs found in it and whether to drop them
+    groups = [{"runs": [], "discard": False}]
+    current = []
+
+    def end_run():
+        if current:
+            groups[-1]["runs"].append("".join(current))
+            current.clear()
+
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                current.append(escaped)
+            else:
+                end_run()
+            i = _escape_end(pattern, i)
+            continue
+        if c in "*?{":
+            # The previous character may be absent
+            if current:
+                current.pop()
+            end_run()
+            if c == "{":
+                close = pattern.find("}", i)
+                i = close if close != -1 else len(pattern)
+        elif c == "[":
+            end_run()
+            i = _class_end(pattern, i)
+        elif c == "(":
+            end_run()
+            if pattern.startswith("(?:", i):
+                groups.append({"runs": [], "discard": False})
+                i += 3
+                continue
+            # Lookarounds, flags and named groups: ignore what they contain
+            groups.append({"runs": [], "discard": pattern.startswith("(?", i)})
+        elif c == ")":
+            end_run()
+            if len(groups) > 1:
+                group = groups.pop()
+                optional = pattern[i + 1:i + 2] in ("?", "*", "{")
+                if not group["discard"] and not optional:
+                    groups[-1]["runs"].extend(group["runs"])
+        elif c == "|":
+            end_run()
+            if len(groups) == 1:
+                return []
+            groups[-1]["discard"] = True
+        elif c in ".^$+":
+            end_run()
+        else:
+            current.append(c)
+        i += 1
+
+    end_run()
+    return groups[0]["runs"]
+
+
+class TrigramIndex:
+    """Trigram inverted index of the text files below one working directory.
+
+    Files are re-indexed when their (st_mtime_ns, st_size) changes, checked at
+    most every SEARCH_REFRESH_SECONDS and immediately after write_file, and
+    the index is kept on disk between runs.
+    """
+
+    def __init__(self, abs_working_dir):
+        self.abs_working_dir = abs_working_dir
+        digest = hashlib.sha1(abs_working_dir.encode()).hexdigest()
+        self.path = os.path.join(CACHE_DIR, "search", f"{digest}.json")
+        self.files = {}
+        self.postings = {}
+        self.refreshed_at = 0.0
+        self.dirty = False
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.abs_working_dir:
+            return
+        for rel_path, (mtime_ns, size, packed) in data["files"].items():
+            trigrams = {packed[i:i + 3] for i in range(0, len(packed), 3)}
+            self._add(rel_path, (mtime_ns, size), trigrams)
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "root": self.abs_working_dir,
+            "files": {
+                rel_path: [version[0], version[1], "".join(trigrams)]
+                for rel_path, (version, trigrams) in self.files.items()
+            },
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+    def _add(self, rel_path, version, trigrams):
+        self.files[rel_path] = (version, trigrams)
+        for trigram in trigrams:
+            self.postings.setdefault(trigram, set()).add(rel_path)
+
+    def _remove(self, rel_path):
+        _, trigrams = self.files.pop(rel_path)
+        for trigram in trigrams:
+            paths = self.postings.get(trigram)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self.postings[trigram]
+
+    def update_file(self, rel_path, stat=None):
+        abs_path = os.path.join(self.abs_working_dir, rel_path)
+        try:
+            stat = stat or os.stat(abs_path)
+        except OSError:
+            stat = None
+        version = (stat.st_mtime_ns, stat.st_size) if stat else None
+        indexed = self.files.get(rel_path)
+        if indexed is not None and indexed[0] == version:
+            return
+        if indexed is not None:
+            self._remove(rel_path)
+            self.dirty = True
+        if version is None or stat.st_size > SEARCH_MAX_FILE_BYTES:
+            return
+
+        try:
+            with open(abs_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        if b"\0" in data[:8192]:
+            return  # binary file
+        self._add(rel_path, version, _trigrams(data.decode("utf-8", errors="replace")))
+        self.dirty = True
+
+    def refresh(self, force=False):
+        if not force and time.monotonic() - self.refreshed_at < SEARCH_REFRESH_SECONDS:
+            return
+        seen = set()
+        for root, dirs, files in os.walk(self.abs_working_dir):
+            dirs[:] = sorted(d for d in dirs if not any(fnmatch(d, p) for p in DEFAULT_IGNORE_PATTERNS))
+            for name in files:
+                if any(fnmatch(name, p) for p in DEFAULT_IGNORE_PATTERNS):
+                    continue
+                abs_path = os.path.join(root, name)
+                rel_path = os.path.relpath(abs_path, self.abs_working_dir)
+                seen.add(rel_path)
+                try:
+                    self.update_file(rel_path, os.stat(abs_path))
+                except OSError:
+                    continue
+        for rel_path in set(self.files) - seen:
+            self._remove(rel_path)
+            self.dirty = True
+        self.refreshed_at = time.monotonic()
+        self.save()
+
+    def candidates(self, literals):
+        """Return the indexed files that may contain every literal."""
+        paths = None
+        for literal in literals:
+            for trigram in _trigrams(literal):
+                matching = self.postings.get(trigram, set())
+                paths = set(matching) if paths is None else paths & matching
+                if not paths:
+                    return []
+        return sorted(self.files if paths is None else paths)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(working_directory):
+    abs_working_dir = os.path.abspath(working_directory)
+    with _indexes_lock:
+        if abs_working_dir not in _indexes:
+            _indexes[abs_working_dir] = TrigramIndex(abs_working_dir)
+        return _indexes[abs_working_dir]
+
+
+def search_files(working_directory, query: str, regex: bool = False, case_sensitive: bool = False,
+                 path_pattern: str | None = None, context: int = 1, max_results: int = SEARCH_MAX_RESULTS):
+    """Searches the text files in the working directory for a string or regular expression
+    and returns the matching lines with their path and line number.
+
+    query: Text to search for, or a Python regular expression if regex is true.
+    regex: Treat query as a regular expression. Defaults to false.
+    case_sensitive: Match case exactly. Defaults to false.
+    path_pattern: Only search files whose relative path matches this glob, e.g. "pkg/*.py".
+    context: Lines of context to show around each match. Defaults to 1.
+    max_results: Stop after this many matching lines. Defaults to 50.
+    """
+    try:
+        abs_working_dir = os.path.abspath(working_directory)
+        if not os.path.isdir(abs_working_dir):
+            return f'Error: "{working_directory}" is not a directory'
+        if not query:
+            return "Error: No query provided"
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            matcher = re.compile(query if regex else re.escape(query), flags)
+        except re.error as e:
+            return f'Error: Invalid regular expression "{query}" - {str(e)}'
+        literals = _required_literals(query) if regex else [query]
+        context = max(0, int(context))
+        max_results = max(1, int(max_results))
+
+        index = get_index(abs_working_dir)
+        with index.lock:
+            index.refresh()
+            candidates = index.candidates([literal for literal in literals if len(literal) >= 3])
+            indexed = len(index.files)
+
+        lines_out = []
+        matches = 0
+        matched_files = 0
+        for rel_path in candidates:
+            if path_pattern and not fnmatch(rel_path, path_pattern):
+                continue
+            try:
+                with open(os.path.join(abs_working_dir, rel_path), encoding="utf-8", errors="replace") as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+
+            last_shown = -1
+            file_matched = False
+            for number, line in enumerate(lines):
+                if not matcher.search(line):
+                    continue
+                file_matched = True
+                matches += 1
+                start = max(number - context, last_shown + 1)
+                for shown in range(start, min(number + context + 1, len(lines))):
+                    separator = ":" if shown == number else "-"
+                    lines_out.append(f"{rel_path}{separator}{shown + 1}{separator} {lines[shown]}")
+                last_shown = min(number + context, len(lines) - 1)
+                if matches >= max_results:
+                    break
+            matched_files += file_matched
+            if matches >= max_results:
+                lines_out.append(f"[Stopped after {max_results} matches]")
+                break
+
+        lines_out.append(f"[{matches} matches in {matched_files} files; searched {len(candidates)} of {indexed} files]")
+        return "\n".join(lines_out)
+
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def _update_after_write(abs_working_dir, abs_file_path):
+    with _indexes_lock:
+        index = _indexes.get(abs_working_dir)
+    if index is None:
+        return
+    with index.lock:
+        index.update_file(os.path.relpath(abs_file_path, abs_working_dir))
+
+
+add_write_listener(_update_after_write)
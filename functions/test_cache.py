@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from functions.cache import get_cache
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+from functions.hooks import notify_write
+
+
+class TestToolCache(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.working_directory, "pkg", "sub"))
+        self.write("pkg/a.py", "a = 1\n")
+        self.cache = get_cache(self.working_directory)
+        self.addCleanup(self.cache.clear)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.working_directory, rel_path), "w") as f:
+            f.write(text)
+
+    def test_repeated_read_is_a_hit(self):
+        first = get_file_content(self.working_directory, "pkg/a.py")
+        hits = self.cache.stats()["hits"]
+        self.assertEqual(get_file_content(self.working_directory, "pkg/a.py"), first)
+        self.assertEqual(self.cache.stats()["hits"], hits + 1)
+
+    def test_write_notification_invalidates_file_and_parents(self):
+        get_file_content(self.working_directory, "pkg/a.py")
+        get_files_info(self.working_directory, ".")
+        self.assertEqual(self.cache.stats()["entries"], 2)
+        notify_write(self.working_directory, "pkg/a.py")
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_changed_file_is_read_again(self):
+        get_file_content(self.working_directory, "pkg/a.py")
+        self.write("pkg/a.py", "a = 22\n")
+        self.assertEqual(get_file_content(self.working_directory, "pkg/a.py"), "a = 22\n")
+
+    def test_listing_sees_changed_file_sizes(self):
+        self.assertIn("a.py: file_size=6 bytes", get_files_info(self.working_directory, "pkg"))
+        # Rewriting a file in place does not change its directory's mtime
+        self.write("pkg/a.py", "a = 100\n")
+        self.assertIn("a.py: file_size=8 bytes", get_files_info(self.working_directory, "pkg"))
+
+    def test_unchanged_listing_is_a_hit(self):
+        first = get_files_info(self.working_directory, "pkg")
+        hits = self.cache.stats()["hits"]
+        self.assertEqual(get_files_info(self.working_directory, "pkg"), first)
+        self.assertEqual(self.cache.stats()["hits"], hits + 1)
+
+    def test_recursive_listing_sees_nested_changes(self):
+        self.assertNotIn("b.py", get_files_info(self.working_directory, ".", depth=3))
+        # Neither the working directory nor pkg changes; only pkg/sub does
+        self.write("pkg/sub/b.py", "b = 2\n")
+        self.assertIn("pkg/sub/b.py", get_files_info(self.working_directory, ".", depth=3))
+
+    def test_recursive_and_paged_listings_are_not_cached(self):
+        get_files_info(self.working_directory, ".", depth=2)
+        get_files_info(self.working_directory, ".", cursor="pkg")
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from functions.code_index import get_index
+from functions.get_code_outline import get_code_outline
+from functions.get_symbol import get_symbol
+from functions.hooks import notify_write
+
+SOURCE = '''class Calculator:
+    """Evaluates expressions."""
+
+    @staticmethod
+    def evaluate(expression):
+        return expression
+
+
+def helper(a, b=1) -> int:
+    return a + b
+'''
+
+
+class TestCodeIndex(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.working_directory, "pkg"))
+        self.write("pkg/calculator.py", SOURCE)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.working_directory, rel_path)
+        with open(path, "w") as f:
+            f.write(text)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_outline_lists_signatures_and_ranges(self):
+        outline = get_code_outline(self.working_directory, "pkg")
+        self.assertIn("class Calculator  [1-6]  # Evaluates expressions.", outline)
+        self.assertIn("def evaluate(expression)  [4-6]", outline)
+        self.assertIn("def helper(a, b=1) -> int  [9-10]", outline)
+
+    def test_symbol_source_includes_decorators(self):
+        result = get_symbol(self.working_directory, "Calculator.evaluate")
+        self.assertTrue(result.startswith("pkg/calculator.py:4-6 method Calculator.evaluate"), result)
+        self.assertIn("@staticmethod", result)
+
+    def test_symbol_after_write_has_current_lines(self):
+        get_symbol(self.working_directory, "helper")
+        self.write("pkg/calculator.py", "# header\n" + SOURCE)
+        notify_write(self.working_directory, "pkg/calculator.py")
+        self.assertTrue(get_symbol(self.working_directory, "helper").startswith("pkg/calculator.py:10-11"))
+
+    def test_syntax_error_is_reported_per_file(self):
+        self.write("pkg/broken.py", "def broken(:\n")
+        get_index(self.working_directory).refresh(force=True)
+        outline = get_code_outline(self.working_directory, "pkg")
+        self.assertIn("pkg/broken.py: SyntaxError", outline)
+        self.assertIn("class Calculator", outline)
+
+    def test_unknown_symbol_is_an_error(self):
+        self.assertTrue(get_symbol(self.working_directory, "missing").startswith("Error: No class or function"))
+
+
+if __name__ == "__main__":
+    unittest.main()
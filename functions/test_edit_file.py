@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from functions.edit_file import edit_file
+
+CONTENT = "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+
+
+class TestEditFile(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        self.write("calc.py", CONTENT)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.working_directory, rel_path), "w", newline="") as f:
+            f.write(text)
+
+    def read(self, rel_path="calc.py"):
+        with open(os.path.join(self.working_directory, rel_path), newline="") as f:
+            return f.read()
+
+    def edit(self, **args):
+        return edit_file(self.working_directory, "calc.py", **args)
+
+    def test_edits_are_applied_in_order(self):
+        result = self.edit(edits=[
+            {"search": "return a + b", "replace": "return b + a"},
+            {"search": "return b + a", "replace": "return a + b + 0"},
+        ])
+        self.assertEqual(result, 'Successfully edited "calc.py": edit 1 at line 2 (-1 +1), edit 2 at line 2 (-1 +1)')
+        self.assertIn("return a + b + 0\n", self.read())
+
+    def test_ambiguous_search_changes_nothing(self):
+        result = self.edit(edits=[
+            {"search": "return a + b", "replace": "return b + a"},
+            {"search": "(a, b)", "replace": "(x, y)"},
+        ])
+        self.assertEqual(
+            result,
+            'Error: Could not edit "calc.py" - Edit 2: search text matches 2 times; include more surrounding lines; '
+            "the file was not changed",
+        )
+        self.assertEqual(self.read(), CONTENT)
+
+    def test_missing_search_changes_nothing(self):
+        result = self.edit(edits=[{"search": "return a * b", "replace": "return a / b"}])
+        self.assertIn("Edit 1: search text not found", result)
+        self.assertEqual(self.read(), CONTENT)
+
+    def test_diff_is_applied(self):
+        diff = (
+            "--- a/calc.py\n+++ b/calc.py\n"
+            "@@ -5,2 +5,2 @@\n def sub(a, b):\n-    return a - b\n+    return b - a\n"
+        )
+        self.assertEqual(self.edit(diff=diff), 'Successfully edited "calc.py": hunk 1 at line 5 (-2 +2)')
+        self.assertEqual(self.read(), CONTENT.replace("a - b", "b - a"))
+
+    def test_diff_with_stale_line_numbers_is_found_nearby(self):
+        diff = "@@ -3,2 +3,2 @@\n def sub(a, b):\n-    return a - b\n+    return b - a\n"
+        self.assertEqual(self.edit(diff=diff), 'Successfully edited "calc.py": hunk 1 at line 5 (-2 +2, offset +2)')
+
+    def test_hunk_that_does_not_apply_changes_nothing(self):
+        diff = (
+            "@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a + b\n+    return b + a\n"
+            "@@ -5,2 +5,2 @@\n def sub(a, b):\n-    return a * b\n+    return b * a\n"
+        )
+        result = self.edit(diff=diff)
+        self.assertEqual(
+            result, 'Error: Could not edit "calc.py" - Hunk 2 (line 5) does not match the file; the file was not changed'
+        )
+        self.assertEqual(self.read(), CONTENT)
+
+    def test_diff_keeps_crlf_line_endings(self):
+        self.write("calc.py", CONTENT.replace("\n", "\r\n"))
+        self.edit(diff="@@ -2 +2 @@\n-    return a + b\n+    return b + a\n")
+        self.assertEqual(self.read(), CONTENT.replace("a + b", "b + a").replace("\n", "\r\n"))
+
+    def test_edits_and_diff_are_exclusive(self):
+        self.assertEqual(self.edit(), "Error: Provide either edits or diff")
+        self.assertEqual(
+            self.edit(edits=[{"search": "a", "replace": "b"}], diff="@@ -1 +1 @@\n-a\n+b\n"),
+            "Error: Provide either edits or diff",
+        )
+
+    def test_diff_of_several_files_is_rejected(self):
+        diff = "--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b\n--- a/y.py\n+++ b/y.py\n@@ -1 +1 @@\n-a\n+b\n"
+        self.assertIn("The diff changes more than one file", self.edit(diff=diff))
+
+    def test_path_outside_working_directory_is_rejected(self):
+        result = edit_file(self.working_directory, "../calc.py", edits=[{"search": "a", "replace": "b"}])
+        self.assertTrue(result.startswith("Error: Cannot edit"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+from functions import evaluate_expression as evaluate_expression_module
+from functions.evaluate_expression import evaluate_expression
+from functions.hooks import notify_write
+
+CALCULATOR_PKG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "calculator", "pkg")
+
+
+class TestEvaluateExpression(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = self.copy_calculator()
+        self.addCleanup(evaluate_expression_module._calculators.clear)
+
+    def copy_calculator(self):
+        working_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, working_directory, True)
+        shutil.copytree(CALCULATOR_PKG, os.path.join(working_directory, "pkg"),
+                        ignore=shutil.ignore_patterns("__pycache__"))
+        return working_directory
+
+    def set_result_key(self, working_directory, key):
+        # Make a working directory's render module recognisably its own
+        path = os.path.join(working_directory, "pkg", "render.py")
+        with open(path) as f:
+            source = f.read()
+        with open(path, "w") as f:
+            f.write(source.replace('"result"', f'"{key}"'))
+        notify_write(working_directory, "pkg/render.py")
+
+    def evaluate(self, *expressions, working_directory=None):
+        return json.loads(evaluate_expression(working_directory or self.working_directory, list(expressions)))
+
+    def test_results_and_errors(self):
+        self.assertEqual(
+            self.evaluate("3 + 5 * 2", "1 / 0", " "),
+            [
+                {"expression": "3 + 5 * 2", "result": 13},
+                {"expression": "1 / 0", "error": "float division by zero"},
+                {"expression": " ", "error": evaluate_expression_module.EMPTY_EXPRESSION_ERROR},
+            ],
+        )
+
+    def test_global_import_state_is_untouched(self):
+        sentinel = object()
+        sys.modules["pkg"] = sentinel
+        self.addCleanup(sys.modules.pop, "pkg", None)
+        path = list(sys.path)
+        self.evaluate("1 + 1")
+        self.assertIs(sys.modules["pkg"], sentinel)
+        self.assertEqual(sys.path, path)
+        self.assertFalse(any(name.startswith("_evaluate_expression") for name in sys.modules))
+
+    def test_working_directories_get_their_own_calculator(self):
+        other = self.copy_calculator()
+        self.set_result_key(other, "value")
+        self.assertEqual(self.evaluate("2 * 3"), [{"expression": "2 * 3", "result": 6}])
+        self.assertEqual(self.evaluate("2 * 3", working_directory=other), [{"expression": "2 * 3", "value": 6}])
+
+    def test_concurrent_loads_of_different_working_directories(self):
+        directories = [self.copy_calculator() for _ in range(4)]
+        for number, directory in enumerate(directories):
+            self.set_result_key(directory, f"result{number}")
+        results = {}
+
+        def evaluate(number):
+            results[number] = self.evaluate("1 + 2", working_directory=directories[number])
+
+        threads = [threading.Thread(target=evaluate, args=(number,)) for number in range(len(directories))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for number in range(len(directories)):
+            self.assertEqual(results[number], [{"expression": "1 + 2", f"result{number}": 3}])
+
+    def test_edited_sources_are_loaded_again(self):
+        self.evaluate("1 + 2")
+        self.set_result_key(self.working_directory, "value")
+        self.assertEqual(self.evaluate("1 + 2"), [{"expression": "1 + 2", "value": 3}])
+
+    def test_missing_calculator(self):
+        result = evaluate_expression(tempfile.gettempdir(), ["1 + 2"])
+        self.assertTrue(result.startswith("Error: No calculator package"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from functions import get_file_content as get_file_content_module
+from functions.cache import get_cache
+from functions.get_file_content import get_file_content
+
+LINES = "".join(f"line {number}\n" for number in range(1, 11))
+
+
+class TestGetFileContentRanges(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        self.write("lines.txt", LINES)
+        self.write("no_newline.txt", "first\nsecond")
+        self.write("empty.txt", "")
+        # Small chunks, so line lookups cross chunk boundaries
+        patcher = mock.patch.object(get_file_content_module, "LINE_INDEX_CHUNK_BYTES", 7)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(get_file_content_module._line_indexes.clear)
+        self.addCleanup(get_cache(self.working_directory).clear)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.working_directory, rel_path), "w") as f:
+            f.write(text)
+
+    def read(self, file_path, **args):
+        return get_file_content(self.working_directory, file_path, **args)
+
+    def test_line_range(self):
+        result = self.read("lines.txt", start_line=3, end_line=5)
+        header, content = result.split("\n", 1)
+        self.assertEqual(header, '[File "lines.txt": 71 bytes, 10 lines; showing lines 3-5]')
+        self.assertEqual(content, "line 3\nline 4\nline 5\n")
+
+    def test_line_range_to_end_of_file(self):
+        self.assertTrue(self.read("lines.txt", start_line=9).endswith("showing lines 9-10]\nline 9\nline 10\n"))
+
+    def test_last_line_without_trailing_newline(self):
+        result = self.read("no_newline.txt", start_line=2, end_line=2)
+        self.assertEqual(result, '[File "no_newline.txt": 12 bytes, 2 lines; showing lines 2-2]\nsecond')
+
+    def test_byte_range(self):
+        result = self.read("lines.txt", offset=7, length=6)
+        self.assertEqual(result, '[File "lines.txt": 71 bytes, 10 lines; showing bytes 7-12]\nline 2')
+
+    def test_byte_range_is_clipped_to_the_file(self):
+        self.assertTrue(self.read("lines.txt", offset=63, length=100).endswith("showing bytes 63-70]\nline 10\n"))
+
+    def test_empty_file(self):
+        self.assertEqual(self.read("empty.txt", start_line=1), '[File "empty.txt": 0 bytes, 0 lines; file is empty]')
+        self.assertEqual(self.read("empty.txt"), "")
+
+    def test_invalid_line_ranges(self):
+        for start_line, end_line in [(0, 2), (11, 12), (5, 3), (2, 0)]:
+            with self.subTest(start_line=start_line, end_line=end_line):
+                result = self.read("lines.txt", start_line=start_line, end_line=end_line)
+                self.assertTrue(result.startswith("Error: Invalid line range"), result)
+
+    def test_invalid_byte_ranges(self):
+        self.assertTrue(self.read("lines.txt", offset=71).startswith("Error: Offset 71 is outside"))
+        self.assertTrue(self.read("lines.txt", offset=-1).startswith("Error: Offset -1 is outside"))
+        self.assertTrue(self.read("lines.txt", length=0).startswith("Error: Length must be positive"))
+
+    def test_float_arguments(self):
+        self.assertTrue(self.read("lines.txt", start_line=2.0, end_line=2.0).endswith("\nline 2\n"))
+
+    def test_changed_file_gets_a_new_line_index(self):
+        self.read("lines.txt", start_line=1, end_line=1)
+        self.write("lines.txt", "new\n" + LINES)
+        self.assertTrue(self.read("lines.txt", start_line=2, end_line=2).endswith("\nline 1\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from functions import hooks
+from functions.edit_file import edit_file
+from functions.write_file import write_file
+
+
+class TestWriteListeners(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.working_directory, True)
+        self.notified = []
+        self.add_listener(self.failing_listener)
+        self.add_listener(lambda abs_working_dir, abs_file_path: self.notified.append(abs_file_path))
+
+    def add_listener(self, listener):
+        hooks.add_write_listener(listener)
+        self.addCleanup(hooks._write_listeners.remove, listener)
+
+    def failing_listener(self, abs_working_dir, abs_file_path):
+        raise RuntimeError("listener failed")
+
+    def test_failing_listener_is_logged_and_later_ones_still_run(self):
+        with self.assertLogs("functions.hooks", level="ERROR") as logs:
+            hooks.notify_write(self.working_directory, "a.py")
+        self.assertIn("listener failed", logs.output[0])
+        self.assertEqual(self.notified, [os.path.join(os.path.abspath(self.working_directory), "a.py")])
+
+    def test_write_succeeds_despite_a_failing_listener(self):
+        with self.assertLogs("functions.hooks", level="ERROR"):
+            result = write_file(self.working_directory, "a.py", "a = 1\n")
+        self.assertEqual(result, 'Successfully wrote to "a.py" (6 characters written)')
+        self.assertEqual(len(self.notified), 1)
+
+    def test_failed_write_still_notifies(self):
+        # Writing a lone surrogate fails after the file was opened and truncated
+        with self.assertLogs("functions.hooks", level="ERROR"):
+            result = write_file(self.working_directory, "a.py", "\ud800")
+        self.assertTrue(result.startswith("Error:"))
+        self.assertEqual(len(self.notified), 1)
+
+    def test_edit_succeeds_despite_a_failing_listener(self):
+        with open(os.path.join(self.working_directory, "a.py"), "w") as f:
+            f.write("a = 1\n")
+        with self.assertLogs("functions.hooks", level="ERROR"):
+            result = edit_file(self.working_directory, "a.py", edits=[{"search": "1", "replace": "2"}])
+        self.assertEqual(result, 'Successfully edited "a.py": edit 1 at line 1 (-1 +1)')
+        self.assertEqual(len(self.notified), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
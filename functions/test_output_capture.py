@@ -0,0 +1,76 @@
+import unittest
+
+from functions.output_capture import OutputCapture, StreamCapture
+
+
+class TestStreamCapture(unittest.TestCase):
+    def test_output_that_fits_is_kept_whole(self):
+        stream = StreamCapture("stdout", head_bytes=4, tail_bytes=4)
+        for chunk in (b"abc", b"defgh"):
+            stream.feed(chunk)
+        self.assertEqual(stream.dropped, 0)
+        self.assertEqual(stream.text(), "abcdefgh")
+
+    def test_one_byte_over_is_elided(self):
+        stream = StreamCapture("stdout", head_bytes=4, tail_bytes=4)
+        stream.feed(b"abcdefghi")
+        self.assertEqual(stream.total, 9)
+        self.assertEqual(stream.dropped, 1)
+        self.assertEqual(stream.text(), "abcd\n[... 1 bytes of stdout omitted ...]\nfghi")
+
+    def test_chunks_straddling_head_and_tail(self):
+        stream = StreamCapture("stderr", head_bytes=5, tail_bytes=3)
+        for chunk in (b"ab", b"cdefg", b"hi", b"", b"jklm"):
+            stream.feed(chunk)
+        self.assertEqual(bytes(stream.head), b"abcde")
+        self.assertEqual(bytes(stream.tail), b"klm")
+        self.assertEqual(stream.text(), "abcde\n[... 5 bytes of stderr omitted ...]\nklm")
+
+    def test_character_split_across_chunks_is_decoded_once_complete(self):
+        stream = StreamCapture("stdout")
+        encoded = "é€".encode("utf-8")
+        self.assertEqual([stream.feed(encoded[i:i + 1]) for i in range(len(encoded))], ["", "é", "", "", "€"])
+        self.assertEqual(stream.text(), "é€")
+
+    def test_crlf_split_across_chunks_becomes_one_newline(self):
+        stream = StreamCapture("stdout")
+        for chunk in (b"a\r", b"\nb\r", b"c"):
+            stream.feed(chunk)
+        self.assertEqual(stream.text(), "a\nb\nc")
+
+
+class TestOutputCapture(unittest.TestCase):
+    def test_limit_counts_both_streams(self):
+        capture = OutputCapture(max_bytes=10)
+        self.assertTrue(capture.feed("stdout", b"12345"))
+        self.assertTrue(capture.feed("stderr", b"67890"))
+        self.assertFalse(capture.limit_exceeded)
+        self.assertFalse(capture.feed("stdout", b"!"))
+        self.assertTrue(capture.limit_exceeded)
+        # Stays exceeded, the caller kills the process once
+        self.assertFalse(capture.feed("stderr", b""))
+
+    def test_on_output_gets_decoded_text_per_stream(self):
+        seen = []
+        capture = OutputCapture(on_output=lambda name, text: seen.append((name, text)))
+        euro = "€".encode("utf-8")
+        capture.feed("stdout", b"x" + euro[:1])
+        capture.feed("stderr", b"err")
+        capture.feed("stdout", euro[1:])
+        self.assertEqual(seen, [("stdout", "x"), ("stderr", "err"), ("stdout", "€")])
+        self.assertEqual((capture.stdout, capture.stderr), ("x€", "err"))
+
+    def test_streams_are_elided_separately(self):
+        capture = OutputCapture()
+        capture.streams = {
+            "stdout": StreamCapture("stdout", head_bytes=2, tail_bytes=2),
+            "stderr": StreamCapture("stderr", head_bytes=2, tail_bytes=2),
+        }
+        capture.feed("stdout", b"abcdef")
+        capture.feed("stderr", b"xyz")
+        self.assertEqual(capture.stdout, "ab\n[... 2 bytes of stdout omitted ...]\nef")
+        self.assertEqual(capture.stderr, "xyz")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import inspect
+import types
+import typing
+import unittest
+
+from functions import registry
+
+
+def expected_schema(hint):
+    """Return (schema without descriptions, optional) for a type hint."""
+    optional = False
+    if isinstance(hint, types.UnionType) or typing.get_origin(hint) is typing.Union:
+        members = [member for member in typing.get_args(hint) if member is not type(None)]
+        optional = len(members) < len(typing.get_args(hint))
+        (hint,) = members
+    if typing.get_origin(hint) is list:
+        return {"type": "ARRAY", "items": expected_schema(typing.get_args(hint)[0])[0]}, optional
+    if typing.is_typeddict(hint):
+        fields = typing.get_type_hints(hint)
+        properties = {field: expected_schema(field_hint)[0] for field, field_hint in fields.items()}
+        return {"type": "OBJECT", "properties": properties}, optional
+    return {"type": registry.SCHEMA_TYPES[hint.__name__]}, optional
+
+
+def without_descriptions(schema):
+    if isinstance(schema, dict):
+        return {key: without_descriptions(value) for key, value in schema.items() if key != "description"}
+    return schema
+
+
+class TestRegistry(unittest.TestCase):
+    def test_declarations_match_function_signatures(self):
+        for name in registry.TOOLS:
+            with self.subTest(tool=name):
+                function = registry.get_function(name)
+                hints = typing.get_type_hints(function)
+                parameters = inspect.signature(function).parameters
+                declaration = registry.describe(name)
+
+                properties = {}
+                required = []
+                for parameter in parameters.values():
+                    if parameter.name not in hints:
+                        continue
+                    properties[parameter.name], optional = expected_schema(hints[parameter.name])
+                    if parameter.default is inspect.Parameter.empty and not optional:
+                        required.append(parameter.name)
+
+                self.assertNotIn("working_directory", properties)
+                self.assertEqual(declaration["name"], name)
+                self.assertEqual(without_descriptions(declaration["parameters"]["properties"]), properties)
+                self.assertEqual(declaration["parameters"].get("required", []), required)
+
+    def test_every_tool_and_parameter_is_described(self):
+        for name in registry.TOOLS:
+            with self.subTest(tool=name):
+                declaration = registry.describe(name)
+                self.assertTrue(declaration["description"])
+                for parameter, schema in declaration["parameters"]["properties"].items():
+                    self.assertTrue(schema.get("description"), f"{name}({parameter}) has no description")
+
+    def test_declarations_are_valid(self):
+        declarations = registry.declarations()
+        self.assertEqual([declaration.name for declaration in declarations], list(registry.TOOLS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from functions import run_tests as run_tests_module
+from functions.run_tests import run_tests
+
+CONSTS = "LIMIT = 3\n"
+
+TESTS = '''import unittest
+from pkg.consts import LIMIT
+
+
+class TestLimit(unittest.TestCase):
+    def test_limit(self):
+        self.assertEqual(LIMIT, 3)
+'''
+
+
+class TestRunTestsDependencies(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.working_directory, "pkg"))
+        self.write("pkg/consts.py", CONSTS)
+        self.write("tests.py", TESTS)
+        patcher = mock.patch.object(run_tests_module, "CACHE_DIR", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.working_directory, rel_path)
+        with open(path, "w") as f:
+            f.write(text)
+        # Make the change visible even within the file system's mtime granularity
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def run_tests(self):
+        result = run_tests(self.working_directory)
+        self.assertFalse(result.startswith("Error"), result)
+        return json.loads(result)
+
+    def test_unchanged_tests_come_from_the_cache(self):
+        self.assertEqual(self.run_tests()["ran"], 1)
+        summary = self.run_tests()
+        self.assertEqual((summary["ran"], summary["cached"], summary["passed"]), (0, 1, 1))
+
+    def test_changed_imported_constant_reruns_the_test(self):
+        self.run_tests()
+        self.write("pkg/consts.py", "LIMIT = 4\n")
+        summary = self.run_tests()
+        self.assertEqual((summary["ran"], summary["failed"]), (1, 1))
+
+    def test_syntax_error_in_imported_module_is_reported(self):
+        self.run_tests()
+        self.write("pkg/consts.py", "LIMIT = (\n")
+        result = run_tests(self.working_directory)
+        self.assertTrue(result.startswith("Error: Could not load tests"), result)
+        self.assertIn("SyntaxError", result)
+
+    def test_single_test_name_as_string(self):
+        result = run_tests(self.working_directory, tests="TestLimit")
+        summary = json.loads(result)
+        self.assertEqual((summary["total"], summary["passed"]), (1, 1))
+
+    def test_tests_of_other_types_are_rejected(self):
+        self.assertTrue(run_tests(self.working_directory, tests=[1]).startswith("Error: tests must be"))
+
+    def test_touched_but_unchanged_module_stays_cached(self):
+        self.run_tests()
+        self.write("pkg/consts.py", CONSTS)
+        self.assertEqual(self.run_tests()["cached"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
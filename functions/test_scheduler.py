@@ -0,0 +1,57 @@
+import threading
+import time
+import unittest
+
+from functions.scheduler import RunScheduler
+
+
+class TestRunScheduler(unittest.TestCase):
+    def run_all(self, scheduler, directories, seconds=0.05):
+        # Start order per directory, and the highest number running at once
+        started = []
+        running = {"now": 0, "max": 0}
+        lock = threading.Lock()
+
+        def run(directory):
+            with scheduler.slot(directory):
+                with lock:
+                    started.append(directory)
+                    running["now"] += 1
+                    running["max"] = max(running["max"], running["now"])
+                time.sleep(seconds)
+                with lock:
+                    running["now"] -= 1
+
+        threads = []
+        for directory in directories:
+            thread = threading.Thread(target=run, args=(directory,))
+            thread.start()
+            threads.append(thread)
+            # Queue in a known order
+            time.sleep(0.005)
+        for thread in threads:
+            thread.join()
+        return started, running["max"]
+
+    def test_total_limit(self):
+        _, most = self.run_all(RunScheduler(max_running=2, max_per_directory=5), ["a", "b", "c", "d", "e"])
+        self.assertEqual(most, 2)
+
+    def test_per_directory_limit(self):
+        _, most = self.run_all(RunScheduler(max_running=5, max_per_directory=1), ["a"] * 4)
+        self.assertEqual(most, 1)
+
+    def test_directories_take_turns(self):
+        scheduler = RunScheduler(max_running=1, max_per_directory=1)
+        started, _ = self.run_all(scheduler, ["a", "a", "a", "b", "b"])
+        # After the first run of "a", the queued runs alternate
+        self.assertEqual(started, ["a", "a", "b", "a", "b"])
+
+    def test_slot_reports_time_queued(self):
+        scheduler = RunScheduler(max_running=1, max_per_directory=1)
+        with scheduler.slot("a") as queued:
+            self.assertLess(queued, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from functions import search_files as search_files_module
+from functions.search_files import _required_literals, search_files
+
+FILES = {
+    "a.txt": "ABC value\nalpha = 41\n",
+    "b.txt": "x]y and x]]y\nbracket [ok]\n",
+    "c.txt": "tab\there\nname: é\n",
+    "d.py": "def compute(a, b):\n    return a + b\n",
+    "e.txt": "abcabc\nfoo bar baz\n",
+    "f.txt": "hello world\nHELLO again\n",
+}
+
+PATTERNS = [
+    r"\x41BC",
+    r"ABC",
+    r"\U00000041BC",
+    r"\N{LATIN SMALL LETTER E WITH ACUTE}",
+    r"\101BC",
+    r"x[^\]]y",
+    r"x[\]]]y",
+    r"x[]]y",
+    r"[^]a]lpha",
+    r"(abc)\1",
+    r"def \w+\(a, b\)",
+    r"(?x) foo \s bar",
+    r"hello|alpha",
+    r"(?:foo|bar) baz",
+    r"colou?r",
+    r"ret(urn)? a",
+    r"a{2}lpha",
+    r"name:\s\S",
+    r"tab\there",
+]
+
+
+class TestRequiredLiterals(unittest.TestCase):
+    def test_literals_occur_in_every_match(self):
+        lines = [line for text in FILES.values() for line in text.splitlines()]
+        for pattern in PATTERNS:
+            literals = _required_literals(pattern)
+            for line in lines:
+                match = re.search(pattern, line, re.IGNORECASE)
+                if match:
+                    for literal in literals:
+                        self.assertIn(literal.lower(), line.lower(), f"{pattern!r} requires {literal!r}")
+
+    def test_hex_escape_is_not_a_literal(self):
+        self.assertNotIn("41", "".join(_required_literals(r"\x41BC")))
+        self.assertEqual(_required_literals(r"\x41BC"), ["BC"])
+
+    def test_escaped_bracket_does_not_close_class(self):
+        self.assertEqual(_required_literals(r"x[^\]]yz"), ["x", "yz"])
+
+
+class TestSearchFilesIndex(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        for name, text in FILES.items():
+            with open(os.path.join(self.working_directory, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        patcher = mock.patch.object(search_files_module, "CACHE_DIR", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def matched_files(self, pattern, case_sensitive):
+        result = search_files(
+            self.working_directory, pattern, regex=True, case_sensitive=case_sensitive, context=0, max_results=1000
+        )
+        self.assertFalse(result.startswith("Error"), result)
+        return {line.split(":", 1)[0] for line in result.splitlines()[:-1]}
+
+    def expected_files(self, pattern, case_sensitive):
+        matcher = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        return {
+            name for name, text in FILES.items() if any(matcher.search(line) for line in text.splitlines())
+        }
+
+    def test_indexed_search_matches_plain_re(self):
+        for pattern in PATTERNS:
+            for case_sensitive in (False, True):
+                with self.subTest(pattern=pattern, case_sensitive=case_sensitive):
+                    self.assertEqual(
+                        self.matched_files(pattern, case_sensitive), self.expected_files(pattern, case_sensitive)
+                    )
+
+    def test_search_sees_written_file(self):
+        self.matched_files("later", False)
+        path = os.path.join(self.working_directory, "g.txt")
+        with open(path, "w") as f:
+            f.write("written later\n")
+        search_files_module.get_index(self.working_directory).update_file("g.txt")
+        self.assertEqual(self.matched_files("later", False), {"g.txt"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+from functions.output_capture import OutputCapture
+from functions.worker_pool import WORKERS_SUPPORTED, WorkerPool
+
+# Starts a grandchild in a session of its own that keeps the output pipes open
+DETACHED = '''import subprocess
+import sys
+import time
+
+subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"], start_new_session=True)
+print("started", flush=True)
+{after}
+'''
+
+
+@unittest.skipUnless(WORKERS_SUPPORTED, "workers need os.fork()")
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        self.pool = WorkerPool(size=1)
+        self.addCleanup(self.pool.close)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+
+    def run_file(self, source, timeout=10):
+        path = os.path.join(self.working_directory, "script.py")
+        with open(path, "w") as f:
+            f.write(source)
+        capture = OutputCapture()
+        started = time.monotonic()
+        try:
+            returncode = self.pool.run(self.working_directory, path, [], timeout, capture)
+        finally:
+            self.elapsed = time.monotonic() - started
+        return returncode, capture
+
+    def test_runs_file_and_captures_output(self):
+        returncode, capture = self.run_file("import sys\nprint('out')\nprint('err', file=sys.stderr)\nsys.exit(3)\n")
+        self.assertEqual(returncode, 3)
+        self.assertEqual((capture.stdout.strip(), capture.stderr.strip()), ("out", "err"))
+
+    def test_detached_grandchild_does_not_block_exit(self):
+        returncode, capture = self.run_file(DETACHED.format(after=""))
+        self.assertEqual(returncode, 0)
+        self.assertEqual(capture.stdout.strip(), "started")
+        self.assertLess(self.elapsed, 5)
+
+    def test_timeout_with_detached_grandchild_is_bounded(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.run_file(DETACHED.format(after="time.sleep(60)"), timeout=1)
+        self.assertLess(self.elapsed, 8)
+        # The worker is still usable afterwards
+        returncode, _ = self.run_file("print('again')\n")
+        self.assertEqual(returncode, 0)
+
+    def test_only_allow_listed_local_modules_are_preloaded(self):
+        os.makedirs(os.path.join(self.working_directory, "pkg"))
+        for module in ("calculator", "other"):
+            with open(os.path.join(self.working_directory, "pkg", f"{module}.py"), "w") as f:
+                f.write("")
+        source = "import sys\nprint(sorted(name for name in sys.modules if name.startswith('pkg.')))\n"
+        _, capture = self.run_file(source)
+        self.assertEqual(capture.stdout.strip(), "['pkg.calculator']")
+
+    def test_recycle_replaces_workers_on_the_next_run(self):
+        self.run_file("print('first')\n")
+        (worker,) = self.pool._idle[self.working_directory]
+        self.pool.recycle(self.working_directory)
+        # The write only marks the worker stale
+        self.assertEqual(self.pool._idle[self.working_directory], [worker])
+        self.assertTrue(worker.alive)
+
+        returncode, _ = self.run_file("print('second')\n")
+        self.assertEqual(returncode, 0)
+        self.assertFalse(worker.alive)
+        (replacement,) = self.pool._idle[self.working_directory]
+        self.assertIsNot(replacement, worker)
+
+
+if __name__ == "__main__":
+    unittest.main()
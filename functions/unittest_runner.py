@@ -0,0 +1,172 @@
+"""Runs the unittest cases of one test file and reports each test as JSON.
+
+Started by functions/run_tests.py, inside a pre-warmed python_worker.py child
+when one is available, with the working directory as current directory::
+
+    python unittest_runner.py <result_path> <test_file> '{"only": [...], "skip": [...]}'
+
+Tests are selected by id ("tests.TestCalculator.test_addition") or by a
+prefix of it; skipped ids are not run. Modules of the working directory
+preloaded by the worker are dropped first, so that sys.modules afterwards
+holds exactly the local modules the test file imported. Those, plus any
+imported while the test ran, are recorded with their (st_mtime_ns, st_size)
+as the test's dependencies. The result file gets::
+
+    {"ids": [every test id in the file, then failed fixtures],
+     "results": {id: {"outcome": "pass", "message": "...", "location": "tests.py:12",
+                      "files": {path: [mtime_ns, size]}}}}
+
+or {"error": "..."} if the test file could not be loaded.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import traceback
+import unittest
+
+
+def _matches(test_id, patterns):
+    return any(test_id == pattern or test_id.startswith(pattern + ".") for pattern in patterns)
+
+
+def _flatten(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _flatten(test)
+        else:
+            yield test
+
+
+def _local_modules(prefix):
+    """Return {name: source file} of the modules in sys.modules below prefix."""
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and os.path.abspath(module_file).startswith(prefix):
+            modules[name] = os.path.abspath(module_file)
+    return modules
+
+
+def _versions(files):
+    versions = {}
+    for path in files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        versions[path] = [stat.st_mtime_ns, stat.st_size]
+    return versions
+
+
+class RecordingResult(unittest.TestResult):
+    """Keeps one outcome per test and the local modules each test depends on."""
+
+    def __init__(self, working_directory, test_file, imported):
+        super().__init__()
+        self.prefix = working_directory + os.sep
+        self.test_file = test_file
+        # {path: [mtime_ns, size]} of the local modules loaded with the test file
+        self.imported = imported
+        self.results = {}
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.results[test.id()] = {"outcome": "pass"}
+
+    def stopTest(self, test):
+        files = dict(self.imported)
+        # Modules the test imported itself, e.g. inside a test method
+        for path, version in _versions(set(_local_modules(self.prefix).values()) - set(files)).items():
+            files[path] = version
+        self.results[test.id()]["files"] = files
+        super().stopTest(test)
+
+    def _record(self, test, outcome, err=None, message=None):
+        result = self.results.setdefault(test.id(), {})
+        result["outcome"] = outcome
+        if err is not None:
+            exc_type, exc_value, tb = err
+            # First line only: "AssertionError: Lists differ: [...] != [...]"
+            result["message"] = traceback.format_exception_only(exc_type, exc_value)[-1].strip().splitlines()[0]
+            # Innermost frame in the test file, where the assertion failed
+            for frame in traceback.extract_tb(tb):
+                if os.path.abspath(frame.filename) == self.test_file:
+                    result["location"] = f"{os.path.relpath(frame.filename, self.prefix)}:{frame.lineno}"
+        elif message:
+            result["message"] = message
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "fail", err)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        # Errors in setUpClass and friends arrive with a placeholder test
+        if test.id() not in self.results:
+            self.results[test.id()] = {"files": dict(self.imported)}
+        self._record(test, "error", err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skip", message=reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "expected_failure")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "unexpected_success")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            self._record(test, "fail" if failed else "error", err)
+
+
+def run(working_directory, test_file, only, skip):
+    module_name = os.path.splitext(os.path.basename(test_file))[0]
+    prefix = working_directory + os.sep
+    # Preloaded local modules would hide which ones the test file imports
+    for name in _local_modules(prefix):
+        del sys.modules[name]
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, test_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        tests = list(_flatten(unittest.defaultTestLoader.loadTestsFromModule(module)))
+    except BaseException as e:
+        return {"error": traceback.format_exception_only(type(e), e)[-1].strip()}
+
+    selected = [
+        test for test in tests
+        if (not only or _matches(test.id(), only)) and test.id() not in skip
+    ]
+    imported = _versions(set(_local_modules(prefix).values()) | {test_file})
+    result = RecordingResult(working_directory, test_file, imported)
+    # A suite, so that class and module fixtures run as under unittest.main()
+    unittest.TestSuite(selected).run(result)
+    ids = [test.id() for test in tests]
+    # Fixture errors ("setUpClass (tests.TestCalculator)") are reported like tests
+    known = set(ids)
+    ids += [test_id for test_id in result.results if test_id not in known]
+    return {"ids": ids, "results": result.results}
+
+
+def main():
+    result_path, test_file, options = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+    working_directory = os.getcwd()
+    test_file = os.path.abspath(test_file)
+    # Import the code under test as "python tests.py" would
+    sys.path[0] = os.path.dirname(test_file)
+    report = run(working_directory, test_file, options.get("only", []), set(options.get("skip", [])))
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import atexit
+import base64
+import json
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from functions.config import (
+    PYTHON_WORKER_KILL_WAIT_SECONDS,
+    PYTHON_WORKER_POOL_SIZE,
+    PYTHON_WORKER_PRELOAD_MODULES,
+)
+from functions.hooks import add_write_listener
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_worker.py")
+
+# Forking workers need os.fork(); elsewhere run_python_file starts a new interpreter
+WORKERS_SUPPORTED = hasattr(os, "fork")
+
+
+def kill_process_group(pid):
+    """Kill the process group led by pid, or just pid if it has none yet."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class WorkerStale(Exception):
+    """The worker imported modules that have changed since it started."""
+
+
+class WorkerUnavailable(Exception):
+    """The worker could not take the request; nothing was run."""
+
+
+class PythonWorker:
+    """One pre-warmed python_worker.py process bound to a working directory."""
+
+    def __init__(self, abs_working_dir, generation):
+        self.abs_working_dir = abs_working_dir
+        self.generation = generation
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, abs_working_dir, *PYTHON_WORKER_PRELOAD_MODULES],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=abs_working_dir,
+        )
+        self._buffer = b""
+
+    def _read_event(self, deadline=None):
+        while b"\n" not in self._buffer:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                with selectors.DefaultSelector() as selector:
+                    selector.register(self.process.stdout, selectors.EVENT_READ)
+                    if not selector.select(remaining):
+                        return None
+            data = os.read(self.process.stdout.fileno(), 65536)
+            if not data:
+                raise RuntimeError("Python worker exited unexpectedly")
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def run(self, abs_file_path, args, timeout, capture, limits=None):
+        """Run a file, feeding its output to capture, and return the exit code."""
+        request = {"file": abs_file_path, "args": list(args), "limits": limits or {}}
+        try:
+            self.process.stdin.write(json.dumps(request).encode() + b"\n")
+            self.process.stdin.flush()
+            event = self._read_event()
+        except (OSError, RuntimeError, ValueError) as e:
+            raise WorkerUnavailable(str(e)) from e
+        if event["event"] == "stale":
+            raise WorkerStale()
+
+        pid = event["pid"]
+        deadline = time.monotonic() + timeout
+        killed = False
+        timed_out = False
+        while True:
+            event = self._read_event(deadline)
+            if event is None and killed:
+                # The worker did not report the killed run in time; it cannot be reused
+                self.kill()
+                break
+            if event is None:
+                timed_out = True
+            elif event["event"] == "output":
+                if capture.feed(event["stream"], base64.b64decode(event["data"])):
+                    continue
+            elif event["event"] == "exit":
+                break
+            else:
+                continue
+
+            # Kill the child and anything it started; the worker still reports its exit
+            if not killed:
+                killed = True
+                kill_process_group(pid)
+                deadline = time.monotonic() + PYTHON_WORKER_KILL_WAIT_SECONDS
+
+        if timed_out:
+            raise subprocess.TimeoutExpired([sys.executable, abs_file_path] + list(args), timeout)
+
+        return event["returncode"] if event is not None else -signal.SIGKILL
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.kill()
+        self.process.stdout.close()
+
+
+class WorkerPool:
+    """Keeps a few pre-warmed workers per working directory.
+
+    Workers are recycled whenever a tool writes to their working directory,
+    so children never run against modules imported before the write. The
+    write only marks them stale; they are closed and replaced on the next run
+    in that directory, so writes never wait for interpreters to start or exit.
+    """
+
+    def __init__(self, size=PYTHON_WORKER_POOL_SIZE):
+        self.size = size
+        self._idle = {}
+        self._busy = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, abs_working_dir):
+        with self._lock:
+            generation = self._generations.setdefault(abs_working_dir, 0)
+            idle = self._idle.setdefault(abs_working_dir, [])
+            stale = [worker for worker in idle if worker.generation != generation]
+            idle[:] = [worker for worker in idle if worker.generation == generation]
+            if idle:
+                worker = idle.pop()
+            elif self._busy.get(abs_working_dir, 0) < self.size:
+                worker = PythonWorker(abs_working_dir, generation)
+            else:
+                worker = None
+            if worker is not None:
+                self._busy[abs_working_dir] = self._busy.get(abs_working_dir, 0) + 1
+        for stale_worker in stale:
+            stale_worker.close()
+        return worker
+
+    def _release(self, worker, reuse):
+        with self._lock:
+            self._busy[worker.abs_working_dir] -= 1
+            current = worker.generation == self._generations[worker.abs_working_dir]
+            if reuse and current and worker.alive:
+                self._idle[worker.abs_working_dir].append(worker)
+                return
+        worker.close()
+
+    def run(self, abs_working_dir, abs_file_path, args, timeout, capture, limits=None):
+        """Run a file in a warm worker and return its exit code, or None if no
+        worker is available."""
+        for attempt in range(2):
+            worker = self._acquire(abs_working_dir)
+            if worker is None:
+                return None
+            try:
+                result = worker.run(abs_file_path, args, timeout, capture, limits)
+            except WorkerStale:
+                self._release(worker, reuse=False)
+                self.recycle(abs_working_dir)
+                continue
+            except WorkerUnavailable:
+                self._release(worker, reuse=False)
+                return None
+            except subprocess.TimeoutExpired:
+                self._release(worker, reuse=True)
+                raise
+            except Exception:
+                # The file may have partly run; do not run it a second time
+                self._release(worker, reuse=False)
+                raise
+            self._release(worker, reuse=True)
+            return result
+        return None
+
+    def recycle(self, abs_working_dir):
+        """Mark the workers of a working directory as stale."""
+        with self._lock:
+            if abs_working_dir in self._generations:
+                self._generations[abs_working_dir] += 1
+
+    def close(self):
+        with self._lock:
+            workers = [worker for idle in self._idle.values() for worker in idle]
+            self._idle.clear()
+        for worker in workers:
+            worker.close()
+
+
+_pool = WorkerPool()
+atexit.register(_pool.close)
+
+
+def run_in_worker(abs_working_dir, abs_file_path, args, timeout, capture, limits=None):
+    """Return the exit code, or None to fall back to a new interpreter."""
+    if not WORKERS_SUPPORTED or PYTHON_WORKER_POOL_SIZE <= 0:
+        return None
+    return _pool.run(abs_working_dir, abs_file_path, args, timeout, capture, limits)
+
+
+def _recycle_after_write(abs_working_dir, abs_file_path):
+    _pool.recycle(abs_working_dir)
+
+
+add_write_listener(_recycle_after_write)
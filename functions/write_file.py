@@ -1,6 +1,12 @@
 import os
+from functions.hooks import notify_write
 
-def write_file(working_directory, file_path, content):
+def write_file(working_directory, file_path: str, content: str):
+    """Writes or overwrites content to a file in the working directory.
+
+    file_path: Path to the file relative to the working directory.
+    content: The complete new content of the file.
+    """
     try:
         # Build full path
         full_path = os.path.join(working_directory, file_path)
@@ -18,8 +24,13 @@ def write_file(working_directory, file_path, content):
         os.makedirs(parent_dir, exist_ok=True)
 
         # Write content
-        with open(abs_file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        try:
+            with open(abs_file_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        finally:
+            # Drop cached results that depended on the old content, also
+            # when a failed write has already truncated the file
+            notify_write(working_directory, file_path)
 
         return f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
 
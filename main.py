@@ -1,38 +1,75 @@
 #!/usr/bin/env python3
 
+import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 
-from functions.file_operations import (
-    schema_get_files_info,
-    schema_get_file_content,
-    schema_write_file,
-    schema_run_python_file,
-    get_files_info,
-    get_file_content,
-    write_file,
-    run_python_file,
-)
+from compaction import DEFAULT_TOKEN_BUDGET, compact_messages
+from functions import registry
+from functions.cache import cache_stats
+from prefetch import DEFAULT_PREFETCH_BUDGET, Prefetcher
+from resilience import DEFAULT_HEDGE_PERCENTILE, ResilientCaller
+from response_cache import MODES as MODEL_CACHE_MODES, ResponseCache
+from sessions import Session, SessionNotFound
+from streaming import StreamTimings, consume_stream
+from tracing import Tracer, get_tracer, set_tracer, usage_attributes
 
 WORKING_DIRECTORY = "./calculator"
+MODEL_NAME = "gemini-2.0-flash-001"
 
-# Map function names to actual Python functions
-FUNCTION_MAP = {
-    "get_files_info": get_files_info,
-    "get_file_content": get_file_content,
-    "write_file": write_file,
-    "run_python_file": run_python_file,
-}
+# System prompt instructing agent to use tools iteratively
+SYSTEM_PROMPT = """
+You are a helpful AI coding agent.
 
+When a user asks a question about the calculator code, you must use the available functions to get information.
+Always call functions to gather information before producing a final answer.
 
-def call_function(function_call_part, verbose=False):
+Available operations:
+
+- List files and directories
+- Read file contents
+- Outline the classes and functions of Python files, and read one of them by name instead of the whole file
+- Search file contents for text or a regular expression
+- Execute Python files with optional arguments
+- Run unit tests, re-running only those affected by changes since they last passed
+- Evaluate arithmetic expressions with the calculator, without running a process
+- Write or overwrite files
+- Edit part of a file with search/replace pairs or a unified diff
+
+All paths are relative to the working directory. 
+Do not guess or fabricate file contents.
+"""
+
+# Available tools, declared in functions/registry.py
+AVAILABLE_FUNCTIONS = registry.get_tool()
+
+# Map function names to actual Python functions, imported on first call
+FUNCTION_MAP = registry.function_map()
+
+# Tools that never modify the working directory and can run side by side
+READ_ONLY_FUNCTIONS = registry.read_only_tools()
+
+# Tools whose result depends on every earlier write in the same turn
+WRITE_DEPENDENT_FUNCTIONS = registry.write_dependent_tools()
+
+# Tools that run code of the working directory, which may read any file
+EXECUTING_FUNCTIONS = registry.executing_tools()
+
+# Tools that change the file named by their arguments
+WRITE_FUNCTIONS = registry.write_tools()
+
+MAX_TOOL_WORKERS = 4
+
+
+def call_function(function_call_part, verbose=False, working_directory=None):
     """Call a Python function based on a FunctionCall object."""
     function_name = function_call_part.name
-    args = dict(function_call_part.args)
-    args["working_directory"] = WORKING_DIRECTORY
+    args = dict(function_call_part.args or {})
+    args["working_directory"] = working_directory or WORKING_DIRECTORY
 
     if verbose:
         print(f" - Calling function: {function_name}({function_call_part.args})")
@@ -50,10 +87,13 @@ def call_function(function_call_part, verbose=False):
             ],
         )
 
-    try:
-        result = FUNCTION_MAP[function_name](**args)
-    except Exception as e:
-        result = f"Error executing function: {str(e)}"
+    arguments = json.dumps(function_call_part.args or {}, default=str)
+    with get_tracer().span("tool.call", tool=function_name, args_bytes=len(arguments)) as span:
+        try:
+            result = FUNCTION_MAP[function_name](**args)
+        except Exception as e:
+            result = f"Error executing function: {str(e)}"
+        span.update(result_bytes=len(str(result)), error=str(result).startswith("Error"))
 
     return types.Content(
         role="tool",
@@ -66,14 +106,159 @@ def call_function(function_call_part, verbose=False):
     )
 
 
+def _call_target(function_call_part):
+    """Return the normalized path a function call operates on."""
+    args = function_call_part.args or {}
+    path = args.get("file_path") or args.get("directory") or args.get("path") or "."
+    return os.path.normpath(path)
+
+
+def _covers(target, path):
+    """Whether a call on target reads or writes path: the same path or a directory above it."""
+    return target == "." or target == path or path.startswith(target + os.sep)
+
+
+class ToolDispatcher:
+    """Run the function calls of one model turn on a bounded thread pool.
+
+    Calls are started as soon as they are submitted. A call only waits for
+    the earlier calls it depends on, as declared in functions/registry.py:
+
+    - any earlier call on the same path;
+    - a write waits for every earlier call that executes code or reads the
+      path or a directory above it;
+    - a call that executes code and may write waits for every earlier call;
+    - every call waits for earlier calls that execute code and may write,
+      and listings and runs also for every earlier write.
+
+    Everything else, in particular independent reads, runs concurrently.
+    """
+
+    def __init__(self, executor, verbose=False, working_directory=None):
+        self.executor = executor
+        self.verbose = verbose
+        self.working_directory = working_directory
+        self.futures = []
+        # (function name, target, future) in the order the calls were submitted
+        self._calls = []
+
+    def _depends_on(self, function_name, target, earlier_name, earlier_target):
+        if earlier_target == target:
+            return True
+        earlier_writes = earlier_name not in READ_ONLY_FUNCTIONS
+        earlier_executes = earlier_name in EXECUTING_FUNCTIONS
+        if earlier_writes and earlier_executes:
+            return True
+        if earlier_writes and function_name in WRITE_DEPENDENT_FUNCTIONS:
+            return True
+        if function_name in EXECUTING_FUNCTIONS and function_name not in READ_ONLY_FUNCTIONS:
+            return True
+        if function_name in WRITE_FUNCTIONS:
+            return earlier_executes or _covers(earlier_target, target)
+        return False
+
+    def submit(self, function_call_part):
+        function_name = function_call_part.name
+        target = _call_target(function_call_part)
+
+        dependencies = [
+            future
+            for earlier_name, earlier_target, future in self._calls
+            if not future.done() and self._depends_on(function_name, target, earlier_name, earlier_target)
+        ]
+
+        # Dependencies were submitted earlier, so the FIFO pool has already
+        # started them by the time this call waits on them.
+        future = self.executor.submit(self._run, function_call_part, dependencies)
+
+        self._calls.append((function_name, target, future))
+        self.futures.append(future)
+        return future
+
+    def _run(self, function_call_part, dependencies):
+        wait(dependencies)
+        return call_function(
+            function_call_part, verbose=self.verbose, working_directory=self.working_directory
+        )
+
+    def results(self):
+        """Return the tool responses in the order the calls were submitted."""
+        return [future.result() for future in self.futures]
+
+
+def record_started_calls(messages, function_call_parts, dispatcher):
+    """Append the calls a failed stream already started, and their results,
+    to messages; they may have changed files the next turn must know about."""
+    if dispatcher is None or not function_call_parts:
+        return
+    messages.append(
+        types.Content(role="model", parts=[types.Part(function_call=part) for part in function_call_parts])
+    )
+    messages.extend(dispatcher.results())
+
+
+def call_functions(function_call_parts, verbose=False, executor=None, working_directory=None):
+    """Call several functions from one model turn, concurrently if possible.
+
+    Without an executor the calls run one after the other, as before.
+    Results are returned in the original call order either way.
+    """
+    if executor is None:
+        return [
+            call_function(part, verbose=verbose, working_directory=working_directory)
+            for part in function_call_parts
+        ]
+
+    dispatcher = ToolDispatcher(executor, verbose=verbose, working_directory=working_directory)
+    for part in function_call_parts:
+        dispatcher.submit(part)
+    return dispatcher.results()
+
+
+def _pop_option(name, default=None):
+    """Remove "name value" from sys.argv and return the value."""
+    if name not in sys.argv:
+        return default
+    index = sys.argv.index(name)
+    if index + 1 >= len(sys.argv):
+        print(f"Error: {name} requires a value")
+        sys.exit(1)
+    value = sys.argv[index + 1]
+    del sys.argv[index:index + 2]
+    return value
+
+
+def _pop_int_option(name, default):
+    """Remove "name value" from sys.argv and return the value as a non-negative int."""
+    value = _pop_option(name, default)
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+    if value < 0:
+        print(f"Error: {name} must be a non-negative integer")
+        sys.exit(1)
+    return value
+
+
 def main():
     load_dotenv()
+
+    # Record model responses to disk, or replay them without calling the API
+    model_cache_mode = _pop_option("--model-cache", "passthrough")
+    if model_cache_mode not in MODEL_CACHE_MODES:
+        print(f"Error: --model-cache must be one of {', '.join(MODEL_CACHE_MODES)}")
+        sys.exit(1)
+
     api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
+    if not api_key and model_cache_mode != "replay":
         print("Error: GEMINI_API_KEY not found in .env")
         sys.exit(1)
 
-    if len(sys.argv) < 2:
+    # Continue a saved session instead of starting a new one
+    resume_id = _pop_option("--resume")
+
+    if len(sys.argv) < 2 and not resume_id:
         print("Error: No prompt provided")
         sys.exit(1)
 
@@ -81,117 +266,202 @@ def main():
     if verbose:
         sys.argv.remove("--verbose")
 
-    user_prompt = " ".join(sys.argv[1:])
-
-    # System prompt instructing agent to use tools iteratively
-    system_prompt = """
-    You are a helpful AI coding agent.
-
-    When a user asks a question about the calculator code, you must use the available functions to get information.
-    Always call functions to gather information before producing a final answer.
+    # Tool calls from one turn run concurrently unless --sequential is given
+    sequential = "--sequential" in sys.argv
+    if sequential:
+        sys.argv.remove("--sequential")
 
-    Available operations:
+    # Estimated tokens the history may use before older tool results are dropped
+    token_budget = _pop_int_option("--token-budget", DEFAULT_TOKEN_BUDGET)
 
-    - List files and directories
-    - Read file contents
-    - Execute Python files with optional arguments
-    - Write or overwrite files
+    # Bytes of prefetched listings and files attached to the first request
+    prefetch_budget = _pop_int_option("--prefetch-budget", DEFAULT_PREFETCH_BUDGET)
 
-    All paths are relative to the working directory. 
-    Do not guess or fabricate file contents.
-    """
+    # Send a second request when a model call is slower than most recent ones
+    hedge = "--hedge" in sys.argv
+    if hedge:
+        sys.argv.remove("--hedge")
 
-    client = genai.Client(api_key=api_key)
+    # Spans for every iteration, model call and tool call, written as JSONL
+    trace_path = _pop_option("--trace")
+    trace_format = _pop_option("--trace-format", "jsonl")
+    if trace_format not in ("jsonl", "otel"):
+        print("Error: --trace-format must be jsonl or otel")
+        sys.exit(1)
+    tracer = Tracer(trace_path, otel=trace_format == "otel")
+    set_tracer(tracer)
 
-    # Conversation messages: User prompt is first
-    messages = [types.Content(role="user", parts=[types.Part(text=user_prompt)])]
+    user_prompt = " ".join(sys.argv[1:])
 
-    # Available tools
-    available_functions = types.Tool(
-        function_declarations=[
-            schema_get_files_info,
-            schema_get_file_content,
-            schema_write_file,
-            schema_run_python_file,
-        ]
+    # Warm the tool caches for the prompt of a new session while the client
+    # is set up and the first model call is in flight
+    prefetcher = None
+    if not resume_id:
+        prefetcher = Prefetcher(WORKING_DIRECTORY, user_prompt, FUNCTION_MAP, byte_budget=prefetch_budget).start()
+
+    client = genai.Client(api_key=api_key) if model_cache_mode != "replay" else None
+    def open_stream(**request):
+        # Wait for the first chunk here, so that retries, hedging and the
+        # deadline cover it; a stream is not restarted once output was shown.
+        chunks = client.models.generate_content_stream(**request)
+        return next(chunks, None), chunks
+
+    def close_stream(opened):
+        opened[1].close()
+
+    # Transient model errors are retried instead of ending the session; the
+    # streams of losing hedges and of attempts past the deadline are closed
+    model_caller = ResilientCaller(
+        hedge_percentile=DEFAULT_HEDGE_PERCENTILE if hedge else None, discard=close_stream
     )
+    response_cache = ResponseCache(model_cache_mode)
 
-    # --- Guaranteed first-step function calls for Boot.dev test ---
-    # Call get_files_info on working directory
-    initial_files = get_files_info(working_directory=WORKING_DIRECTORY, directory=".")
-    print(" - Calling function: get_files_info")
-    messages.append(
-        types.Content(
-            role="tool",
-            parts=[types.Part.from_function_response(name="get_files_info", response={"result": initial_files})]
-        )
-    )
+    def generate_content_stream(**request):
+        first, chunks = model_caller.call(open_stream, **request)
+        try:
+            if first is not None:
+                yield first
+            yield from chunks
+        finally:
+            chunks.close()
 
-    # Call get_file_content on main.py
-    main_file_content = get_file_content(file_path="main.py", working_directory=WORKING_DIRECTORY)
-    print(" - Calling function: get_file_content")
-    messages.append(
-        types.Content(
-            role="tool",
-            parts=[types.Part.from_function_response(name="get_file_content", response={"result": main_file_content})]
-        )
-    )
-    # --------------------------------------------------------------
+    if resume_id:
+        try:
+            session, messages = Session.load(resume_id)
+        except SessionNotFound as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        # A new prompt continues the task; without one the loop picks up where it stopped
+        if user_prompt:
+            messages.append(types.Content(role="user", parts=[types.Part(text=user_prompt)]))
+    else:
+        # Conversation messages: User prompt is first
+        messages = [types.Content(role="user", parts=[types.Part(text=user_prompt)])]
+        # The prefetched results that fit the budget go along with the first request
+        with tracer.span("agent.prefetch") as span:
+            attached = prefetcher.attach(messages)
+            span.update(results=len(attached), bytes=prefetcher.attached_bytes)
+        for item in attached:
+            print(f" - Prefetched: {item['name']}({', '.join(str(value) for value in item['args'].values())})")
+        session = Session.create({"prompt": user_prompt, "working_directory": WORKING_DIRECTORY, "model": MODEL_NAME})
+    # Saved after every iteration, so the session can be resumed with --resume
+    session.save(messages)
+
+    executor = None if sequential else ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS)
 
     # Agent loop: up to 20 iterations
     for iteration in range(20):
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.0-flash-001",
-                contents=messages,
-                config=types.GenerateContentConfig(
-                    tools=[available_functions],
-                    system_instruction=system_prompt,
-                ),
-            )
-        except Exception as e:
-            print(f"Error calling generate_content: {e}")
-            break
-
-        # Append all candidates to messages
-        for candidate in response.candidates:
-            messages.append(candidate.content)
-
-        function_called = False
-
-        # Process function calls
-        for candidate in response.candidates:
-            for part in candidate.content.parts:
-                if part.function_call:
-                    function_called = True
-                    result_content = call_function(part.function_call, verbose=verbose)
-                    messages.append(result_content)
-
-                    if verbose:
-                        print(f"-> {result_content.parts[0].function_response.response}")
-
-        # Check if final text response exists
-        final_texts = [
-            part.text
-            for candidate in response.candidates
-            for part in candidate.content.parts
-            if part.text
-        ]
-
-        if final_texts:
-            print("Final response:")
-            for text in final_texts:
-                print(text)
-            break
-
-        if not function_called:
-            # No function call this iteration, stop loop
-            print("No function call detected. Exiting loop.")
-            break
+        with tracer.span("agent.iteration", iteration=iteration):
+            tokens_before, tokens_after = compact_messages(messages, token_budget=token_budget)
+            if verbose and tokens_before != tokens_after:
+                print(f" - Compacted history: saved ~{tokens_before - tokens_after} tokens (~{tokens_after} left)")
+
+            # Function calls start on the executor as soon as their chunk
+            # arrives; with --sequential they run after the stream has ended.
+            dispatcher = ToolDispatcher(executor, verbose=verbose) if executor is not None else None
+            function_call_parts = []
+            streamed_text = []
+
+            def on_function_call(function_call_part):
+                function_call_parts.append(function_call_part)
+                if prefetcher is not None:
+                    prefetcher.observe(function_call_part)
+                if dispatcher is not None:
+                    dispatcher.submit(function_call_part)
+
+            def on_text(text):
+                if not streamed_text:
+                    print("Final response:")
+                streamed_text.append(text)
+                print(text, end="", flush=True)
+
+            timings = StreamTimings()
+            try:
+                with tracer.span(
+                    "model.generate_content", model=MODEL_NAME, messages=len(messages), estimated_tokens=tokens_after
+                ) as span:
+                    try:
+                        response = consume_stream(
+                            response_cache.generate_content_stream(
+                                generate_content_stream,
+                                model=MODEL_NAME,
+                                contents=messages,
+                                config=types.GenerateContentConfig(
+                                    tools=[AVAILABLE_FUNCTIONS],
+                                    system_instruction=SYSTEM_PROMPT,
+                                ),
+                            ),
+                            on_text=on_text,
+                            on_function_call=on_function_call,
+                            timings=timings,
+                        )
+                    finally:
+                        span.update(timings.attributes())
+                        if streamed_text:
+                            print()
+                    span.update(usage_attributes(response))
+            except Exception as e:
+                print(f"Error calling generate_content: {e}")
+                record_started_calls(messages, function_call_parts, dispatcher)
+                session.save(messages)
+                break
+
+            if verbose and timings.first_token is not None:
+                line = f" - First token after {timings.first_token * 1000:.0f} ms"
+                if timings.first_tool_call is not None:
+                    line += f", first function call after {timings.first_tool_call * 1000:.0f} ms"
+                print(line)
+
+            # Append all candidates to messages
+            for candidate in response.candidates:
+                messages.append(candidate.content)
+
+            # Collect the function results, in the order the calls arrived
+            function_called = bool(function_call_parts)
+
+            with tracer.span("agent.tools", calls=len(function_call_parts)):
+                if dispatcher is not None:
+                    results = dispatcher.results()
+                else:
+                    results = call_functions(function_call_parts, verbose=verbose)
+            for result_content in results:
+                messages.append(result_content)
+
+                if verbose:
+                    print(f"-> {result_content.parts[0].function_response.response}")
+
+            session.save(messages)
+
+            # A text response, already printed while it streamed, ends the loop
+            if streamed_text:
+                break
+
+            if not function_called:
+                # No function call this iteration, stop loop
+                print("No function call detected. Exiting loop.")
+                break
 
     else:
         print("Max iterations reached without producing a final response.")
 
+    if executor is not None:
+        executor.shutdown()
+
+    print(f"Session {session.session_id} saved; continue it with --resume {session.session_id}")
+
+    if verbose:
+        for working_directory, stats in cache_stats().items():
+            print(f" - Tool cache for {working_directory}: {stats}")
+        print(f" - Model calls: {model_caller.stats()}")
+        print(f" - Model response cache: {response_cache.stats()}")
+        if prefetcher is not None:
+            print(f" - Prefetch: {prefetcher.stats()}")
+
+    if tracer.enabled:
+        print(f"Trace written to {trace_path}:")
+        print(tracer.summary())
+        tracer.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,186 @@
+"""Prefetch the workspace while the agent sets up its first model call.
+
+Instead of fixed priming calls, the prefetcher lists the working directory
+and reads the files whose names match terms of the prompt, through the
+same cached tools the model calls, so the model's own calls for them are
+cache hits. The first request waits for this whole set and carries the
+results as tool calls and responses, most relevant first, as long as they
+fit the byte budget. The set depends only on the prompt and the files, not
+on how fast they were read, so a recorded session replays with the same
+first request.
+
+The hit rate is the share of the files the model goes on to request that
+were prefetched; attached files it never asks for are reported as waste.
+"""
+
+import os
+import re
+import threading
+from fnmatch import fnmatch
+
+from google.genai import types
+
+from functions.config import DEFAULT_IGNORE_PATTERNS
+
+# Bytes of tool results attached to the first request
+DEFAULT_PREFETCH_BUDGET = 8000
+PREFETCH_MAX_FILES = 4
+# Directory levels searched for file names matching the prompt
+PREFETCH_MAX_DEPTH = 4
+
+MIN_TERM_LENGTH = 3
+STOP_WORDS = {
+    "the", "and", "for", "with", "that", "this", "what", "how", "why", "does", "from", "into", "are",
+    "can", "you", "your", "please", "file", "files", "code", "make", "use", "using", "should", "when",
+}
+
+# Tool -> argument naming the file it reads, for the hit rate
+FILE_ARGUMENTS = {"get_file_content": "file_path", "get_symbol": "file_path", "get_code_outline": "path"}
+
+
+def prompt_terms(prompt):
+    """Return the lower-case words of a prompt worth matching against file names."""
+    words = re.findall(r"[a-z0-9]+", prompt.lower())
+    return {word for word in words if len(word) >= MIN_TERM_LENGTH and word not in STOP_WORDS}
+
+
+def _score(rel_path, terms):
+    parts = rel_path.lower().split(os.sep)
+    stem = os.path.splitext(parts[-1])[0]
+    score = 0
+    for term in terms:
+        if term == stem:
+            score += 3
+        elif term in stem or (len(stem) >= MIN_TERM_LENGTH and stem in term):
+            score += 2
+        elif any(term == part for part in parts[:-1]):
+            score += 1
+    return score
+
+
+def rank_files(abs_working_dir, terms, max_files=PREFETCH_MAX_FILES):
+    """Return up to max_files relative paths whose names match terms, best first."""
+    if not terms:
+        return []
+    scored = []
+    for root, dirs, files in os.walk(abs_working_dir):
+        rel_root = os.path.relpath(root, abs_working_dir)
+        depth = 0 if rel_root == "." else rel_root.count(os.sep) + 1
+        if depth + 1 >= PREFETCH_MAX_DEPTH:
+            dirs[:] = []
+        else:
+            dirs[:] = sorted(d for d in dirs if not any(fnmatch(d, p) for p in DEFAULT_IGNORE_PATTERNS))
+        for name in files:
+            if any(fnmatch(name, p) for p in DEFAULT_IGNORE_PATTERNS):
+                continue
+            rel_path = os.path.relpath(os.path.join(root, name), abs_working_dir)
+            score = _score(rel_path, terms)
+            if score:
+                scored.append((-score, depth, rel_path))
+    return [rel_path for _, _, rel_path in sorted(scored)[:max_files]]
+
+
+class Prefetcher:
+    """Runs the prefetch calls on a background thread, in order of relevance."""
+
+    def __init__(self, working_directory, prompt, functions, byte_budget=DEFAULT_PREFETCH_BUDGET):
+        self.working_directory = working_directory
+        self.prompt = prompt
+        self.functions = functions
+        self.byte_budget = byte_budget
+        # {"name", "args", "result"} in the order the calls were made
+        self.items = []
+        self.attached = []
+        self.attached_bytes = 0
+        self.requested = []
+        self._finished = False
+        self._condition = threading.Condition()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def _run(self):
+        try:
+            self._fetch("get_files_info", {"directory": "."})
+            abs_working_dir = os.path.abspath(self.working_directory)
+            for rel_path in rank_files(abs_working_dir, prompt_terms(self.prompt)):
+                self._fetch("get_file_content", {"file_path": rel_path})
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+    def _fetch(self, name, args):
+        item = {"name": name, "args": args, "result": None}
+        with self._condition:
+            self.items.append(item)
+        try:
+            result = str(self.functions[name](working_directory=self.working_directory, **args))
+        except Exception as e:
+            result = f"Error: {e}"
+        with self._condition:
+            item["result"] = result
+            self._condition.notify_all()
+
+    def attach(self, messages):
+        """Wait for every prefetch call, append the results that fit the
+        budget to messages, each after a matching function call; return them."""
+        with self._condition:
+            while not self._finished:
+                self._condition.wait()
+            items = list(self.items)
+
+        attached = []
+        used = 0
+        for item in items:
+            size = len(item["result"].encode())
+            if not item["result"].startswith("Error") and used + size <= self.byte_budget:
+                attached.append(item)
+                used += size
+
+        # The same shape as the model's own calls, so compaction treats them alike
+        for item in attached:
+            messages.append(
+                types.Content(role="model", parts=[types.Part.from_function_call(name=item["name"], args=item["args"])])
+            )
+            messages.append(
+                types.Content(
+                    role="tool",
+                    parts=[types.Part.from_function_response(name=item["name"], response={"result": item["result"]})],
+                )
+            )
+        self.attached = attached
+        self.attached_bytes = used
+        return attached
+
+    def observe(self, function_call_part):
+        """Note a file the model asked for, for the hit rate."""
+        argument = FILE_ARGUMENTS.get(function_call_part.name)
+        path = (function_call_part.args or {}).get(argument) if argument else None
+        if path:
+            with self._condition:
+                self.requested.append(os.path.normpath(path))
+
+    def stats(self):
+        with self._condition:
+            prefetched = {
+                os.path.normpath(item["args"]["file_path"])
+                for item in self.items
+                if item["name"] == "get_file_content" and item["result"] and not item["result"].startswith("Error")
+            }
+            requested = set(self.requested)
+        attached = {os.path.normpath(item["args"]["file_path"]) for item in self.attached if "file_path" in item["args"]}
+        hits = requested & (prefetched | attached)
+        return {
+            "files_prefetched": len(prefetched),
+            "files_attached": len(attached),
+            "attached_bytes": self.attached_bytes,
+            "files_requested": len(requested),
+            "hits": len(hits),
+            "hit_rate": round(len(hits) / len(requested), 2) if requested else None,
+            # Sent with the first request but never asked for: wasted tokens
+            "attached_unused": len(attached - requested),
+            # Read in the background but neither attached nor requested
+            "unused": len(prefetched - attached - requested),
+        }
@@ -0,0 +1,163 @@
+"""Retries, deadlines and hedging for model calls.
+
+ResilientCaller.call() runs a blocking call such as
+client.models.generate_content. Retryable failures (rate limits, server
+errors, timeouts, dropped connections) are retried with full-jitter
+exponential backoff until the attempts or the deadline of the call run
+out. With hedging on, a second identical request is sent once the first
+has taken longer than a percentile of recent call latencies, and
+whichever answers first is used. Answers that are no longer waited for (the
+losing hedge, or a request that outlived the deadline) are handed to
+discard, so that open streams can be closed.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import httpx
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+CALL_DEADLINE_SECONDS = 120.0
+
+DEFAULT_HEDGE_PERCENTILE = 95
+# Latencies kept for the hedging threshold, and how many are needed before hedging
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 10
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def is_retryable(error):
+    """Return True for errors worth trying the same request again for."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError))
+
+
+def _start(function, args, kwargs):
+    # A daemon thread, so a request that never returns cannot block exit
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+class ResilientCaller:
+    def __init__(self, max_attempts=MAX_ATTEMPTS, deadline=CALL_DEADLINE_SECONDS, hedge_percentile=None, discard=None):
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.discard = discard
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counters = dict.fromkeys(
+            ("calls", "attempts", "retries", "failures", "deadline_exceeded", "hedges", "hedges_won"), 0
+        )
+        self._lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def hedge_delay(self):
+        """Return the seconds to wait before hedging, or None not to hedge."""
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))
+        return latencies[index]
+
+    def call(self, function, *args, **kwargs):
+        self._count("calls")
+        deadline = time.monotonic() + self.deadline if self.deadline else None
+        for attempt in range(self.max_attempts):
+            self._count("attempts")
+            started = time.monotonic()
+            try:
+                result = self._attempt(function, args, kwargs, deadline)
+            except Exception as e:
+                remaining = deadline - time.monotonic() if deadline else None
+                if isinstance(e, DeadlineExceeded):
+                    self._count("deadline_exceeded")
+                if isinstance(e, DeadlineExceeded) or not is_retryable(e) or attempt + 1 == self.max_attempts:
+                    self._count("failures")
+                    raise
+                backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                if remaining is not None and backoff >= remaining:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                time.sleep(backoff)
+                continue
+
+            with self._lock:
+                self.latencies.append(time.monotonic() - started)
+            return result
+
+    def _attempt(self, function, args, kwargs, deadline):
+        hedge_delay = self.hedge_delay()
+        if deadline is None and hedge_delay is None:
+            return function(*args, **kwargs)
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        primary = _start(function, args, kwargs)
+        started = [primary]
+        if hedge_delay is not None and (deadline is None or hedge_delay < remaining()):
+            done, _ = wait(started, timeout=hedge_delay)
+            if not done:
+                self._count("hedges")
+                started.append(_start(function, args, kwargs))
+
+        # Use the first answer; if one request fails, wait for the other
+        pending = set(started)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                self._abandon(pending)
+                raise DeadlineExceeded(f"no response within {self.deadline} seconds")
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count("hedges_won")
+                    self._abandon([other for other in started if other is not future])
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _abandon(self, futures):
+        # Pass the answers of requests nobody waits for to discard, now or when they arrive
+        if self.discard is None:
+            return
+
+        def discard(future):
+            if not future.cancelled() and future.exception() is None:
+                self.discard(future.result())
+
+        for future in futures:
+            future.add_done_callback(discard)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,192 @@
+"""On-disk record/replay cache for model responses.
+
+Requests are keyed by the SHA-256 of their canonical JSON: the model name,
+the config (system instruction and tool declarations) and the contents as
+sent. Modes:
+
+- passthrough: the cache is not used,
+- record: every request goes to the model and its response is stored,
+- replay: responses come only from the cache, a miss is an error, so a
+  recorded session runs again without network access.
+
+Stored responses are evicted least recently used first once the directory
+holds more than max_bytes.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from google.genai import types
+
+from functions.config import CACHE_DIR
+from streaming import merge_chunks
+
+MODES = ("passthrough", "record", "replay")
+RESPONSE_CACHE_DIR = os.path.join(CACHE_DIR, "responses")
+RESPONSE_CACHE_MAX_BYTES = 200_000_000
+
+# Parts of tool results that differ between otherwise identical runs
+VOLATILE_PATTERNS = [
+    (re.compile(r"\[Queued \d+\.\d+s, ran \d+\.\d+s\]"), "[Queued -, ran -]"),
+    # run_tests summaries, JSON inside the JSON of the request
+    (
+        re.compile(r'\\"ran\\": \d+, \\"cached\\": \d+, \\"seconds\\": [\d.]+'),
+        r'\\"ran\\": -, \\"cached\\": -, \\"seconds\\": -',
+    ),
+]
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+def request_key(model, contents, config):
+    """Return the SHA-256 hex digest identifying a generate_content request.
+
+    Run times and cache counts in tool results are masked, so a replayed session finds the
+    responses recorded for it.
+    """
+    request = {
+        "model": model,
+        "config": config.model_dump(mode="json", exclude_none=True) if config else None,
+        "contents": [content.model_dump(mode="json", exclude_none=True) for content in contents],
+    }
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    for pattern, replacement in VOLATILE_PATTERNS:
+        canonical = pattern.sub(replacement, canonical)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, mode="passthrough", directory=None, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.mode = mode
+        self.directory = directory or RESPONSE_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> (last use, size), oldest first once sorted
+        self._entries = {}
+        self._size = 0
+        if mode != "passthrough":
+            self._scan()
+
+    def _scan(self):
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                self._entries[entry.name[:-len(".json")]] = (stat.st_mtime_ns, stat.st_size)
+                self._size += stat.st_size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                response = types.GenerateContentResponse.model_validate_json(f.read())
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        # Mark as recently used for eviction
+        os.utime(self._path(key))
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries[key] = (time.time_ns(), self._entries[key][1])
+        return response
+
+    def put(self, key, response):
+        data = response.model_dump_json(exclude_none=True)
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self._path(key))
+
+        stat = os.stat(self._path(key))
+        with self._lock:
+            self.stores += 1
+            if key in self._entries:
+                self._size -= self._entries[key][1]
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size)
+            self._size += stat.st_size
+            self._evict()
+
+    def _evict(self):
+        for key, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            del self._entries[key]
+            self._size -= size
+            self.evictions += 1
+
+    def generate_content(self, generate, model, contents, config=None):
+        """Answer a request from the cache or with generate(model=, contents=, config=)."""
+        if self.mode == "passthrough":
+            return generate(model=model, contents=contents, config=config)
+
+        key = request_key(model, contents, config)
+        if self.mode == "replay":
+            response = self.get(key)
+            if response is None:
+                raise CacheMiss(f"No recorded response for request {key[:12]} in {self.directory}")
+            return response
+
+        response = generate(model=model, contents=contents, config=config)
+        self.put(key, response)
+        return response
+
+    def generate_content_stream(self, generate_stream, model, contents, config=None):
+        """Yield response chunks from the cache or from generate_stream(model=, contents=, config=).
+
+        A replayed response arrives as a single chunk. A recorded stream is
+        stored merged, once it has ended, under the same key as
+        generate_content would use.
+        """
+        if self.mode == "passthrough":
+            yield from generate_stream(model=model, contents=contents, config=config)
+            return
+
+        key = request_key(model, contents, config)
+        if self.mode == "replay":
+            response = self.get(key)
+            if response is None:
+                raise CacheMiss(f"No recorded response for request {key[:12]} in {self.directory}")
+            yield response
+            return
+
+        chunks = []
+        for chunk in generate_stream(model=model, contents=contents, config=config):
+            chunks.append(chunk)
+            yield chunk
+        self.put(key, merge_chunks(chunks))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Long-running agent service that hosts many sessions in one process.
+
+Clients connect over TCP and exchange JSON lines. Each request line is an
+object such as::
+
+    {"session": "optional id", "prompt": "...", "working_directory": "./calculator"}
+
+The working directory defaults to, and must lie within, the server's
+``WORKING_DIRECTORY``. The server answers with one JSON line per event
+(``session``, ``function_call``, ``text``, ``done`` or ``error``). Sending
+``{"session": "<id>", "close": true}`` drops a session and its history.
+
+All sessions share one ``genai.Client`` (and therefore one connection pool),
+the tool schemas and a thread pool for tool calls, while each session keeps
+its own working directory and message history.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+
+from compaction import compact_messages
+from main import (
+    AVAILABLE_FUNCTIONS,
+    MAX_TOOL_WORKERS,
+    MODEL_NAME,
+    SYSTEM_PROMPT,
+    WORKING_DIRECTORY,
+    ToolDispatcher,
+)
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_ITERATIONS = 20
+
+# Model calls in flight across all sessions
+MAX_CONCURRENT_MODEL_CALLS = 16
+# Prompts a single session may have queued before new ones are rejected
+MAX_PENDING_PROMPTS_PER_SESSION = 4
+# Threads shared by the tool calls of every session
+MAX_SERVER_TOOL_WORKERS = MAX_TOOL_WORKERS * 4
+
+
+class Session:
+    def __init__(self, session_id, working_directory):
+        self.id = session_id
+        self.working_directory = working_directory
+        self.messages = []
+        self.pending = 0
+        # Prompts of one session are answered one after the other so that
+        # its history stays coherent; other sessions are not affected.
+        self.lock = asyncio.Lock()
+
+
+class AgentServer:
+    def __init__(self, client, verbose=False, root=WORKING_DIRECTORY):
+        self.client = client
+        self.verbose = verbose
+        # Sessions may only work in this directory or below it
+        self.root = os.path.realpath(root)
+        self.sessions = {}
+        self.model_calls = asyncio.Semaphore(MAX_CONCURRENT_MODEL_CALLS)
+        self.executor = ThreadPoolExecutor(max_workers=MAX_SERVER_TOOL_WORKERS)
+        self.config = types.GenerateContentConfig(
+            tools=[AVAILABLE_FUNCTIONS],
+            system_instruction=SYSTEM_PROMPT,
+        )
+
+    def get_session(self, session_id, working_directory):
+        if session_id in self.sessions:
+            return self.sessions[session_id]
+
+        session = Session(session_id or uuid.uuid4().hex, self.resolve_working_directory(working_directory))
+        self.sessions[session.id] = session
+        return session
+
+    def resolve_working_directory(self, working_directory):
+        if not working_directory:
+            return self.root
+        # Resolve symlinks and ".." before comparing against the root
+        path = os.path.realpath(working_directory)
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f'"{working_directory}" is outside the permitted working directory')
+        if not os.path.isdir(path):
+            raise ValueError(f'"{working_directory}" is not a directory')
+        return path
+
+    async def handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(event):
+            async with write_lock:
+                writer.write(json.dumps(event).encode() + b"\n")
+                # Waiting for the buffer to drain slows down sessions whose
+                # client reads slowly instead of buffering without bound.
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    await send({"event": "error", "error": f"Invalid request: {e}"})
+                    continue
+
+                task = asyncio.create_task(self.handle_request(request, send))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def handle_request(self, request, send):
+        session_id = request.get("session")
+
+        if request.get("close"):
+            self.sessions.pop(session_id, None)
+            await send({"session": session_id, "event": "done"})
+            return
+
+        try:
+            session = self.get_session(session_id, request.get("working_directory"))
+        except ValueError as e:
+            await send({"session": session_id, "event": "error", "error": str(e)})
+            return
+
+        prompt = request.get("prompt")
+        if not prompt:
+            await send({"session": session.id, "event": "error", "error": "No prompt provided"})
+            return
+
+        if session.pending >= MAX_PENDING_PROMPTS_PER_SESSION:
+            await send({"session": session.id, "event": "error", "error": "Session is busy, try again later"})
+            return
+
+        session.pending += 1
+        try:
+            async with session.lock:
+                await send({"session": session.id, "event": "session"})
+                await self.run_agent(session, prompt, send)
+        except Exception as e:
+            await send({"session": session.id, "event": "error", "error": str(e)})
+        finally:
+            session.pending -= 1
+
+    async def run_agent(self, session, prompt, send):
+        messages = session.messages
+        messages.append(types.Content(role="user", parts=[types.Part(text=prompt)]))
+
+        for iteration in range(MAX_ITERATIONS):
+            compact_messages(messages)
+            async with self.model_calls:
+                response = await self.client.aio.models.generate_content(
+                    model=MODEL_NAME,
+                    contents=messages,
+                    config=self.config,
+                )
+
+            for candidate in response.candidates:
+                messages.append(candidate.content)
+
+            function_call_parts = [
+                part.function_call
+                for candidate in response.candidates
+                for part in candidate.content.parts
+                if part.function_call
+            ]
+
+            dispatcher = ToolDispatcher(
+                self.executor, verbose=self.verbose, working_directory=session.working_directory
+            )
+            for part in function_call_parts:
+                await send({"session": session.id, "event": "function_call", "name": part.name})
+                dispatcher.submit(part)
+            messages.extend(
+                await asyncio.gather(*(asyncio.wrap_future(future) for future in dispatcher.futures))
+            )
+
+            final_texts = [
+                part.text
+                for candidate in response.candidates
+                for part in candidate.content.parts
+                if part.text
+            ]
+            if final_texts:
+                await send({"session": session.id, "event": "text", "text": "\n".join(final_texts)})
+                break
+
+            if not function_call_parts:
+                await send({"session": session.id, "event": "error", "error": "No function call detected"})
+                break
+        else:
+            await send({"session": session.id, "event": "error", "error": "Max iterations reached"})
+
+        await send({"session": session.id, "event": "done"})
+
+
+async def serve(host=HOST, port=PORT, verbose=False):
+    load_dotenv()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        print("Error: GEMINI_API_KEY not found in .env")
+        sys.exit(1)
+
+    agent_server = AgentServer(genai.Client(api_key=api_key), verbose=verbose)
+    server = await asyncio.start_server(agent_server.handle_connection, host, port)
+    print(f"Agent server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    verbose = "--verbose" in sys.argv
+    if verbose:
+        sys.argv.remove("--verbose")
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    try:
+        asyncio.run(serve(port=port, verbose=verbose))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Persistent, resumable agent sessions.
+
+A session is an append-only log of the message list, one JSON record per
+line: an "append" for every new message and a "replace" when a message
+object was swapped for another, which is how compaction changes the
+history. Strings of BLOB_MIN_CHARS or more (file contents, tool output)
+are stored once, by SHA-256, in a blob store shared by all sessions, and
+referenced from the log as {"$blob": digest}.
+
+Loading replays the log without touching blobs, then reads only the blobs
+the final messages still refer to, so results that compaction dropped are
+never read again. A record cut off by an interrupted write is skipped on
+load, and the next write starts on a new line after it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from google.genai import types
+
+from functions.config import CACHE_DIR
+
+SESSIONS_DIR = os.path.join(CACHE_DIR, "sessions")
+BLOB_MIN_CHARS = 1024
+BLOB_KEY = "$blob"
+
+
+class SessionNotFound(LookupError):
+    pass
+
+
+class BlobStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self._known = set()
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, text):
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._known:
+                return digest
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        with self._lock:
+            self._known.add(digest)
+        return digest
+
+    def get(self, digest):
+        with open(self._path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+
+def _externalize(value, blobs):
+    # Replace long strings by blob references, recursively
+    if isinstance(value, str) and len(value) >= BLOB_MIN_CHARS:
+        return {BLOB_KEY: blobs.put(value)}
+    if isinstance(value, dict):
+        return {key: _externalize(item, blobs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_externalize(item, blobs) for item in value]
+    return value
+
+
+def _internalize(value, blobs):
+    if isinstance(value, dict):
+        if len(value) == 1 and BLOB_KEY in value:
+            return blobs.get(value[BLOB_KEY])
+        return {key: _internalize(item, blobs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_internalize(item, blobs) for item in value]
+    return value
+
+
+def new_session_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}"
+
+
+class Session:
+    def __init__(self, session_id, directory=None):
+        # Looked up on use, so SESSIONS_DIR can be pointed elsewhere
+        directory = directory or SESSIONS_DIR
+        self.session_id = session_id
+        self.directory = directory
+        self.path = os.path.join(directory, f"{session_id}.jsonl")
+        self.blobs = BlobStore(os.path.join(directory, "blobs"))
+        self.metadata = {}
+        # The message objects as last saved, to find what changed by identity
+        self._saved = []
+
+    @classmethod
+    def create(cls, metadata, directory=None):
+        session = cls(new_session_id(), directory)
+        session.metadata = dict(metadata, created=time.time())
+        os.makedirs(session.directory, exist_ok=True)
+        session._write([{"op": "meta", **session.metadata}])
+        return session
+
+    @classmethod
+    def load(cls, session_id, directory=None):
+        """Return (session, messages) for a saved session."""
+        session = cls(session_id, directory)
+        if not os.path.exists(session.path):
+            raise SessionNotFound(f'No session "{session_id}" in {session.directory}')
+
+        records = []
+        with open(session.path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith("\n") else None
+                except json.JSONDecodeError:
+                    record = None
+                if not isinstance(record, dict):
+                    continue  # the process stopped while writing this record
+                if record["op"] == "meta":
+                    session.metadata.update({key: value for key, value in record.items() if key != "op"})
+                elif record["op"] == "append":
+                    records.append(record["content"])
+                elif record["op"] == "replace":
+                    records[record["index"]] = record["content"]
+
+        messages = [types.Content.model_validate(_internalize(record, session.blobs)) for record in records]
+        session._saved = list(messages)
+        return session, messages
+
+    def _write(self, records):
+        data = "".join(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n" for record in records)
+        with open(self.path, "a+b") as f:
+            # Do not continue a record cut off by an interrupted write
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = "\n" + data
+            f.write(data.encode("utf-8"))
+
+    def save(self, messages):
+        """Append the messages that are new or were replaced since the last save."""
+        records = []
+        for index, content in enumerate(messages):
+            if index < len(self._saved) and content is self._saved[index]:
+                continue
+            serialized = _externalize(content.model_dump(mode="json", exclude_none=True), self.blobs)
+            if index < len(self._saved):
+                records.append({"op": "replace", "index": index, "content": serialized})
+            else:
+                records.append({"op": "append", "content": serialized})
+        if records:
+            self._write(records)
+        self._saved = list(messages)
@@ -0,0 +1,93 @@
+"""Consume a streamed generate_content response while it arrives.
+
+Text parts are passed to on_text as they come in, and each function call
+to on_function_call as soon as its chunk arrives; the API sends every
+call whole, in a single chunk. The chunks are merged into one
+GenerateContentResponse shaped like the non-streaming call's result, for
+the history, the response cache and the token counts.
+"""
+
+import time
+
+from google.genai import types
+
+
+class StreamTimings:
+    """Seconds from the request to the first text and the first function call."""
+
+    def __init__(self, started=None):
+        self.started = time.monotonic() if started is None else started
+        self.first_token = None
+        self.first_tool_call = None
+
+    def mark(self, name):
+        if getattr(self, name) is None:
+            setattr(self, name, time.monotonic() - self.started)
+
+    def attributes(self):
+        """Return the timings in milliseconds as span attributes."""
+        attributes = {}
+        if self.first_token is not None:
+            attributes["ttft_ms"] = round(self.first_token * 1000, 1)
+        if self.first_tool_call is not None:
+            attributes["first_tool_call_ms"] = round(self.first_tool_call * 1000, 1)
+        return attributes
+
+
+def _append_part(parts, part):
+    # Text deltas join the text part before them, as if sent in one piece
+    if parts and part.text is not None and parts[-1].text is not None and parts[-1].thought == part.thought:
+        parts[-1] = parts[-1].model_copy(update={"text": parts[-1].text + part.text})
+    else:
+        parts.append(part)
+
+
+def merge_chunks(chunks):
+    """Merge streamed response chunks into a single GenerateContentResponse."""
+    candidates = {}
+    last = None
+    usage = None
+    for chunk in chunks:
+        last = chunk
+        usage = chunk.usage_metadata or usage
+        for position, candidate in enumerate(chunk.candidates or []):
+            index = candidate.index if candidate.index is not None else position
+            merged = candidates.setdefault(index, {"parts": [], "role": "model", "finish_reason": None})
+            if candidate.content is not None:
+                merged["role"] = candidate.content.role or merged["role"]
+                for part in candidate.content.parts or []:
+                    _append_part(merged["parts"], part)
+            merged["finish_reason"] = candidate.finish_reason or merged["finish_reason"]
+
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                index=index,
+                content=types.Content(role=merged["role"], parts=merged["parts"]),
+                finish_reason=merged["finish_reason"],
+            )
+            for index, merged in sorted(candidates.items())
+        ],
+        usage_metadata=usage,
+        model_version=last.model_version if last is not None else None,
+    )
+
+
+def consume_stream(chunks, on_text=None, on_function_call=None, timings=None):
+    """Act on every chunk as it arrives; return the merged response."""
+    timings = timings or StreamTimings()
+    received = []
+    for chunk in chunks:
+        received.append(chunk)
+        for candidate in chunk.candidates or []:
+            for part in (candidate.content.parts or []) if candidate.content else []:
+                if part.text:
+                    timings.mark("first_token")
+                    if on_text is not None and not part.thought:
+                        on_text(part.text)
+                if part.function_call:
+                    timings.mark("first_token")
+                    timings.mark("first_tool_call")
+                    if on_function_call is not None:
+                        on_function_call(part.function_call)
+    return merge_chunks(received)
@@ -0,0 +1,93 @@
+import unittest
+
+from google.genai import types
+
+from compaction import STUB_PREFIX, compact_messages
+
+CONTENT = "x = 1\n" * 100
+
+
+def call(name, **args):
+    return types.Content(role="model", parts=[types.Part.from_function_call(name=name, args=args)])
+
+
+def response(name, result):
+    return types.Content(role="tool", parts=[types.Part.from_function_response(name=name, response={"result": result})])
+
+
+def recent():
+    return [types.Content(role="user", parts=[types.Part(text=f"step {i}")]) for i in range(6)]
+
+
+def written_content(messages):
+    return messages[1].parts[0].function_call.args["content"]
+
+
+class TestWriteCompaction(unittest.TestCase):
+    def compact(self, later, token_budget=0):
+        messages = [
+            types.Content(role="user", parts=[types.Part(text="fix it")]),
+            call("write_file", file_path="a.py", content=CONTENT),
+            response("write_file", "Successfully wrote to a.py"),
+            *later,
+            *recent(),
+        ]
+        compact_messages(messages, token_budget=token_budget)
+        return messages
+
+    def test_later_write_supersedes_content(self):
+        messages = self.compact([call("edit_file", file_path="a.py", edits=[{"search": "x", "replace": "y"}])])
+        self.assertTrue(written_content(messages).startswith(STUB_PREFIX))
+
+    def test_later_complete_read_supersedes_content(self):
+        messages = self.compact([call("get_file_content", file_path="a.py"), response("get_file_content", CONTENT)])
+        self.assertTrue(written_content(messages).startswith(STUB_PREFIX))
+
+    def test_content_is_kept_within_budget(self):
+        messages = self.compact(
+            [call("edit_file", file_path="a.py", diff="@@ -1 +1 @@\n-x = 1\n+y = 1\n")], token_budget=100_000
+        )
+        self.assertEqual(written_content(messages), CONTENT)
+
+    def test_run_of_the_file_keeps_content(self):
+        messages = self.compact([call("run_python_file", file_path="a.py"), response("run_python_file", "ok")])
+        self.assertEqual(written_content(messages), CONTENT)
+
+    def test_ranged_read_keeps_content(self):
+        messages = self.compact([
+            call("get_file_content", file_path="a.py", start_line=1, end_line=2),
+            response("get_file_content", "x = 1\nx = 1\n"),
+        ])
+        self.assertEqual(written_content(messages), CONTENT)
+
+    def test_truncated_read_keeps_content(self):
+        truncated = CONTENT[:50] + '\n[...File "a.py" truncated at 50 characters]'
+        messages = self.compact([call("get_file_content", file_path="a.py"), response("get_file_content", truncated)])
+        self.assertEqual(written_content(messages), CONTENT)
+
+
+class TestReadCompaction(unittest.TestCase):
+    def test_reread_file_is_stubbed(self):
+        messages = [
+            call("get_file_content", file_path="a.py"),
+            response("get_file_content", CONTENT),
+            call("get_file_content", file_path="a.py"),
+            response("get_file_content", CONTENT + "y = 2\n"),
+            *recent(),
+        ]
+        compact_messages(messages)
+        self.assertTrue(messages[1].parts[0].function_response.response["result"].startswith(STUB_PREFIX))
+
+    def test_recent_messages_are_kept(self):
+        messages = [
+            call("get_file_content", file_path="a.py"),
+            response("get_file_content", CONTENT),
+            call("get_file_content", file_path="a.py"),
+            response("get_file_content", CONTENT),
+        ]
+        compact_messages(messages, token_budget=0)
+        self.assertEqual(messages[1].parts[0].function_response.response["result"], CONTENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from google.genai import types
+
+import main
+
+CALL_SECONDS = 0.1
+
+
+class TestToolDispatcher(unittest.TestCase):
+    def setUp(self):
+        # function name -> (start, end) of its call
+        self.spans = {}
+        self.lock = threading.Lock()
+        functions = {name: self.fake(name) for name in main.registry.TOOLS}
+        patcher = mock.patch.object(main, "FUNCTION_MAP", functions)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.executor = ThreadPoolExecutor(max_workers=main.MAX_TOOL_WORKERS)
+        self.addCleanup(self.executor.shutdown)
+
+    def fake(self, name):
+        def function(working_directory, **args):
+            start = time.monotonic()
+            time.sleep(CALL_SECONDS)
+            with self.lock:
+                self.spans[name] = (start, time.monotonic())
+            return "ok"
+
+        return function
+
+    def dispatch(self, *calls):
+        dispatcher = main.ToolDispatcher(self.executor)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, args in calls:
+                dispatcher.submit(types.FunctionCall(name=name, args=args))
+            dispatcher.results()
+
+    def assertOrdered(self, first, second):
+        self.assertGreaterEqual(self.spans[second][0], self.spans[first][1])
+
+    def test_write_waits_for_run_tests(self):
+        self.dispatch(("run_tests", {}), ("write_file", {"file_path": "pkg/a.py", "content": ""}))
+        self.assertOrdered("run_tests", "write_file")
+
+    def test_write_waits_for_listing_of_the_whole_tree(self):
+        self.dispatch(("get_files_info", {"directory": "."}), ("write_file", {"file_path": "pkg/a.py", "content": ""}))
+        self.assertOrdered("get_files_info", "write_file")
+
+    def test_edit_waits_for_evaluate_expression(self):
+        self.dispatch(
+            ("evaluate_expression", {"expressions": ["1 + 2"]}),
+            ("edit_file", {"file_path": "pkg/calculator.py", "edits": [{"search": "a", "replace": "b"}]}),
+        )
+        self.assertOrdered("evaluate_expression", "edit_file")
+
+    def test_run_waits_for_earlier_reads(self):
+        self.dispatch(("get_file_content", {"file_path": "main.py"}), ("run_python_file", {"file_path": "main.py"}))
+        self.assertOrdered("get_file_content", "run_python_file")
+
+    def test_independent_reads_overlap(self):
+        self.dispatch(("get_file_content", {"file_path": "a.py"}), ("search_files", {"query": "x"}))
+        a, b = self.spans["get_file_content"], self.spans["search_files"]
+        self.assertLess(max(a[0], b[0]), min(a[1], b[1]))
+
+    def test_write_does_not_wait_for_read_of_other_file(self):
+        self.dispatch(
+            ("get_file_content", {"file_path": "a.py"}), ("write_file", {"file_path": "b.py", "content": ""})
+        )
+        a, b = self.spans["get_file_content"], self.spans["write_file"]
+        self.assertLess(max(a[0], b[0]), min(a[1], b[1]))
+
+
+class TestRecordStartedCalls(unittest.TestCase):
+    def test_started_calls_are_recorded_with_their_results(self):
+        functions = {"write_file": lambda working_directory, **args: "written"}
+        with mock.patch.object(main, "FUNCTION_MAP", functions), ThreadPoolExecutor(max_workers=1) as executor:
+            dispatcher = main.ToolDispatcher(executor)
+            call = types.FunctionCall(name="write_file", args={"file_path": "a.py", "content": ""})
+            with contextlib.redirect_stdout(io.StringIO()):
+                dispatcher.submit(call)
+                messages = []
+                main.record_started_calls(messages, [call], dispatcher)
+
+        self.assertEqual([content.role for content in messages], ["model", "tool"])
+        self.assertEqual(messages[0].parts[0].function_call.name, "write_file")
+        self.assertEqual(messages[1].parts[0].function_response.response, {"result": "written"})
+
+    def test_nothing_is_recorded_without_a_dispatcher(self):
+        messages = []
+        main.record_started_calls(messages, [types.FunctionCall(name="write_file", args={})], None)
+        self.assertEqual(messages, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
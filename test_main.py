@@ -0,0 +1,35 @@
+import contextlib
+import io
+import sys
+import unittest
+from unittest import mock
+
+import main
+
+
+class TestIntOptions(unittest.TestCase):
+    def pop(self, argv, default=5):
+        with mock.patch.object(sys, "argv", ["main.py", *argv]):
+            value = main._pop_int_option("--budget", default)
+            self.assertEqual(sys.argv, ["main.py", "prompt"])
+        return value
+
+    def test_value_is_parsed_and_removed(self):
+        self.assertEqual(self.pop(["prompt", "--budget", "1200"]), 1200)
+        self.assertEqual(self.pop(["--budget", "0", "prompt"]), 0)
+
+    def test_default_when_missing(self):
+        self.assertEqual(self.pop(["prompt"]), 5)
+
+    def test_invalid_values_are_a_usage_error(self):
+        for value in ["many", "1.5", "-1", ""]:
+            with self.subTest(value=value):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output), self.assertRaises(SystemExit) as raised:
+                    self.pop(["prompt", "--budget", value])
+                self.assertEqual(raised.exception.code, 1)
+                self.assertEqual(output.getvalue(), "Error: --budget must be a non-negative integer\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
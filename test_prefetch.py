@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from google.genai import types
+
+from prefetch import Prefetcher, prompt_terms, rank_files
+
+
+def read(working_directory, file_path=None, directory=None):
+    if directory is not None:
+        return "- listing"
+    with open(os.path.join(working_directory, file_path)) as f:
+        return f.read()
+
+
+FUNCTIONS = {"get_files_info": read, "get_file_content": read}
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.working_directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.working_directory, "pkg"))
+        for rel_path, text in {"pkg/calculator.py": "x" * 100, "pkg/render.py": "y" * 100, "README.md": "z"}.items():
+            with open(os.path.join(self.working_directory, rel_path), "w") as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_directory, ignore_errors=True)
+
+    def prefetch(self, prompt, byte_budget=1000):
+        prefetcher = Prefetcher(self.working_directory, prompt, FUNCTIONS, byte_budget=byte_budget).start()
+        messages = [types.Content(role="user", parts=[types.Part(text=prompt)])]
+        prefetcher.attach(messages)
+        return prefetcher, messages
+
+    def test_rank_files_prefers_matching_names(self):
+        terms = prompt_terms("Fix the calculator so it renders results")
+        self.assertEqual(rank_files(self.working_directory, terms)[0], os.path.join("pkg", "calculator.py"))
+
+    def test_attach_respects_budget(self):
+        prefetcher, messages = self.prefetch("fix the calculator", byte_budget=50)
+        self.assertEqual([item["name"] for item in prefetcher.attached], ["get_files_info"])
+        self.assertEqual(len(messages), 3)
+
+    def test_slow_reads_are_still_attached(self):
+        def slow_read(working_directory, **args):
+            time.sleep(0.5)
+            return read(working_directory, **args)
+
+        functions = {"get_files_info": slow_read, "get_file_content": slow_read}
+        prefetcher = Prefetcher(self.working_directory, "fix the calculator", functions).start()
+        messages = []
+        prefetcher.attach(messages)
+        self.assertEqual(
+            [item["name"] for item in prefetcher.attached], ["get_files_info", "get_file_content"]
+        )
+        self.assertEqual(len(messages), 4)
+
+    def test_unrequested_attachments_are_waste_not_hits(self):
+        prefetcher, _ = self.prefetch("fix the calculator")
+        stats = prefetcher.stats()
+        self.assertEqual((stats["files_attached"], stats["attached_unused"]), (1, 1))
+        self.assertEqual((stats["hits"], stats["hit_rate"]), (0, None))
+
+    def test_requested_attachment_is_a_hit(self):
+        prefetcher, _ = self.prefetch("fix the calculator")
+        prefetcher.observe(types.FunctionCall(name="get_file_content", args={"file_path": "pkg/calculator.py"}))
+        prefetcher.observe(types.FunctionCall(name="get_file_content", args={"file_path": "README.md"}))
+        stats = prefetcher.stats()
+        self.assertEqual((stats["files_requested"], stats["hits"], stats["hit_rate"]), (2, 1, 0.5))
+        self.assertEqual(stats["attached_unused"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import resilience
+from resilience import DeadlineExceeded, ResilientCaller, is_retryable
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"status {code}")
+        self.code = code
+
+
+class TestResilientCaller(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(resilience, "BACKOFF_BASE_SECONDS", 0.001)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable(ApiError(503)))
+        self.assertTrue(is_retryable(ConnectionError()))
+        self.assertFalse(is_retryable(ApiError(400)))
+        self.assertFalse(is_retryable(ValueError()))
+
+    def test_retries_until_success(self):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ApiError(429)
+            return "ok"
+
+        caller = ResilientCaller(deadline=None)
+        self.assertEqual(caller.call(flaky), "ok")
+        self.assertEqual(caller.stats()["retries"], 2)
+
+    def test_permanent_error_is_not_retried(self):
+        caller = ResilientCaller(deadline=None)
+        with self.assertRaises(ApiError):
+            caller.call(mock.Mock(side_effect=ApiError(400)))
+        self.assertEqual(caller.stats()["attempts"], 1)
+
+    def test_gives_up_after_max_attempts(self):
+        caller = ResilientCaller(max_attempts=2, deadline=None)
+        with self.assertRaises(ApiError):
+            caller.call(mock.Mock(side_effect=ApiError(500)))
+        self.assertEqual((caller.stats()["attempts"], caller.stats()["failures"]), (2, 1))
+
+    def test_deadline_stops_a_hanging_call(self):
+        caller = ResilientCaller(deadline=0.1)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with self.assertRaises(DeadlineExceeded):
+            caller.call(release.wait)
+        self.assertEqual(caller.stats()["deadline_exceeded"], 1)
+
+    def test_slow_call_is_hedged(self):
+        caller = ResilientCaller(deadline=None, hedge_percentile=50)
+        caller.latencies.extend([0.01] * resilience.MIN_LATENCY_SAMPLES)
+        calls = []
+
+        def slow_first():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(1)
+                return "slow"
+            return "fast"
+
+        self.assertEqual(caller.call(slow_first), "fast")
+        self.assertEqual((caller.stats()["hedges"], caller.stats()["hedges_won"]), (1, 1))
+
+    def test_losing_hedge_is_discarded(self):
+        discarded = []
+        caller = ResilientCaller(deadline=None, hedge_percentile=50, discard=discarded.append)
+        caller.latencies.extend([0.01] * resilience.MIN_LATENCY_SAMPLES)
+        calls = []
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_first():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait()
+                return "slow"
+            return "fast"
+
+        self.assertEqual(caller.call(slow_first), "fast")
+        self.assertEqual(discarded, [])
+        release.set()
+        self.wait_for(lambda: discarded == ["slow"])
+
+    def test_answer_after_the_deadline_is_discarded(self):
+        discarded = []
+        caller = ResilientCaller(deadline=0.1, discard=discarded.append)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def hanging():
+            release.wait()
+            return "late"
+
+        with self.assertRaises(DeadlineExceeded):
+            caller.call(hanging)
+        release.set()
+        self.wait_for(lambda: discarded == ["late"])
+
+    def test_used_answer_is_not_discarded(self):
+        discarded = []
+        caller = ResilientCaller(deadline=1, discard=discarded.append)
+        self.assertEqual(caller.call(lambda: "ok"), "ok")
+        self.assertEqual(discarded, [])
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+from google.genai import types
+
+from response_cache import CacheMiss, ResponseCache, request_key
+
+MODEL = "gemini-2.0-flash-001"
+
+
+def tool_result(result):
+    return [
+        types.Content(role="user", parts=[types.Part(text="run the tests")]),
+        types.Content(role="model", parts=[types.Part.from_function_call(name="run_tests", args={})]),
+        types.Content(
+            role="tool",
+            parts=[types.Part.from_function_response(name="run_tests", response={"result": result})],
+        ),
+    ]
+
+
+def run_tests_summary(ran, cached, seconds, failed=0):
+    summary = {"total": 2, "passed": 2 - failed, "failed": failed, "errors": 0, "skipped": 0}
+    summary.update({"ran": ran, "cached": cached, "seconds": seconds, "problems": []})
+    return json.dumps(summary)
+
+
+def response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+class TestRequestKey(unittest.TestCase):
+    def test_run_times_are_masked(self):
+        first = request_key(MODEL, tool_result("[Queued 0.01s, ran 0.52s]\nok"), None)
+        second = request_key(MODEL, tool_result("[Queued 0.20s, ran 0.48s]\nok"), None)
+        self.assertEqual(first, second)
+
+    def test_run_tests_cache_counts_are_masked(self):
+        recorded = request_key(MODEL, tool_result(run_tests_summary(2, 0, 0.31)), None)
+        replayed = request_key(MODEL, tool_result(run_tests_summary(0, 2, 0.0)), None)
+        self.assertEqual(recorded, replayed)
+
+    def test_run_tests_outcomes_are_not_masked(self):
+        passed = request_key(MODEL, tool_result(run_tests_summary(2, 0, 0.31)), None)
+        failed = request_key(MODEL, tool_result(run_tests_summary(2, 0, 0.31, failed=1)), None)
+        self.assertNotEqual(passed, failed)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def test_replay_returns_recorded_response(self):
+        recorder = ResponseCache("record", directory=self.directory)
+        recorder.generate_content(
+            lambda **request: response("done"), MODEL, tool_result(run_tests_summary(2, 0, 0.31))
+        )
+
+        replayer = ResponseCache("replay", directory=self.directory)
+        replayed = replayer.generate_content(None, MODEL, tool_result(run_tests_summary(0, 2, 0.0)))
+        self.assertEqual(replayed.candidates[0].content.parts[0].text, "done")
+        self.assertEqual(replayer.stats()["hits"], 1)
+
+    def test_replay_of_unknown_request_raises(self):
+        replayer = ResponseCache("replay", directory=self.directory)
+        with self.assertRaises(CacheMiss):
+            replayer.generate_content(None, MODEL, tool_result("something else"))
+
+    def test_evicts_entries_over_the_byte_limit(self):
+        cache = ResponseCache("record", directory=self.directory, max_bytes=1)
+        cache.put("a", response("first"))
+        cache.put("b", response("second"))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
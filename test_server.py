@@ -0,0 +1,59 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from server import AgentServer
+
+
+class TestWorkingDirectory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.root = os.path.join(self.directory, "root")
+        os.makedirs(os.path.join(self.root, "pkg"))
+        os.makedirs(os.path.join(self.directory, "other"))
+        self.server = AgentServer(None, root=self.root)
+        self.addCleanup(self.server.executor.shutdown)
+
+    def test_default_is_the_root(self):
+        self.assertEqual(self.server.get_session(None, None).working_directory, os.path.realpath(self.root))
+
+    def test_directory_below_the_root_is_allowed(self):
+        session = self.server.get_session("s", os.path.join(self.root, "pkg"))
+        self.assertEqual(session.working_directory, os.path.realpath(os.path.join(self.root, "pkg")))
+
+    def test_directories_outside_the_root_are_rejected(self):
+        os.symlink(os.path.join(self.directory, "other"), os.path.join(self.root, "link"))
+        for working_directory in [
+            os.path.join(self.directory, "other"),
+            os.path.join(self.root, "..", "other"),
+            os.path.join(self.root, "link"),
+            self.root + "-sibling",
+            "/",
+        ]:
+            with self.subTest(working_directory=working_directory):
+                with self.assertRaisesRegex(ValueError, "outside the permitted working directory"):
+                    self.server.get_session(None, working_directory)
+        self.assertEqual(self.server.sessions, {})
+
+    def test_missing_directory_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "is not a directory"):
+            self.server.get_session(None, os.path.join(self.root, "missing"))
+
+    def test_request_outside_the_root_gets_an_error_event(self):
+        events = []
+
+        async def send(event):
+            events.append(event)
+
+        request = {"session": "s", "prompt": "hi", "working_directory": os.path.join(self.directory, "other")}
+        asyncio.run(self.server.handle_request(request, send))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["event"], "error")
+        self.assertIn("outside the permitted working directory", events[0]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
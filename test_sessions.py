@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from google.genai import types
+
+from sessions import BLOB_MIN_CHARS, Session, SessionNotFound
+
+
+def text(role, value):
+    return types.Content(role=role, parts=[types.Part(text=value)])
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def test_saved_messages_load_again(self):
+        session = Session.create({"prompt": "hello"}, directory=self.directory)
+        messages = [text("user", "hello"), text("model", "x" * BLOB_MIN_CHARS)]
+        session.save(messages)
+
+        loaded, loaded_messages = Session.load(session.session_id, directory=self.directory)
+        self.assertEqual(loaded.metadata["prompt"], "hello")
+        self.assertEqual(loaded_messages, messages)
+
+    def test_long_strings_are_stored_once(self):
+        session = Session.create({}, directory=self.directory)
+        long_text = "y" * BLOB_MIN_CHARS
+        session.save([text("user", long_text), text("model", long_text)])
+        with open(session.path, encoding="utf-8") as f:
+            self.assertNotIn(long_text, f.read())
+        blobs = [name for _, _, names in os.walk(os.path.join(self.directory, "blobs")) for name in names]
+        self.assertEqual(len(blobs), 1)
+
+    def test_replaced_messages_are_saved(self):
+        session = Session.create({}, directory=self.directory)
+        messages = [text("user", "a"), text("model", "b")]
+        session.save(messages)
+        # Compaction replaces messages in place
+        messages[1] = text("model", "compacted")
+        messages.append(text("user", "c"))
+        session.save(messages)
+
+        _, loaded_messages = Session.load(session.session_id, directory=self.directory)
+        self.assertEqual([content.parts[0].text for content in loaded_messages], ["a", "compacted", "c"])
+
+    def test_partly_written_record_is_ignored(self):
+        session = Session.create({}, directory=self.directory)
+        session.save([text("user", "a")])
+        with open(session.path, "a", encoding="utf-8") as f:
+            f.write('{"op":"append","content":{"ro')
+
+        _, loaded_messages = Session.load(session.session_id, directory=self.directory)
+        self.assertEqual(len(loaded_messages), 1)
+
+    def test_saving_after_a_partly_written_record(self):
+        session = Session.create({}, directory=self.directory)
+        session.save([text("user", "a")])
+        with open(session.path, "a", encoding="utf-8") as f:
+            f.write('{"op":"append","content":{"ro')
+
+        resumed, messages = Session.load(session.session_id, directory=self.directory)
+        messages.append(text("model", "b"))
+        resumed.save(messages)
+        messages.append(text("user", "c"))
+        resumed.save(messages)
+
+        _, loaded_messages = Session.load(session.session_id, directory=self.directory)
+        self.assertEqual([content.parts[0].text for content in loaded_messages], ["a", "b", "c"])
+
+    def test_record_cut_inside_a_character_is_ignored(self):
+        session = Session.create({}, directory=self.directory)
+        session.save([text("user", "a")])
+        with open(session.path, "ab") as f:
+            f.write('{"op":"append","content":{"role":"user","parts":[{"text":"é'.encode("utf-8")[:-1])
+        session.save([text("user", "a"), text("model", "b")])
+
+        _, loaded_messages = Session.load(session.session_id, directory=self.directory)
+        self.assertEqual([content.parts[0].text for content in loaded_messages], ["a", "b"])
+
+    def test_unknown_session_raises(self):
+        with self.assertRaises(SessionNotFound):
+            Session.load("missing", directory=self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from tracing import Tracer
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.path = os.path.join(self.directory, "trace.jsonl")
+
+    def trace(self, otel=False):
+        tracer = Tracer(self.path, otel=otel)
+        with tracer.span("iteration", number=1):
+            with tracer.span("model_call") as attributes:
+                attributes.update(prompt_tokens=10, total_tokens=12, ttft_ms=5.5)
+
+            def tool_call():
+                with tracer.span("tool_call", tool="get_file_content", ok=True):
+                    pass
+
+            thread = threading.Thread(target=tool_call)
+            thread.start()
+            thread.join()
+        with self.assertRaises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        tracer.close()
+        with open(self.path, encoding="utf-8") as f:
+            return tracer, {record.get("name"): record for record in map(json.loads, f)}
+
+    def test_jsonl_span_fields(self):
+        tracer, records = self.trace()
+        iteration, model_call = records["iteration"], records["model_call"]
+        self.assertEqual(
+            set(iteration), {"trace_id", "span_id", "parent_id", "name", "start", "duration_ms", "attributes"}
+        )
+        self.assertEqual(iteration["trace_id"], tracer.trace_id)
+        self.assertIsNone(iteration["parent_id"])
+        self.assertEqual(iteration["attributes"], {"number": 1})
+        self.assertEqual(model_call["parent_id"], iteration["span_id"])
+        self.assertEqual(model_call["attributes"], {"prompt_tokens": 10, "total_tokens": 12, "ttft_ms": 5.5})
+        self.assertGreaterEqual(iteration["duration_ms"], model_call["duration_ms"])
+        self.assertEqual(len(iteration["span_id"]), 16)
+        self.assertEqual(len(iteration["trace_id"]), 32)
+
+    def test_tool_call_on_a_worker_thread_is_a_child_of_the_main_thread_span(self):
+        _, records = self.trace()
+        self.assertEqual(records["tool_call"]["parent_id"], records["iteration"]["span_id"])
+
+    def test_error_is_recorded(self):
+        _, records = self.trace()
+        self.assertEqual(records["failing"]["error"], "ValueError('boom')")
+        self.assertNotIn("error", records["iteration"])
+
+    def test_otel_span_fields(self):
+        tracer, records = self.trace(otel=True)
+        iteration, tool_call = records["iteration"], records["tool_call"]
+        self.assertEqual(
+            set(iteration),
+            {"traceId", "spanId", "parentSpanId", "name", "startTimeUnixNano", "endTimeUnixNano", "attributes", "status"},
+        )
+        self.assertEqual(iteration["traceId"], tracer.trace_id)
+        self.assertEqual(iteration["parentSpanId"], "")
+        self.assertEqual(tool_call["parentSpanId"], iteration["spanId"])
+        self.assertLessEqual(int(iteration["startTimeUnixNano"]), int(iteration["endTimeUnixNano"]))
+        self.assertEqual(iteration["status"], {"code": 1})
+        self.assertEqual(records["failing"]["status"], {"code": 2, "message": "ValueError('boom')"})
+        self.assertEqual(
+            tool_call["attributes"],
+            [
+                {"key": "tool", "value": {"stringValue": "get_file_content"}},
+                {"key": "ok", "value": {"boolValue": True}},
+            ],
+        )
+        self.assertEqual(
+            records["model_call"]["attributes"],
+            [
+                {"key": "prompt_tokens", "value": {"intValue": "10"}},
+                {"key": "total_tokens", "value": {"intValue": "12"}},
+                {"key": "ttft_ms", "value": {"doubleValue": 5.5}},
+            ],
+        )
+
+    def test_summary_totals(self):
+        tracer, _ = self.trace()
+        summary = tracer.summary()
+        self.assertIn("tool_call get_file_content", summary)
+        self.assertIn("tokens: prompt_tokens=10, candidates_tokens=0, total_tokens=12", summary)
+        self.assertIn("ttft_ms: mean 5.5, max 5.5 over 1 calls", summary)
+
+    def test_disabled_tracer_writes_nothing(self):
+        tracer = Tracer()
+        with tracer.span("iteration") as attributes:
+            attributes["number"] = 1
+        self.assertEqual(tracer.totals, {})
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
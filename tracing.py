@@ -0,0 +1,161 @@
+"""Structured tracing for the agent loop.
+
+Spans are timed blocks (an iteration, a model call, a tool call) with
+attributes. Finished spans are appended to a JSONL file, one object per
+line, either in a flat shape or in the OTLP/JSON span shape used by
+OpenTelemetry, and are aggregated for a summary table at exit. Tracing is
+off until set_tracer() installs an enabled Tracer.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TOKEN_ATTRIBUTES = ("prompt_tokens", "candidates_tokens", "total_tokens")
+# Streaming latencies of model calls, summarized as mean and max
+LATENCY_ATTRIBUTES = ("ttft_ms", "first_tool_call_ms")
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    def __init__(self, path=None, otel=False):
+        self.enabled = path is not None
+        self.path = path
+        self.otel = otel
+        self.trace_id = os.urandom(16).hex()
+        self.totals = {}
+        self.tokens = dict.fromkeys(TOKEN_ATTRIBUTES, 0)
+        self.latencies = {attribute: [] for attribute in LATENCY_ATTRIBUTES}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._main_thread = threading.get_ident()
+        self._main_stack = []
+        self._file = open(path, "a", encoding="utf-8") if self.enabled else None
+
+    def _stack(self):
+        if threading.get_ident() == self._main_thread:
+            return self._main_stack
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the block as a span; the yielded dict takes more attributes."""
+        if not self.enabled:
+            yield attributes
+            return
+
+        stack = self._stack()
+        # Tool calls on worker threads belong to the span open on the main thread
+        parent = stack[-1] if stack else (self._main_stack[-1] if self._main_stack else None)
+        span_id = os.urandom(8).hex()
+        stack.append(span_id)
+        start_ns = time.time_ns()
+        started = time.perf_counter_ns()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            duration_ns = time.perf_counter_ns() - started
+            stack.pop()
+            self._record(name, span_id, parent, start_ns, duration_ns, attributes, error)
+
+    def _record(self, name, span_id, parent, start_ns, duration_ns, attributes, error):
+        if self.otel:
+            record = {
+                "traceId": self.trace_id,
+                "spanId": span_id,
+                "parentSpanId": parent or "",
+                "name": name,
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(start_ns + duration_ns),
+                "attributes": [{"key": key, "value": _otel_value(value)} for key, value in attributes.items()],
+                "status": {"code": 2, "message": error} if error else {"code": 1},
+            }
+        else:
+            record = {
+                "trace_id": self.trace_id,
+                "span_id": span_id,
+                "parent_id": parent,
+                "name": name,
+                "start": start_ns / 1e9,
+                "duration_ms": duration_ns / 1e6,
+                "attributes": attributes,
+            }
+            if error:
+                record["error"] = error
+
+        key = name if "tool" not in attributes else f"{name} {attributes['tool']}"
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            count, total, longest = self.totals.get(key, (0, 0, 0))
+            self.totals[key] = (count + 1, total + duration_ns, max(longest, duration_ns))
+            for attribute in TOKEN_ATTRIBUTES:
+                self.tokens[attribute] += attributes.get(attribute) or 0
+            for attribute in LATENCY_ATTRIBUTES:
+                if attributes.get(attribute) is not None:
+                    self.latencies[attribute].append(attributes[attribute])
+
+    def summary(self):
+        """Return a table of count and time per span name (tool calls per tool),
+        followed by token totals and streaming latencies."""
+        lines = [f"{'span':<40} {'count':>6} {'total ms':>10} {'mean ms':>10} {'max ms':>10}"]
+        with self._lock:
+            for key, (count, total, longest) in sorted(self.totals.items()):
+                lines.append(
+                    f"{key:<40} {count:>6} {total / 1e6:>10.1f} {total / count / 1e6:>10.1f} {longest / 1e6:>10.1f}"
+                )
+            lines.append("tokens: " + ", ".join(f"{key}={value}" for key, value in self.tokens.items()))
+            for attribute, values in self.latencies.items():
+                if values:
+                    lines.append(
+                        f"{attribute}: mean {sum(values) / len(values):.1f}, max {max(values):.1f} over {len(values)} calls"
+                    )
+        return "\n".join(lines)
+
+    def close(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+            self.enabled = False
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def set_tracer(tracer):
+    global _tracer
+    _tracer = tracer
+
+
+def usage_attributes(response):
+    """Return the token counts of a generate_content response as span attributes."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": usage.prompt_token_count or 0,
+        "candidates_tokens": usage.candidates_token_count or 0,
+        "total_tokens": usage.total_token_count or 0,
+    }